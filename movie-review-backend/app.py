@@ -1,10 +1,13 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, has_app_context
 from flask_cors import CORS
 import mysql.connector
 import os
 from dotenv import load_dotenv
 from werkzeug.security import generate_password_hash, check_password_hash
 import logging
+import io
+import atexit
+import itertools
 from datetime import datetime, timedelta
 import secrets
 import smtplib
@@ -12,6 +15,31 @@ from email.message import EmailMessage
 from functools import wraps
 import jwt
 
+from db_pool import ConnectionPool, PoolTimeout
+from json_provider import FastJSONProvider, RawJSON
+import rating_stats
+import catalog
+import moods
+import catalog_cache
+from catalog_cache import CatalogCache
+import http_cache
+import streaming
+import ingest
+import trace_queue
+import review_writes
+import review_feeds
+import recommendations
+import batch_recommendations
+from recommendation_cache import RecommendationCache
+import item_cf
+import mf_model
+import similar_movies
+from rating_percentiles import RatingPercentiles
+from taste_profiles import TasteProfiles
+from trust_heatmap import TrustHeatmaps
+from endpoints import algorithm_explain
+from pagination import encode_cursor, decode_cursor, parse_limit, split_page
+
 load_dotenv()
 
 # Configure logging
@@ -30,7 +58,54 @@ DB_CONFIG = {
     "database": os.getenv("DB_NAME", "movie_review_db"),
 }
 
+# One pool per gunicorn worker; size it so workers * DB_POOL_SIZE stays
+# under the MySQL max_connections limit.
+db_pool = ConnectionPool(
+    DB_CONFIG,
+    size=int(os.getenv("DB_POOL_SIZE", "5")),
+    timeout=float(os.getenv("DB_POOL_TIMEOUT", "2")),
+    max_lifetime=int(os.getenv("DB_POOL_MAX_LIFETIME", "1800")),
+    ping_after=float(os.getenv("DB_POOL_PING_AFTER", "5")),
+)
+
+movie_cache = CatalogCache(
+    max_entries=int(os.getenv("CATALOG_CACHE_ENTRIES", "2048")),
+    max_bytes=int(os.getenv("CATALOG_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    poll_interval=float(os.getenv("CATALOG_VERSION_POLL", "1")),
+)
+cf_index = item_cf.IndexStore(
+    os.getenv("ITEM_CF_INDEX", item_cf.DEFAULT_PATH),
+    check_interval=float(os.getenv("MODEL_RELOAD_CHECK", "30")),
+)
+mf_models = mf_model.ModelStore(
+    os.getenv("MF_MODEL_DIR", mf_model.DEFAULT_DIR),
+    check_interval=float(os.getenv("MODEL_RELOAD_CHECK", "30")),
+)
+similar_index = item_cf.IndexStore(
+    os.getenv("SIMILAR_INDEX", similar_movies.DEFAULT_PATH),
+    check_interval=float(os.getenv("MODEL_RELOAD_CHECK", "30")),
+    loader=similar_movies.SimilarIndex.load,
+)
+rating_index = RatingPercentiles(max_age=float(os.getenv("RATING_PERCENTILE_MAX_AGE", "60")))
+taste_profiles = TasteProfiles(
+    max_entries=int(os.getenv("TASTE_PROFILE_ENTRIES", "50000")),
+    max_age=float(os.getenv("TASTE_PROFILE_MAX_AGE", "300")),
+)
+trust_heatmaps = TrustHeatmaps(
+    max_entries=int(os.getenv("TRUST_HEATMAP_ENTRIES", "4096")),
+    max_age=float(os.getenv("TRUST_HEATMAP_MAX_AGE", "300")),
+)
+rec_cache = RecommendationCache(
+    ttl=float(os.getenv("REC_CACHE_TTL", "300")),
+    stale_ttl=float(os.getenv("REC_CACHE_STALE_TTL", "900")),
+    max_entries=int(os.getenv("REC_CACHE_ENTRIES", "10000")),
+    max_bytes=int(os.getenv("REC_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+    max_pending=int(os.getenv("REC_CACHE_MAX_REFRESHES", "256")),
+)
+RECOMMENDATION_ALGORITHMS = (recommendations.ALGORITHM, item_cf.ALGORITHM, mf_model.ALGORITHM)
+
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-change-in-production')
 CORS(app)
 
@@ -90,6 +165,15 @@ def require_role(*roles):
         return decorated
     return decorator
 
+def optional_user_id():
+    """The signed-in user's id when the request carries a valid token, else None."""
+    auth_header = request.headers.get('Authorization')
+    if not auth_header:
+        return None
+    parts = auth_header.split(' ')
+    payload = verify_jwt_token(parts[1]) if len(parts) > 1 else None
+    return payload.get('user_id') if payload else None
+
 
 def ensure_movie_schema():
     conn = None
@@ -171,18 +255,225 @@ def ensure_decision_trace_schema():
         if conn:
             conn.close()
 
+def ensure_rating_stats_schema():
+    conn = None
+    try:
+        conn = get_db()
+        cursor = conn.cursor()
+        cursor.execute(rating_stats.SCHEMA)
+        cursor.execute(rating_stats.USER_SCHEMA)
+        cursor.execute(rating_stats.DAILY_SCHEMA)
+        conn.commit()
+        # Backfill movies that have no aggregate row yet (first run, manual inserts).
+        rating_stats.rebuild(conn, missing_only=True)
+        rating_stats.rebuild_users(conn, missing_only=True)
+        rating_stats.rebuild_daily(conn, missing_only=True)
+    except mysql.connector.Error:
+        logger.exception("Failed to migrate movie_rating_stats schema")
+    finally:
+        if conn:
+            conn.close()
+
+def ensure_search_schema():
+    conn = None
+    try:
+        conn = get_db()
+        cursor = conn.cursor()
+        cursor.execute(moods.SCHEMA)
+        cursor.execute(
+            """
+            SELECT COUNT(*) FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = 'movies'
+              AND index_name = 'ft_movies_title_description'
+            """
+        )
+        if not cursor.fetchone()[0]:
+            cursor.execute(
+                "CREATE FULLTEXT INDEX ft_movies_title_description ON movies(title, description)"
+            )
+        conn.commit()
+        moods.seed(conn)
+    except mysql.connector.Error:
+        logger.exception("Failed to migrate search schema")
+    finally:
+        if conn:
+            conn.close()
+
+def ensure_catalog_version_schema():
+    conn = None
+    try:
+        conn = get_db()
+        cursor = conn.cursor()
+        cursor.execute(catalog_cache.SCHEMA)
+        cursor.execute("INSERT IGNORE INTO catalog_version (id, version) VALUES (1, 1)")
+        conn.commit()
+    except mysql.connector.Error:
+        logger.exception("Failed to migrate catalog_version schema")
+    finally:
+        if conn:
+            conn.close()
+
+def ensure_movie_natural_key_schema():
+    conn = None
+    try:
+        conn = get_db()
+        ingest.ensure_natural_key(conn.cursor())
+        conn.commit()
+    except mysql.connector.IntegrityError:
+        logger.warning(
+            "movies has duplicate (title, release_year) pairs; %s not created",
+            ingest.NATURAL_KEY_INDEX,
+        )
+    except mysql.connector.Error:
+        logger.exception("Failed to migrate movies natural key")
+    finally:
+        if conn:
+            conn.close()
+
+def ensure_review_feed_schema():
+    conn = None
+    try:
+        conn = get_db()
+        review_feeds.ensure_indexes(conn.cursor())
+        conn.commit()
+    except mysql.connector.Error:
+        logger.exception("Failed to migrate review feed indexes")
+    finally:
+        if conn:
+            conn.close()
+
+def ensure_recommendation_schema():
+    conn = None
+    try:
+        conn = get_db()
+        cursor = conn.cursor()
+        cursor.execute(recommendations.SCHEMA)
+        cursor.execute(recommendations.STATE_SCHEMA)
+        conn.commit()
+    except mysql.connector.Error:
+        logger.exception("Failed to migrate recommendation schema")
+    finally:
+        if conn:
+            conn.close()
+
 def get_db():
+    """
+    Check out a pooled connection.
+    Inside a request the same connection is reused by every get_db() call and
+    returned to the pool at teardown, so handlers' conn.close() is a no-op.
+    """
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        return conn
+        if has_app_context():
+            conn = g.get("db_conn")
+            if conn is None:
+                conn = g.db_conn = db_pool.connection(request_scoped=True)
+            return conn
+        return db_pool.connection()
+    except PoolTimeout:
+        logger.warning("DB pool exhausted: %s", db_pool.stats())
+        raise
     except mysql.connector.Error as e:
         logger.exception("Failed to get DB connection")
         raise
 
 
+trace_buffer = trace_queue.TraceQueue(
+    get_db,
+    max_size=int(os.getenv("TRACE_QUEUE_SIZE", "10000")),
+    batch_size=int(os.getenv("TRACE_BATCH_SIZE", "500")),
+    flush_interval=int(os.getenv("TRACE_FLUSH_MS", "200")) / 1000,
+)
+atexit.register(trace_buffer.close)
+# Catalog edits reach the similar-movies index file in background batches;
+# other workers reload it on their next check.
+similar_patcher = similar_movies.Patcher(
+    similar_index.path,
+    similar_index.replace,
+    delay=int(os.getenv("SIMILAR_PATCH_DELAY_MS", "1000")) / 1000,
+)
+atexit.register(similar_patcher.close)
+
+
+@app.teardown_appcontext
+def release_db(exc):
+    conn = g.pop("db_conn", None)
+    if conn is not None:
+        conn.release()
+
+
+@app.errorhandler(PoolTimeout)
+def handle_pool_timeout(e):
+    return jsonify({"message": "Service busy, please retry"}), 503, {"Retry-After": "1"}
+
+
 ensure_movie_schema()
 ensure_auth_schema()
 ensure_decision_trace_schema()
+ensure_rating_stats_schema()
+ensure_search_schema()
+ensure_catalog_version_schema()
+ensure_movie_natural_key_schema()
+ensure_review_feed_schema()
+ensure_recommendation_schema()
+
+
+def serialize_json(obj):
+    """Serialize like jsonify() does, returning the body bytes."""
+    return app.json.dumps_bytes(obj) + b"\n"
+
+
+def json_bytes_response(payload, status=200):
+    """Response for an already-serialized JSON body (e.g. from the catalog cache)."""
+    return app.response_class(payload, status=status, mimetype="application/json")
+
+
+def response_format():
+    """`?format=ndjson` streams one JSON object per line instead of an array."""
+    return "ndjson" if request.args.get("format") == "ndjson" else "json"
+
+
+def stream_query(sql, params=(), fmt="json", transform=None, prefix=b"", suffix=None,
+                 on_complete=None, max_kept=None):
+    """
+    Stream a query's rows as the response body (see streaming.py), compressed
+    per Accept-Encoding. The request's pooled connection is handed to the
+    body and returned to the pool when the server closes the response.
+    on_complete gets the encoded body unless it exceeds max_kept bytes.
+    """
+    encoding = streaming.negotiate_encoding(request.accept_encodings)
+    conn = get_db().detach()
+    g.pop("db_conn", None)
+    try:
+        batches = streaming.iter_rows(conn, sql, params)
+    except Exception:
+        conn.close()
+        raise
+    chunks = streaming.json_chunks(batches, app.json.dumps_bytes, fmt, transform, prefix, suffix)
+    body = streaming.ClosingBody(
+        streaming.encode(chunks, encoding, on_complete, max_kept), batches.close, conn.close
+    )
+    return streaming.encoded_response(app.response_class, body, fmt, encoding)
+
+
+def parse_review_feed(feed, owner_id):
+    """Validate review feed page params into (sql, params, limit)."""
+    limit = parse_limit(request.args.get("limit"), default=20, maximum=100)
+    filters = review_feeds.parse_filters(request.args)
+    token = request.args.get("cursor")
+    after = decode_cursor(token, f"reviews:{feed}", 2) if token else None
+    sql, params = review_feeds.feed_query(feed, owner_id, filters, after, limit)
+    return sql, params, limit
+
+
+def review_feed_page(feed, sql, params, limit):
+    """Run a review feed page query; `next_cursor` is null on the last page."""
+    cursor = get_db().cursor(dictionary=True)
+    cursor.execute(sql, params)
+    reviews, has_more = split_page(cursor.fetchall(), limit)
+    next_cursor = None
+    if has_more:
+        next_cursor = encode_cursor(f"reviews:{feed}", *review_feeds.cursor_values(reviews[-1]))
+    return jsonify({"reviews": reviews, "next_cursor": next_cursor, "limit": limit})
 
 
 def send_otp_email(to_email, code):
@@ -360,24 +651,48 @@ def verify_login_otp():
             conn.close()
 
 
+MOVIE_PAGE_PARAMS = ("limit", "cursor", "fields", "sort")
+
+
 @app.route("/api/movies", methods=["GET"])
 def get_movies():
+    """
+    List movies.
+    With any of limit/cursor/fields/sort the response is one keyset page:
+    {"movies": [...], "next_cursor": ...}. Without them the whole catalog is
+    returned as a plain array for older clients.
+    """
+    if any(param in request.args for param in MOVIE_PAGE_PARAMS):
+        return get_movies_page()
     conn = None
     try:
-        conn = get_db()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(
+        fmt = response_format()
+        encoding = streaming.negotiate_encoding(request.accept_encodings)
+        version = movie_cache.current_version(get_db)
+        # Each format/encoding is its own representation with its own strong ETag.
+        etag = http_cache.make_etag("catalog", version, fmt, encoding or "identity")
+        if http_cache.is_fresh(etag):
+            return http_cache.not_modified(etag, http_cache.CATALOG_CACHE_CONTROL)
+        cache_key = ("listing", fmt, encoding)
+        cached = movie_cache.get(cache_key)
+        if cached is not None:
+            response = streaming.encoded_response(app.response_class, cached, fmt, encoding)
+            return http_cache.apply(response, etag, http_cache.CATALOG_CACHE_CONTROL)
+        # Stream the listing and keep the encoded body for the cache once it is complete.
+        response = stream_query(
             """
-            SELECT m.*, COALESCE(AVG(r.rating), 0) AS avg_rating,
-                   COUNT(r.review_id) AS review_count
+            SELECT m.*, COALESCE(s.avg_rating, 0) AS avg_rating,
+                   COALESCE(s.review_count, 0) AS review_count
             FROM movies m
-            LEFT JOIN reviews r ON m.movie_id = r.movie_id
-            GROUP BY m.movie_id
+            LEFT JOIN movie_rating_stats s ON s.movie_id = m.movie_id
             ORDER BY m.movie_id DESC
-            """
+            """,
+            fmt=fmt,
+            on_complete=lambda payload: movie_cache.put(cache_key, payload, version),
+            # A listing too big to cache is not held in memory while it streams.
+            max_kept=movie_cache.max_bytes,
         )
-        movies = cursor.fetchall()
-        return jsonify(movies)
+        return http_cache.apply(response, etag, http_cache.CATALOG_CACHE_CONTROL)
     except mysql.connector.Error:
         logger.exception("Failed to fetch movies")
         return jsonify({"message": "Internal server error"}), 500
@@ -386,27 +701,138 @@ def get_movies():
             conn.close()
 
 
+def get_movies_page():
+    sort = request.args.get("sort", "newest")
+    if sort not in catalog.LIST_SORTS:
+        return jsonify({"message": f"sort must be one of {', '.join(catalog.LIST_SORTS)}"}), 400
+    try:
+        limit = parse_limit(request.args.get("limit"), default=20, maximum=100)
+        fields = catalog.parse_fields(request.args.get("fields"))
+        token = request.args.get("cursor")
+        after = decode_cursor(token, sort, catalog.cursor_arity(sort)) if token else None
+        sql, params = catalog.listing_query(fields, sort, after, limit)
+    except (ValueError, TypeError) as e:
+        return jsonify({"message": str(e)}), 400
+
+    cache_key = ("page", tuple(sorted(request.args.items(multi=True))))
+    conn = None
+    try:
+        version = movie_cache.current_version(get_db)
+        etag = http_cache.make_etag("catalog", version, args=request.args)
+        if http_cache.is_fresh(etag):
+            return http_cache.not_modified(etag, http_cache.CATALOG_CACHE_CONTROL)
+        cached = movie_cache.get(cache_key)
+        if cached is not None:
+            return http_cache.apply(json_bytes_response(cached), etag, http_cache.CATALOG_CACHE_CONTROL)
+        conn = get_db()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(sql, params)
+        movies, has_more = split_page(cursor.fetchall(), limit)
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(sort, *catalog.cursor_values(sort, movies[-1]))
+        for movie in movies:
+            movie.pop("_sort_key", None)
+        payload = serialize_json({
+            "movies": movies,
+            "next_cursor": next_cursor,
+            "limit": limit,
+            "sort": sort,
+        })
+        movie_cache.put(cache_key, payload, version)
+        return http_cache.apply(json_bytes_response(payload), etag, http_cache.CATALOG_CACHE_CONTROL)
+    except mysql.connector.Error:
+        logger.exception("Failed to fetch movies page")
+        return jsonify({"message": "Internal server error"}), 500
+    finally:
+        if conn:
+            conn.close()
+
+
+@app.route("/api/movies/search", methods=["GET"])
+def search_movies():
+    """
+    Server-side search and discovery.
+    Filters: q (title/description full-text), genre (comma separated), mood,
+    language, year_from, year_to, min_rating, max_duration. Sorted by `sort`
+    and keyset-paginated like /api/movies.
+    """
+    try:
+        spec = catalog.parse_search(request.args, moods.MOODS)
+        limit = parse_limit(request.args.get("limit"), default=20, maximum=100)
+        fields = catalog.parse_fields(request.args.get("fields"))
+        token = request.args.get("cursor")
+        after = decode_cursor(token, f"search:{spec['sort']}", 2) if token else None
+        sql, params = catalog.search_query(spec, fields, after, limit)
+    except (ValueError, TypeError) as e:
+        return jsonify({"message": str(e)}), 400
+
+    conn = None
+    try:
+        version = movie_cache.current_version(get_db)
+        etag = http_cache.make_etag("search", version, args=request.args)
+        if http_cache.is_fresh(etag):
+            return http_cache.not_modified(etag, http_cache.CATALOG_CACHE_CONTROL)
+        conn = get_db()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(sql, params)
+        movies, has_more = split_page(cursor.fetchall(), limit)
+        next_cursor = None
+        if has_more:
+            last = movies[-1]
+            next_cursor = encode_cursor(f"search:{spec['sort']}", last["_sort_key"], last["movie_id"])
+        for movie in movies:
+            movie.pop("_sort_key", None)
+        response = jsonify({
+            "movies": movies,
+            "next_cursor": next_cursor,
+            "limit": limit,
+            "sort": spec["sort"],
+        })
+        return http_cache.apply(response, etag, http_cache.CATALOG_CACHE_CONTROL)
+    except mysql.connector.Error:
+        logger.exception("Failed to search movies: %s", dict(request.args))
+        return jsonify({"message": "Internal server error"}), 500
+    finally:
+        if conn:
+            conn.close()
+
+
+@app.route("/api/moods", methods=["GET"])
+def get_moods():
+    """Mood definitions for mood-based discovery (mood id -> label, genres)."""
+    return jsonify([{"id": mood_id, **spec} for mood_id, spec in moods.MOODS.items()])
+
+
 @app.route("/api/movies/<int:id>", methods=["GET"])
 def get_movie(id):
     conn = None
     try:
+        version = movie_cache.current_version(get_db)
+        etag = http_cache.make_etag("movie", id, version)
+        if http_cache.is_fresh(etag):
+            return http_cache.not_modified(etag, http_cache.MOVIE_CACHE_CONTROL)
+        cached = movie_cache.get(("movie", id))
+        if cached is not None:
+            return http_cache.apply(json_bytes_response(cached), etag, http_cache.MOVIE_CACHE_CONTROL)
         conn = get_db()
         cursor = conn.cursor(dictionary=True)
         cursor.execute(
             """
-            SELECT m.*, COALESCE(AVG(r.rating), 0) AS avg_rating,
-                   COUNT(r.review_id) AS review_count
+            SELECT m.*, COALESCE(s.avg_rating, 0) AS avg_rating,
+                   COALESCE(s.review_count, 0) AS review_count
             FROM movies m
-            LEFT JOIN reviews r ON m.movie_id = r.movie_id
+            LEFT JOIN movie_rating_stats s ON s.movie_id = m.movie_id
             WHERE m.movie_id=%s
-            GROUP BY m.movie_id
             """,
             (id,),
         )
         movie = cursor.fetchone()
         if not movie:
             return jsonify({"message": "Movie not found"}), 404
-        return jsonify(movie)
+        payload = serialize_json(movie)
+        movie_cache.put(("movie", id), payload, version)
+        return http_cache.apply(json_bytes_response(payload), etag, http_cache.MOVIE_CACHE_CONTROL)
     except mysql.connector.Error:
         logger.exception("Failed to fetch movie id=%s", id)
         return jsonify({"message": "Internal server error"}), 500
@@ -415,6 +841,144 @@ def get_movie(id):
             conn.close()
 
 
+def movie_payloads(ids, version):
+    """
+    {movie_id: serialized movie} for the ids that exist, from the same
+    per-movie cache get_movie fills; only misses hit MySQL.
+    """
+    payloads = {}
+    for movie_id in ids:
+        cached = movie_cache.get(("movie", movie_id))
+        if cached is not None:
+            payloads[movie_id] = cached
+    pending = [movie_id for movie_id in ids if movie_id not in payloads]
+    if pending:
+        cursor = get_db().cursor(dictionary=True)
+        cursor.execute(
+            f"""
+            SELECT m.*, COALESCE(s.avg_rating, 0) AS avg_rating,
+                   COALESCE(s.review_count, 0) AS review_count
+            FROM movies m
+            LEFT JOIN movie_rating_stats s ON s.movie_id = m.movie_id
+            WHERE m.movie_id IN ({",".join(["%s"] * len(pending))})
+            """,
+            pending,
+        )
+        for movie in cursor.fetchall():
+            payload = serialize_json(movie)
+            movie_cache.put(("movie", movie["movie_id"]), payload, version)
+            payloads[movie["movie_id"]] = payload
+    return payloads
+
+
+@app.route("/api/movies/batch", methods=["GET", "POST"])
+def get_movies_batch():
+    """
+    Resolve many movie IDs in one round trip (`?ids=3,1,2`, or a JSON body
+    `{"ids": [...]}` for long lists). Movies come back in the requested order
+    and unknown IDs are listed under `missing`.
+    """
+    if request.method == "POST":
+        raw_ids = (request.get_json(silent=True) or {}).get("ids")
+    else:
+        raw_ids = [part for value in request.args.getlist("ids") for part in value.split(",") if part]
+    try:
+        ids = catalog.parse_ids(raw_ids)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    try:
+        version = movie_cache.current_version(get_db)
+        etag = None
+        if request.method == "GET":
+            etag = http_cache.make_etag("batch", version, args=request.args)
+            if http_cache.is_fresh(etag):
+                return http_cache.not_modified(etag, http_cache.MOVIE_CACHE_CONTROL)
+
+        payloads = movie_payloads(ids, version)
+        missing = [movie_id for movie_id in ids if movie_id not in payloads]
+        body = (
+            b'{"movies":['
+            + b",".join(payloads[movie_id].rstrip(b"\n") for movie_id in ids if movie_id in payloads)
+            + b'],"missing":'
+            + app.json.dumps_bytes(missing)
+            + b"}\n"
+        )
+        response = json_bytes_response(body)
+        if etag:
+            http_cache.apply(response, etag, http_cache.MOVIE_CACHE_CONTROL)
+        return response
+    except mysql.connector.Error:
+        logger.exception("Failed to fetch movie batch")
+        return jsonify({"message": "Internal server error"}), 500
+
+
+@app.route("/api/movies/<int:movie_id>/similar", methods=["GET"])
+def get_similar_movies(movie_id):
+    """
+    "More like this": the movie's nearest neighbours from the similar-movies
+    index, best first. Until an index is built, or for a movie it does not
+    know yet, falls back to the highest-rated movies of the same genre.
+    """
+    try:
+        limit = parse_limit(request.args.get("limit"), default=10, maximum=similar_movies.DEFAULT_K)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    conn = None
+    try:
+        version = movie_cache.current_version(get_db)
+        index = similar_index.get()
+        found = index.lookup(movie_id, limit) if index is not None else None
+        etag = http_cache.make_etag(
+            "similar", movie_id, limit, version, index.version if found is not None else "genre"
+        )
+        if http_cache.is_fresh(etag):
+            return http_cache.not_modified(etag, http_cache.MOVIE_CACHE_CONTROL)
+
+        if found is not None:
+            source = "index"
+            similar_ids, scores = found
+        else:
+            source = "genre"
+            conn = get_db()
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT m.movie_id
+                FROM movies m
+                JOIN movies base ON base.movie_id = %s AND base.genre = m.genre
+                LEFT JOIN movie_rating_stats s ON s.movie_id = m.movie_id
+                WHERE m.movie_id <> base.movie_id
+                ORDER BY COALESCE(s.avg_rating, 0) DESC, m.movie_id
+                LIMIT %s
+                """,
+                (movie_id, limit),
+            )
+            similar_ids = [row[0] for row in cursor.fetchall()]
+            scores = [None] * len(similar_ids)
+
+        payloads = movie_payloads(similar_ids, version)
+        items = [
+            b'{"similarity":' + app.json.dumps_bytes(None if score is None else round(score, 4))
+            + b',"movie":' + payloads[similar_id].rstrip(b"\n") + b"}"
+            for similar_id, score in zip(similar_ids, scores)
+            if similar_id in payloads
+        ]
+        body = (
+            b'{"movie_id":' + app.json.dumps_bytes(movie_id)
+            + b',"similar":[' + b",".join(items)
+            + b'],"source":' + app.json.dumps_bytes(source) + b"}\n"
+        )
+        return http_cache.apply(json_bytes_response(body), etag, http_cache.MOVIE_CACHE_CONTROL)
+    except mysql.connector.Error:
+        logger.exception("Failed to fetch similar movies for id=%s", movie_id)
+        return jsonify({"message": "Internal server error"}), 500
+    finally:
+        if conn:
+            conn.close()
+
+
 @app.route("/api/movies", methods=["POST"])
 @require_auth
 @require_role('admin')
@@ -442,8 +1006,16 @@ def add_movie():
                 data.get("description"),
             ),
         )
+        movie_id = cursor.lastrowid
+        rating_stats.init_movie(cursor, movie_id)
+        version = catalog_cache.bump(cursor)
         conn.commit()
+        movie_cache.observe(version)
+        rating_index.observe(movie_id, 0)
+        similar_patcher.update_movie(movie_id, data.get("genre"), data.get("language"), data.get("release_year"))
         return jsonify({"message": "Movie added successfully"}), 201
+    except mysql.connector.IntegrityError:
+        return jsonify({"message": "A movie with this title and release year already exists"}), 409
     except mysql.connector.Error:
         logger.exception("Failed to add movie: %s", data)
         return jsonify({"message": "Internal server error"}), 500
@@ -452,6 +1024,45 @@ def add_movie():
             conn.close()
 
 
+@app.route("/api/admin/movies/import", methods=["POST"])
+@require_auth
+@require_role('admin')
+def import_movies():
+    """
+    Bulk-load movies from an NDJSON or CSV request body (see ingest.py),
+    upserting by (title, release_year). Send `Content-Type: text/csv` or
+    `?format=csv` for CSV; `?chunk_size=` sets rows per transaction.
+    """
+    fmt = request.args.get("format") or ("csv" if request.mimetype == "text/csv" else "ndjson")
+    try:
+        chunk_size = parse_limit(request.args.get("chunk_size"), default=ingest.CHUNK_SIZE, maximum=5000)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    # Read the body line by line instead of buffering it.
+    lines = io.TextIOWrapper(request.stream, encoding="utf-8", newline="")
+    conn = None
+    try:
+        conn = get_db()
+        report = ingest.ingest(conn, lines, fmt, chunk_size)
+    except ingest.IngestError as e:
+        return jsonify({"message": str(e)}), 400
+    except UnicodeDecodeError:
+        return jsonify({"message": "body must be UTF-8"}), 400
+    except mysql.connector.Error:
+        logger.exception("Bulk movie import failed")
+        return jsonify({"message": "Internal server error"}), 500
+    finally:
+        if conn:
+            conn.close()
+    if report.catalog_version:
+        movie_cache.observe(report.catalog_version)
+    logger.info(
+        "Imported movies: %s processed, %s inserted, %s updated, %s rejected",
+        report.processed, report.inserted, report.updated, report.error_count,
+    )
+    return jsonify(report.as_dict())
+
+
 @app.route("/api/movies/<int:id>", methods=["PUT"])
 @require_auth
 @require_role('admin')
@@ -479,8 +1090,16 @@ def update_movie(id):
                 id,
             ),
         )
+        updated = cursor.rowcount
+        version = catalog_cache.bump(cursor)
         conn.commit()
+        movie_cache.observe(version)
+        if updated:
+            taste_profiles.discard_movie(id)
+            similar_patcher.update_movie(id, data.get("genre"), data.get("language"), data.get("release_year"))
         return jsonify({"message": "Movie updated successfully"})
+    except mysql.connector.IntegrityError:
+        return jsonify({"message": "A movie with this title and release year already exists"}), 409
     except mysql.connector.Error:
         logger.exception("Failed to update movie id=%s", id)
         return jsonify({"message": "Internal server error"}), 500
@@ -496,9 +1115,12 @@ def delete_movie(id):
     conn = None
     try:
         conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM movies WHERE movie_id=%s", (id,))
-        conn.commit()
+        deleted, version = review_writes.delete_movie(conn, id)
+        movie_cache.observe(version)
+        if deleted:
+            rating_index.discard(id)
+            taste_profiles.discard_movie(id)
+            similar_patcher.remove_movie(id)
         return jsonify({"message": "Movie deleted successfully"})
     except mysql.connector.Error:
         logger.exception("Failed to delete movie id=%s", id)
@@ -531,42 +1153,21 @@ def add_review():
     conn = None
     try:
         conn = get_db()
-        cursor = conn.cursor(dictionary=True)
-        
-        # Check if movie exists
-        cursor.execute("SELECT movie_id FROM movies WHERE movie_id=%s", (movie_id,))
-        if not cursor.fetchone():
-            return jsonify({"message": "Movie not found"}), 404
-        
-        # Check if user already reviewed this movie
-        cursor.execute(
-            "SELECT review_id FROM reviews WHERE user_id=%s AND movie_id=%s",
-            (user_id, movie_id)
-        )
-        existing_review = cursor.fetchone()
-        
-        if existing_review:
-            # Update existing review
-            cursor.execute(
-                "UPDATE reviews SET rating=%s, comment=%s, review_date=NOW() WHERE user_id=%s AND movie_id=%s",
-                (rating, comment, user_id, movie_id)
-            )
-        else:
-            # Create new review
-            cursor.execute(
-                "INSERT INTO reviews (user_id, movie_id, rating, comment) VALUES (%s,%s,%s,%s)",
-                (user_id, movie_id, rating, comment)
-            )
-        
-        conn.commit()
+        old_rating, version, review_version = review_writes.write_review(conn, user_id, movie_id, rating, comment)
+        movie_cache.observe(version)
+        rating_index.reload_movie(conn.cursor(), movie_id)
+        taste_profiles.record_review(conn, user_id, movie_id, review_version)
+        updated = old_rating is not None
         
         return jsonify({
-            "message": "Review updated successfully" if existing_review else "Review added successfully",
+            "message": "Review updated successfully" if updated else "Review added successfully",
             "user_id": user_id,
             "movie_id": movie_id,
             "rating": rating
-        }), 200 if existing_review else 201
+        }), 200 if updated else 201
         
+    except review_writes.ReviewTargetMissing as e:
+        return jsonify({"message": str(e)}), 404
     except mysql.connector.Error as e:
         logger.exception("Failed to add/update review: %s", str(e))
         return jsonify({"message": "Internal server error"}), 500
@@ -615,11 +1216,10 @@ def get_admin_analytics():
         # Top 5 most reviewed movies
         cursor.execute("""
             SELECT m.movie_id, m.title, m.poster_url, 
-                   COUNT(r.review_id) as review_count,
-                   COALESCE(AVG(r.rating), 0) as avg_rating
+                   COALESCE(s.review_count, 0) as review_count,
+                   COALESCE(s.avg_rating, 0) as avg_rating
             FROM movies m
-            LEFT JOIN reviews r ON m.movie_id = r.movie_id
-            GROUP BY m.movie_id, m.title, m.poster_url
+            LEFT JOIN movie_rating_stats s ON s.movie_id = m.movie_id
             ORDER BY review_count DESC
             LIMIT 5
         """)
@@ -628,13 +1228,11 @@ def get_admin_analytics():
         # Top 5 highest rated movies (minimum 3 reviews)
         cursor.execute("""
             SELECT m.movie_id, m.title, m.poster_url,
-                   COUNT(r.review_id) as review_count,
-                   AVG(r.rating) as avg_rating
-            FROM movies m
-            INNER JOIN reviews r ON m.movie_id = r.movie_id
-            GROUP BY m.movie_id, m.title, m.poster_url
-            HAVING COUNT(r.review_id) >= 3
-            ORDER BY avg_rating DESC
+                   s.review_count, s.avg_rating
+            FROM movie_rating_stats s
+            JOIN movies m ON m.movie_id = s.movie_id
+            WHERE s.review_count >= 3
+            ORDER BY s.avg_rating DESC
             LIMIT 5
         """)
         top_rated_movies = cursor.fetchall()
@@ -661,19 +1259,23 @@ def get_admin_analytics():
         
         # Rating distribution
         cursor.execute("""
-            SELECT rating, COUNT(*) as count
-            FROM reviews
-            GROUP BY rating
-            ORDER BY rating DESC
+            SELECT SUM(star_1) AS s1, SUM(star_2) AS s2, SUM(star_3) AS s3,
+                   SUM(star_4) AS s4, SUM(star_5) AS s5
+            FROM movie_rating_stats
         """)
-        rating_distribution = cursor.fetchall()
+        histogram = cursor.fetchone()
+        rating_distribution = [
+            {"rating": star, "count": int(histogram[f"s{star}"])}
+            for star in range(5, 0, -1)
+            if histogram[f"s{star}"]
+        ]
         
         # Movies without reviews
         cursor.execute("""
             SELECT COUNT(*) as movies_without_reviews
             FROM movies m
-            LEFT JOIN reviews r ON m.movie_id = r.movie_id
-            WHERE r.review_id IS NULL
+            LEFT JOIN movie_rating_stats s ON s.movie_id = m.movie_id
+            WHERE COALESCE(s.review_count, 0) = 0
         """)
         movies_without_reviews = cursor.fetchone()["movies_without_reviews"]
         
@@ -707,18 +1309,57 @@ def get_admin_analytics():
             conn.close()
 
 
+@app.route("/api/admin/metrics", methods=["GET"])
+@require_auth
+@require_role('admin')
+def get_admin_metrics():
+    """Per-worker runtime counters (connection pool usage and wait times)."""
+    return jsonify({
+        "pid": os.getpid(),
+        "db_pool": db_pool.stats(),
+        "catalog_cache": movie_cache.stats(),
+        "recommendation_cache": rec_cache.stats(),
+        "taste_profiles": taste_profiles.stats(),
+        "trust_heatmap": trust_heatmaps.stats(),
+        "decision_traces": trace_buffer.stats(),
+        "similar_index_patches": similar_patcher.stats(),
+    })
+
+
 @app.route("/api/reviews/movie/<int:movie_id>", methods=["GET"])
 def get_movie_reviews(movie_id):
+    """
+    All reviews of a movie, newest first. Passing any of limit, cursor,
+    min_rating or has_comment switches to keyset pages of
+    {"reviews", "next_cursor", "limit"}.
+    """
+    page = None
+    if any(param in request.args for param in review_feeds.FEED_PARAMS):
+        try:
+            page = parse_review_feed("movie", movie_id)
+        except (ValueError, TypeError) as e:
+            return jsonify({"message": str(e)}), 400
     conn = None
     try:
         conn = get_db()
         cursor = conn.cursor(dictionary=True)
-        cursor.execute(
+        etag = http_cache.make_etag(
+            "reviews", movie_id, rating_stats.review_version(cursor, movie_id),
+            streaming.negotiate_encoding(request.accept_encodings) or "identity",
+            args=request.args,
+        )
+        if http_cache.is_fresh(etag):
+            return http_cache.not_modified(etag, http_cache.REVIEWS_CACHE_CONTROL)
+        if page:
+            return http_cache.apply(
+                review_feed_page("movie", *page), etag, http_cache.REVIEWS_CACHE_CONTROL
+            )
+        response = stream_query(
             "SELECT r.*, u.name FROM reviews r JOIN users u ON r.user_id=u.user_id WHERE movie_id=%s ORDER BY r.review_date DESC",
             (movie_id,),
+            fmt=response_format(),
         )
-        reviews = cursor.fetchall()
-        return jsonify(reviews)
+        return http_cache.apply(response, etag, http_cache.REVIEWS_CACHE_CONTROL)
     except mysql.connector.Error:
         logger.exception("Failed to fetch reviews for movie_id=%s", movie_id)
         return jsonify({"message": "Internal server error"}), 500
@@ -750,36 +1391,36 @@ def get_user_review_for_movie(movie_id, user_id):
 
 @app.route("/api/reviews/movie/<int:movie_id>/stats", methods=["GET"])
 def get_movie_rating_stats(movie_id):
-    """Get aggregated rating statistics for a movie."""
+    """
+    Rating statistics for a movie: star histogram, mean, variance/stddev,
+    min/max and the review count of the last `window_days` days (default 7).
+    Read from the incrementally maintained counters, never from reviews.
+    """
+    try:
+        window_days = int(request.args.get("window_days", rating_stats.RECENT_WINDOW_DAYS))
+    except ValueError:
+        return jsonify({"message": "window_days must be a number"}), 400
+    if not 1 <= window_days <= rating_stats.DAILY_RETENTION_DAYS:
+        return jsonify({
+            "message": f"window_days must be between 1 and {rating_stats.DAILY_RETENTION_DAYS}"
+        }), 400
     conn = None
     try:
         conn = get_db()
         cursor = conn.cursor(dictionary=True)
-        
-        # Get average rating and review count
-        cursor.execute(
-            """
-            SELECT 
-                COUNT(*) as review_count,
-                AVG(rating) as avg_rating,
-                MIN(rating) as min_rating,
-                MAX(rating) as max_rating,
-                ROUND(AVG(rating), 1) as avg_rating_rounded
-            FROM reviews 
-            WHERE movie_id=%s
-            """,
-            (movie_id,)
+        row = rating_stats.read_summary(cursor, movie_id, window_days)
+        # The recent window slides at midnight, so the date is part of the validator.
+        etag = http_cache.make_etag(
+            "stats", movie_id, row["review_version"] if row else 0,
+            window_days, datetime.now().date().isoformat(),
         )
-        stats = cursor.fetchone()
-        
-        # Return proper response even if no reviews
-        return jsonify({
-            "review_count": stats["review_count"] or 0,
-            "avg_rating": float(stats["avg_rating"]) if stats["avg_rating"] else 0,
-            "avg_rating_rounded": float(stats["avg_rating_rounded"]) if stats["avg_rating_rounded"] else 0,
-            "min_rating": stats["min_rating"],
-            "max_rating": stats["max_rating"]
-        })
+        if http_cache.is_fresh(etag):
+            return http_cache.not_modified(etag, http_cache.REVIEWS_CACHE_CONTROL)
+
+        stats = rating_stats.summarize(row)
+        stats["recent_count"] = int(row["recent_count"]) if row else 0
+        stats["recent_window_days"] = window_days
+        return http_cache.apply(jsonify(stats), etag, http_cache.REVIEWS_CACHE_CONTROL)
     except mysql.connector.Error as err:
         logger.exception("Failed to fetch rating stats for movie_id=%s", movie_id)
         return jsonify({"message": "Internal server error"}), 500
@@ -791,176 +1432,111 @@ def get_movie_rating_stats(movie_id):
 @app.route("/api/reviews/user", methods=["GET"])
 @require_auth
 def get_user_reviews():
-    """Get all reviews by the authenticated user."""
+    """
+    Get all reviews by the authenticated user, or keyset pages of them when
+    limit, cursor, min_rating or has_comment is passed.
+    """
     user_id = request.user.get("user_id")
-    conn = None
+    page = None
+    if any(param in request.args for param in review_feeds.FEED_PARAMS):
+        try:
+            page = parse_review_feed("user", user_id)
+        except (ValueError, TypeError) as e:
+            return jsonify({"message": str(e)}), 400
     try:
-        conn = get_db()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(
+        if page:
+            return review_feed_page("user", *page)
+        return stream_query(
             "SELECT r.*, m.title FROM reviews r JOIN movies m ON r.movie_id=m.movie_id WHERE r.user_id=%s ORDER BY r.review_date DESC",
-            (user_id,)
+            (user_id,),
+            fmt=response_format(),
         )
-        reviews = cursor.fetchall()
-        return jsonify(reviews)
     except mysql.connector.Error:
         logger.exception("Failed to fetch reviews for user_id=%s", user_id)
         return jsonify({"message": "Internal server error"}), 500
-    finally:
-        if conn:
-            conn.close()
+
+
+def recommendation_version(cursor, user_id, algorithm):
+    """What a cached list for this user and algorithm must have been built from."""
+    model_version = None
+    if algorithm == item_cf.ALGORITHM:
+        index = cf_index.get()
+        model_version = index.built_at if index is not None else None
+    elif algorithm == mf_model.ALGORITHM:
+        model = mf_models.get()
+        model_version = model.version if model is not None else None
+    return recommendations.review_version(cursor, user_id), model_version
+
+
+def build_recommendations(conn, user_id, algorithm, review_version):
+    """
+    Serialized recommendations for one user, computed without the cache.
+    The user's history comes from their taste profile at `review_version`.
+    """
+    cursor = conn.cursor(dictionary=True)
+    result = None
+    if algorithm == item_cf.ALGORITHM:
+        index = cf_index.get()
+        if index is not None:
+            given = taste_profiles.get(conn, user_id, review_version).ratings_by_movie()
+            result = item_cf.recommend(cursor, index, user_id, recommendations.TOP_N, given)
+    elif algorithm == mf_model.ALGORITHM:
+        model = mf_models.get()
+        if model is not None:
+            given = taste_profiles.get(conn, user_id, review_version).ratings_by_movie()
+            result = mf_model.recommend(cursor, model, user_id, recommendations.TOP_N, given)
+    if result is None:
+        result = recommendations.read(cursor, user_id)
+    if result is None:
+        profile = taste_profiles.get(conn, user_id, review_version)
+        result = recommendations.refresh(conn, user_id, profile=profile)
+    return serialize_json(result)
+
+
+def revalidate_recommendations(user_id, algorithm):
+    """Background rebuild of a stale cache entry (runs outside the request)."""
+    with app.app_context():
+        conn = get_db()
+        version = recommendation_version(conn.cursor(dictionary=True), user_id, algorithm)
+        return build_recommendations(conn, user_id, algorithm, version[0]), version
 
 
 @app.route("/api/recommendations", methods=["GET"])
 @require_auth
 def get_recommendations():
     """
-    Rule-based recommendation engine.
-    
-    Algorithm:
-    1. Analyze user's review history (genres watched, ratings given)
-    2. Find preferred genres (genres with avg rating >= 4)
-    3. Recommend unwatched movies from preferred genres
-    4. Fallback to trending movies (most reviewed + high rated)
-    5. Return top 10 recommendations
+    Recommendations for the authenticated user. `algorithm=rule-based` (the
+    default, see recommendations.compute) is served from the precomputed
+    user_recommendations list; users without an up-to-date list get one
+    computed on the fly, which is stored for their next request.
+    `algorithm=item-cf` scores the user's ratings against the item-item
+    neighbour index and `algorithm=als` against the matrix-factorization
+    model (reporting its `model_version`). Without a trained model or any
+    usable ratings they fall back to rule-based, and the response's
+    `algorithm` says which one answered.
+
+    Responses are cached per worker until the user's next review or a new
+    model (see recommendation_cache); once past REC_CACHE_TTL a cached list
+    is still served while it is rebuilt in the background.
     """
     user_id = request.user.get("user_id")
+    algorithm = request.args.get("algorithm", recommendations.ALGORITHM)
+    if algorithm not in RECOMMENDATION_ALGORITHMS:
+        return jsonify({"message": f"algorithm must be one of {', '.join(RECOMMENDATION_ALGORITHMS)}"}), 400
     conn = None
     try:
         conn = get_db()
-        cursor = conn.cursor(dictionary=True)
-        
-        # Step 1: Get user's review history with genre preferences
-        cursor.execute("""
-            SELECT m.genre, AVG(r.rating) as avg_rating, COUNT(*) as watch_count
-            FROM reviews r
-            JOIN movies m ON r.movie_id = m.movie_id
-            WHERE r.user_id = %s AND m.genre IS NOT NULL
-            GROUP BY m.genre
-            HAVING AVG(r.rating) >= 4.0
-            ORDER BY avg_rating DESC, watch_count DESC
-        """, (user_id,))
-        preferred_genres = cursor.fetchall()
-        
-        # Step 2: Get movies user has already reviewed (to exclude) + get user's top-rated movies
-        cursor.execute("""
-            SELECT r.movie_id, m.title, r.rating, m.genre
-            FROM reviews r
-            JOIN movies m ON r.movie_id = m.movie_id
-            WHERE r.user_id = %s
-            ORDER BY r.rating DESC, r.created_at DESC
-        """, (user_id,))
-        user_reviews = cursor.fetchall()
-        watched_movie_ids = [row['movie_id'] for row in user_reviews]
-        top_rated_movies = [r for r in user_reviews if r['rating'] >= 4.5][:3]  # Top 3 highly rated
-        
-        recommendations = []
-        
-        # Step 3: Recommend from preferred genres (genre-based filtering)
-        if preferred_genres:
-            genre_list = [g['genre'] for g in preferred_genres[:3]]  # Top 3 genres
-            placeholders = ','.join(['%s'] * len(genre_list))
-            exclude_placeholders = ','.join(['%s'] * len(watched_movie_ids)) if watched_movie_ids else '0'
-            
-            query = f"""
-                SELECT m.*, 
-                       COALESCE(AVG(r.rating), 0) as avg_rating,
-                       COUNT(r.review_id) as review_count
-                FROM movies m
-                LEFT JOIN reviews r ON m.movie_id = r.movie_id
-                WHERE m.genre IN ({placeholders})
-                  AND m.movie_id NOT IN ({exclude_placeholders})
-                GROUP BY m.movie_id
-                ORDER BY avg_rating DESC, review_count DESC
-                LIMIT 10
-            """
-            cursor.execute(query, genre_list + watched_movie_ids)
-            recommendations = cursor.fetchall()
-        
-        # Step 4: Fallback to trending movies if not enough genre recommendations
-        if len(recommendations) < 10:
-            exclude_placeholders = ','.join(['%s'] * len(watched_movie_ids)) if watched_movie_ids else '0'
-            
-            cursor.execute(f"""
-                SELECT m.*,
-                       AVG(r.rating) as avg_rating,
-                       COUNT(r.review_id) as review_count
-                FROM movies m
-                INNER JOIN reviews r ON m.movie_id = r.movie_id
-                WHERE m.movie_id NOT IN ({exclude_placeholders})
-                GROUP BY m.movie_id
-                HAVING COUNT(r.review_id) >= 3 AND AVG(r.rating) >= 4.0
-                ORDER BY review_count DESC, avg_rating DESC
-                LIMIT %s
-            """, watched_movie_ids + [10 - len(recommendations)])
-            
-            trending = cursor.fetchall()
-            recommendations.extend(trending)
-        
-        # Step 5: If still not enough, recommend highest-rated movies
-        if len(recommendations) < 10:
-            exclude_all = list(set([r['movie_id'] for r in recommendations] + watched_movie_ids))
-            exclude_placeholders = ','.join(['%s'] * len(exclude_all)) if exclude_all else '0'
-            
-            cursor.execute(f"""
-                SELECT m.*,
-                       COALESCE(AVG(r.rating), 0) as avg_rating,
-                       COUNT(r.review_id) as review_count
-                FROM movies m
-                LEFT JOIN reviews r ON m.movie_id = r.movie_id
-                WHERE m.movie_id NOT IN ({exclude_placeholders})
-                GROUP BY m.movie_id
-                ORDER BY avg_rating DESC, m.release_year DESC
-              EXPLAINABLE recommendation reason for each movie (XAI)
-        for movie in recommendations:
-            reason = ""
-            explanation_type = ""
-            
-            # Check if movie is from preferred genre
-            if preferred_genres and movie.get('genre') in [g['genre'] for g in preferred_genres]:
-                genre_info = next((g for g in preferred_genres if g['genre'] == movie['genre']), None)
-                if genre_info:
-                    reason = f"You rated {int(genre_info['watch_count'])} {movie['genre']} movies highly (avg {genre_info['avg_rating']:.1f}⭐)"
-                    explanation_type = "genre_preference"
-            
-            # Check if similar to top-rated movies
-            elif top_rated_movies and movie.get('genre'):
-                similar_top = [m for m in top_rated_movies if m.get('genre') == movie.get('genre')]
-                if similar_top:
-                    reason = f"Similar to '{similar_top[0]['title']}' which you rated {similar_top[0]['rating']:.1f}⭐"
-                    explanation_type = "similar_to_liked"
-            
-            # Trending with high engagement
-            elif movie.get('review_count', 0) >= 5 and movie.get('avg_rating', 0) >= 4.0:
-                reason = f"Trending: {int(movie['review_count'])} reviews with {movie['avg_rating']:.1f}⭐ rating"
-                explanation_type = "trending"
-            
-            # High rating
-            elif movie.get('avg_rating', 0) >= 4.0:
-                reason = f"Highly rated by critics ({movie['avg_rating']:.1f}⭐)"
-                explanation_type = "high_rated"
-            
-            # Fallback
-            else:
-                reason = "Recommended for you"
-                explanation_type = "general"
-            
-            movie['recommendation_reason'] = reason
-            movie['explanation_type'] = explanation_type
-            if preferred_genres and movie.get('genre') in [g['genre'] for g in preferred_genres]:
-                movie['recommendation_reason'] = f"Based on your love for {movie['genre']}"
-            elif movie.get('review_count', 0) >= 5:
-                movie['recommendation_reason'] = "Trending now"
-            else:
-                movie['recommendation_reason'] = "Highly rated"
-        
-        return jsonify({
-            "recommendations": recommendations[:10],
-            "preferred_genres": [g['genre'] for g in preferred_genres],
-            "algorithm": "rule-based",
-            "user_watch_count": len(watched_movie_ids)
-        })
-        
+        key = (user_id, algorithm)
+        version = recommendation_version(conn.cursor(dictionary=True), user_id, algorithm)
+        cached = rec_cache.get(key, version)
+        if cached is not None:
+            payload, fresh = cached
+            if not fresh:
+                rec_cache.revalidate(key, lambda: revalidate_recommendations(user_id, algorithm))
+            return json_bytes_response(payload)
+        payload = build_recommendations(conn, user_id, algorithm, version[0])
+        rec_cache.put(key, payload, version)
+        return json_bytes_response(payload)
     except mysql.connector.Error as e:
         logger.exception("Failed to generate recommendations for user_id=%s", user_id)
         return jsonify({"message": "Internal server error"}), 500
@@ -969,6 +1545,43 @@ def get_recommendations():
             conn.close()
 
 
+@app.route("/api/admin/recommendations/batch", methods=["POST"])
+@require_auth
+@require_role('admin')
+def export_recommendations():
+    """
+    Rule-based recommendations for many users in one pass (see
+    batch_recommendations.py), streamed as NDJSON, one user per line. JSON
+    body `{"user_ids": [...]}` picks the users (default: every user);
+    `?limit=` sets the list length.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        limit = parse_limit(request.args.get("limit"), default=recommendations.TOP_N, maximum=100)
+        user_ids = None
+        if data.get("user_ids") is not None:
+            user_ids = catalog.parse_ids(
+                data["user_ids"], maximum=batch_recommendations.MAX_USER_IDS, label="user IDs"
+            )
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    encoding = streaming.negotiate_encoding(request.accept_encodings)
+    conn = get_db().detach()
+    g.pop("db_conn", None)
+    lines = batch_recommendations.ndjson_lines(conn, app.json.dumps_bytes, user_ids, limit)
+    try:
+        # Loading the catalog happens on the first line, so SQL errors can still answer 500.
+        first = next(lines, b"")
+    except mysql.connector.Error:
+        conn.close()
+        logger.exception("Batch recommendation export failed")
+        return jsonify({"message": "Internal server error"}), 500
+    chunks = streaming.encode(itertools.chain([first], lines), encoding)
+    body = streaming.ClosingBody(chunks, lines.close, conn.close)
+    return streaming.encoded_response(app.response_class, body, "ndjson", encoding)
+
+
 if __name__ == "__main__":
     # Register a generic error handler to log unexpected exceptions
     @app.errorhandler(Exception)
@@ -978,84 +1591,17 @@ if __name__ == "__main__":
 
 @app.route("/api/trust-heatmap/<int:movie_id>", methods=["GET"])
 def get_trust_heatmap(movie_id):
-    """Get trust heatmap data: rating consistency and reviewer credibility"""
+    """
+    Get trust heatmap data: rating consistency and reviewer credibility.
+    Computed from the rating and reviewer counters (see trust_heatmap) and
+    cached until the movie's next review.
+    """
     conn = None
     try:
         conn = get_db()
-        cursor = conn.cursor(dictionary=True)
-        
-        # Get all reviews for this movie
-        cursor.execute(
-            """
-            SELECT r.rating, r.user_id, u.username, COUNT(ur.review_id) as user_review_count
-            FROM reviews r
-            JOIN users u ON r.user_id = u.user_id
-            LEFT JOIN reviews ur ON u.user_id = ur.user_id
-            WHERE r.movie_id = %s
-            GROUP BY r.review_id, r.user_id
-            ORDER BY r.review_date DESC
-            """,
-            (movie_id,)
-        )
-        
-        reviews = cursor.fetchall()
-        
-        if not reviews:
-            return jsonify({
-                "rating_consistency": 0,
-                "reviewer_credibility": 0,
-                "trust_score": 0,
-                "review_count": 0,
-                "average_rating": 0
-            }), 200
-        
-        ratings = [float(r['rating']) for r in reviews]
-        
-        # 1. CONSISTENCY: Calculate standard deviation and convert to 0-100 score
-        # Lower std dev = higher consistency
-        import statistics
-        avg_rating = statistics.mean(ratings)
-        if len(ratings) > 1:
-            std_dev = statistics.stdev(ratings)
-            # Max reasonable std dev is ~2 (full range), convert to 0-100
-            consistency = max(0, 100 - (std_dev * 25))
-        else:
-            consistency = 100  # Single review = perfect consistency
-        
-        # 2. CREDIBILITY: Based on reviewer activity and rating patterns
-        # Reviewers with more reviews are more credible
-        credibility_scores = []
-        for review in reviews:
-            review_count = review['user_review_count']
-            # More reviews = higher credibility (1-10 reviews = 40-100 points)
-            activity_score = min(100, 30 + (review_count * 7))
-            
-            # Rating proximity to average (within 0.5 = better)
-            deviation = abs(float(review['rating']) - avg_rating)
-            proximity_score = max(0, 100 - (deviation * 40))
-            
-            # Combined credibility
-            credibility = (activity_score * 0.6) + (proximity_score * 0.4)
-            credibility_scores.append(credibility)
-        
-        avg_credibility = statistics.mean(credibility_scores) if credibility_scores else 0
-        
-        # 3. TRUST SCORE: Weighted average
-        trust_score = (consistency * 0.4) + (avg_credibility * 0.6)
-        
-        return jsonify({
-            "rating_consistency": round(consistency, 1),
-            "reviewer_credibility": round(avg_credibility, 1),
-            "trust_score": round(trust_score, 1),
-            "review_count": len(reviews),
-            "average_rating": round(avg_rating, 2),
-            "rating_distribution": {
-                "min": min(ratings),
-                "max": max(ratings),
-                "std_dev": round(statistics.stdev(ratings), 2) if len(ratings) > 1 else 0
-            }
-        }), 200
-        
+        return jsonify(trust_heatmaps.get(conn, movie_id)), 200
+    except PoolTimeout:
+        raise
     except Exception as e:
         logger.exception("Failed to get trust heatmap for movie_id=%s: %s", movie_id, e)
         return jsonify({"message": "Internal server error"}), 500
@@ -1066,54 +1612,30 @@ def get_trust_heatmap(movie_id):
 
 @app.route("/api/decision-trace", methods=["POST"])
 def record_decision_trace():
-    """Record a decision trace: how user navigated to a movie"""
-    import json as json_lib
+    """
+    Record a decision trace: how user navigated to a movie. Traces are
+    queued and written in batches (see trace_queue), so this answers 202
+    without touching MySQL, or 429 while the queue is full.
+    """
     try:
-        data = request.get_json()
-        user_id = data.get("user_id")
-        movie_id = data.get("movie_id")
-        trace_path = data.get("trace_path", [])  # List of steps
-        decision_source = data.get("decision_source", "browse")  # search, filter, trending, recommendation, browse, direct
-        time_spent = data.get("time_spent_seconds", 0)
-        
-        if not movie_id or not trace_path:
-            return jsonify({"message": "Missing required fields"}), 400
-        
-        conn = get_db()
-        cursor = conn.cursor()
-        
-        # Generate human-readable trace summary
-        trace_summary = " → ".join(trace_path[:5])  # First 5 steps
-        
-        cursor.execute(
-            """
-            INSERT INTO decision_traces 
-            (user_id, movie_id, trace_path, trace_summary, decision_source, num_steps, time_spent_seconds)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """,
-            (user_id, movie_id, json_lib.dumps(trace_path), trace_summary, 
-             decision_source, len(trace_path), time_spent)
-        )
-        conn.commit()
-        trace_id = cursor.lastrowid
-        conn.close()
-        
-        logger.info(f"Recorded decision trace {trace_id} for movie {movie_id} via {decision_source}")
-        return jsonify({
-            "trace_id": trace_id,
-            "trace_summary": trace_summary,
-            "decision_source": decision_source
-        }), 201
-        
-    except Exception as e:
-        logger.exception("Failed to record decision trace: %s", e)
-        return jsonify({"message": "Internal server error"}), 500
+        row = trace_queue.parse_trace(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    if not trace_buffer.offer(row):
+        logger.warning("Decision trace queue full: %s", trace_buffer.stats())
+        response = jsonify({"message": "Too many decision traces, please retry"})
+        response.headers["Retry-After"] = "1"
+        return response, 429
+    return jsonify({
+        "status": "queued",
+        "trace_summary": row[3],
+        "decision_source": row[4]
+    }), 202
 
 
 @app.route("/api/decision-trace/<int:movie_id>", methods=["GET"])
 def get_movie_decision_traces(movie_id):
     """Get all decision traces for a movie with analytics"""
-    import json as json_lib
     try:
         conn = get_db()
         cursor = conn.cursor(dictionary=True)
@@ -1131,36 +1653,41 @@ def get_movie_decision_traces(movie_id):
             (movie_id,)
         )
         
-        traces = cursor.fetchall()
-        
-        # Parse JSON paths and aggregate analytics
-        parsed_traces = []
+        # Aggregate analytics batch by batch; only the latest 10 traces are kept
+        latest_traces = []
         decision_sources = {}
-        avg_steps = 0
-        
-        for trace in traces:
-            trace['trace_path'] = json_lib.loads(trace['trace_path'])
-            parsed_traces.append(trace)
-            
-            source = trace['decision_source']
-            decision_sources[source] = decision_sources.get(source, 0) + 1
-            avg_steps += trace['num_steps']
+        path_frequencies = {}
+        total_traces = 0
+        total_steps = 0
+        
+        while True:
+            batch = cursor.fetchmany(streaming.CHUNK_ROWS)
+            if not batch:
+                break
+            for trace in batch:
+                trace['trace_path'] = app.json.loads(trace['trace_path'])
+                total_traces += 1
+                total_steps += trace['num_steps']
+                
+                source = trace['decision_source']
+                decision_sources[source] = decision_sources.get(source, 0) + 1
+                
+                path_key = " → ".join(trace['trace_path'][:4])
+                path_frequencies[path_key] = path_frequencies.get(path_key, 0) + 1
+                
+                if len(latest_traces) < 10:
+                    latest_traces.append(trace)
         
-        avg_steps = avg_steps / len(traces) if traces else 0
+        avg_steps = total_steps / total_traces if total_traces else 0
         
         # Find most common decision path
-        path_frequencies = {}
-        for trace in parsed_traces:
-            path_key = " → ".join(trace['trace_path'][:4])
-            path_frequencies[path_key] = path_frequencies.get(path_key, 0) + 1
-        
         most_common_path = max(path_frequencies, key=path_frequencies.get) if path_frequencies else None
         
         conn.close()
         
         return jsonify({
-            "total_traces": len(traces),
-            "traces": parsed_traces[:10],  # Return latest 10
+            "total_traces": total_traces,
+            "traces": latest_traces,
             "analytics": {
                 "decision_sources": decision_sources,
                 "average_steps": round(avg_steps, 1),
@@ -1169,6 +1696,8 @@ def get_movie_decision_traces(movie_id):
             }
         }), 200
         
+    except PoolTimeout:
+        raise
     except Exception as e:
         logger.exception("Failed to get decision traces for movie %s: %s", movie_id, e)
         return jsonify({"message": "Internal server error"}), 500
@@ -1180,12 +1709,41 @@ def get_user_decision_traces():
     """Get user's decision traces for behavioral analysis"""
     try:
         user_id = request.user.get('user_id')
-        limit = request.args.get('limit', 20, type=int)
+        try:
+            limit = parse_limit(request.args.get('limit'), default=20, maximum=500)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
         
-        conn = get_db()
-        cursor = conn.cursor(dictionary=True)
+        # Behavior analytics are accumulated while the traces stream out and
+        # emitted after the array as "user_behavior".
+        decision_behavior = {
+            'search': 0, 'filter': 0, 'trending': 0, 
+            'recommendation': 0, 'browse': 0, 'direct': 0
+        }
+        totals = {"traces": 0, "steps": 0}
         
-        cursor.execute(
+        def parse_trace(trace):
+            # trace_path is already JSON; embed it without parsing
+            trace['trace_path'] = RawJSON(trace['trace_path'])
+            source = trace['decision_source']
+            decision_behavior[source] = decision_behavior.get(source, 0) + 1
+            totals["traces"] += 1
+            totals["steps"] += trace['num_steps']
+            return trace
+        
+        def user_behavior():
+            avg_steps_taken = totals["steps"] / totals["traces"] if totals["traces"] else 0
+            # Identify user's preferred decision method
+            preferred_source = max(decision_behavior, key=decision_behavior.get)
+            behavior = {
+                "total_traces": totals["traces"],
+                "decision_methods": decision_behavior,
+                "preferred_method": preferred_source,
+                "average_decision_steps": round(avg_steps_taken, 1)
+            }
+            return b',"user_behavior":' + app.json.dumps_bytes(behavior) + b"}"
+        
+        return stream_query(
             """
             SELECT dt.trace_id, dt.movie_id, m.title, dt.trace_path, dt.trace_summary, 
                    dt.decision_source, dt.num_steps, dt.time_spent_seconds, dt.created_at
@@ -1195,43 +1753,14 @@ def get_user_decision_traces():
             ORDER BY dt.created_at DESC
             LIMIT %s
             """,
-            (user_id, limit)
+            (user_id, limit),
+            transform=parse_trace,
+            prefix=b'{"traces":',
+            suffix=user_behavior,
         )
         
-        traces = cursor.fetchall()
-        
-        # Parse JSON and generate analytics
-        import json as json_lib
-        parsed_traces = []
-        decision_behavior = {
-            'search': 0, 'filter': 0, 'trending': 0, 
-            'recommendation': 0, 'browse': 0, 'direct': 0
-        }
-        avg_steps_taken = 0
-        
-        for trace in traces:
-            trace['trace_path'] = json_lib.loads(trace['trace_path'])
-            parsed_traces.append(trace)
-            decision_behavior[trace['decision_source']] += 1
-            avg_steps_taken += trace['num_steps']
-        
-        avg_steps_taken = avg_steps_taken / len(traces) if traces else 0
-        
-        # Identify user's preferred decision method
-        preferred_source = max(decision_behavior, key=decision_behavior.get)
-        
-        conn.close()
-        
-        return jsonify({
-            "traces": parsed_traces,
-            "user_behavior": {
-                "total_traces": len(traces),
-                "decision_methods": decision_behavior,
-                "preferred_method": preferred_source,
-                "average_decision_steps": round(avg_steps_taken, 1)
-            }
-        }), 200
-        
+    except PoolTimeout:
+        raise
     except Exception as e:
         logger.exception("Failed to get user decision traces: %s", e)
         return jsonify({"message": "Internal server error"}), 500
@@ -1241,190 +1770,48 @@ def get_user_decision_traces():
 def explain_algorithm(movie_id):
     """Explain why a movie is being shown - transparency in recommendations"""
     try:
-        user_id = None
-        auth_header = request.headers.get('Authorization')
-        if auth_header:
-            try:
-                token = auth_header.split(' ')[1]
-                payload = verify_jwt_token(token)
-                if payload:
-                    user_id = payload.get('user_id')
-            except:
-                pass
-        
-        conn = get_db()
-        cursor = conn.cursor(dictionary=True)
-        
-        # Get movie details
-        cursor.execute(
-            "SELECT title, genre, avg_rating, review_count FROM movies WHERE movie_id = %s",
-            (movie_id,)
+        user_id = optional_user_id()
+        rating_index.ensure_fresh(get_db)
+        explanation = algorithm_explain.explain_recommendation(
+            user_id, movie_id, get_db(), rating_index, taste_profiles
         )
-        movie = cursor.fetchone()
-        
-        if not movie:
-            conn.close()
+        if explanation is None:
             return jsonify({"message": "Movie not found"}), 404
-        
-        explanation = {
-            "movie": {
-                "id": movie_id,
-                "title": movie['title'],
-                "genre": movie['genre'],
-                "rating": float(movie['avg_rating']) if movie['avg_rating'] else 0,
-                "review_count": movie['review_count']
-            },
-            "factors": {
-                "personalization": [],
-                "filters": [],
-                "popularity": [],
-                "trending": []
-            },
-            "scores": {
-                "personalization_score": 0,
-                "filter_match_score": 0,
-                "popularity_score": 0,
-                "overall_score": 0
-            }
-        }
-        
-        # 1. PERSONALIZATION FACTORS (if user logged in)
-        if user_id:
-            cursor.execute(
-                """
-                SELECT r.rating, m.genre FROM reviews r
-                JOIN movies m ON r.movie_id = m.movie_id
-                WHERE r.user_id = %s AND r.rating >= 4.0
-                ORDER BY r.review_date DESC LIMIT 10
-                """,
-                (user_id,)
-            )
-            liked_movies = cursor.fetchall()
-            
-            if liked_movies:
-                genre_matches = sum(1 for m in liked_movies if m['genre'] == movie['genre'])
-                personalization_score = (genre_matches / len(liked_movies) * 100)
-                
-                if genre_matches > 0:
-                    explanation["factors"]["personalization"].append({
-                        "reason": "Genre Match",
-                        "description": f"You rated {genre_matches} {movie['genre']} movies highly",
-                        "weight": "40%",
-                        "emoji": "🎬"
-                    })
-                
-                explanation["scores"]["personalization_score"] = round(personalization_score, 1)
-        
-        # 2. FILTER MATCHING
-        filter_matches = []
-        
-        if movie['avg_rating'] >= 4.5:
-            filter_matches.append({
-                "filter": "High Rated",
-                "criteria": "Rating ≥ 4.5⭐",
-                "met": True,
-                "value": f"{movie['avg_rating']:.1f}⭐",
-                "emoji": "⭐"
-            })
-        
-        if movie['avg_rating'] >= 4.0:
-            filter_matches.append({
-                "filter": "Quality Threshold",
-                "criteria": "Rating ≥ 4.0⭐",
-                "met": True,
-                "value": f"{movie['avg_rating']:.1f}⭐",
-                "emoji": "✅"
-            })
-        
-        if movie['review_count'] >= 50:
-            filter_matches.append({
-                "filter": "Community Consensus",
-                "criteria": "≥50 verified reviews",
-                "met": True,
-                "value": f"{movie['review_count']} reviews",
-                "emoji": "👥"
-            })
-        
-        explanation["factors"]["filters"] = filter_matches
-        filter_score = (len(filter_matches) / 3 * 100) if filter_matches else 0
-        explanation["scores"]["filter_match_score"] = round(filter_score, 1)
-        
-        # 3. POPULARITY METRICS
-        cursor.execute(
-            "SELECT COUNT(*) as total FROM movies WHERE avg_rating <= %s",
-            (movie['avg_rating'],)
-        )
-        total_movies = cursor.fetchone()['total']
-        cursor.execute("SELECT COUNT(*) as count FROM movies")
-        all_movies_count = cursor.fetchone()['count']
-        
-        percentile = (total_movies / all_movies_count * 100) if all_movies_count > 0 else 0
-        
-        explanation["factors"]["popularity"] = [
-            {
-                "metric": "Rating Percentile",
-                "value": f"Top {100 - percentile:.0f}%",
-                "description": f"Higher rated than {percentile:.0f}% of movies",
-                "emoji": "📊"
-            },
-            {
-                "metric": "Review Volume",
-                "value": f"{movie['review_count']} reviews",
-                "description": "Indicator of community engagement",
-                "emoji": "💬"
-            },
-            {
-                "metric": "Average Rating",
-                "value": f"{movie['avg_rating']:.1f}/5.0",
-                "description": "Community consensus score",
-                "emoji": "⭐"
-            }
-        ]
-        
-        popularity_score = (percentile + (min(movie['review_count'], 100) / 100 * 50)) / 2
-        explanation["scores"]["popularity_score"] = round(popularity_score, 1)
-        
-        # 4. TRENDING INDICATORS
-        cursor.execute(
-            """
-            SELECT COUNT(*) as recent_reviews FROM reviews
-            WHERE movie_id = %s AND review_date >= DATE_SUB(NOW(), INTERVAL 7 DAY)
-            """,
-            (movie_id,)
-        )
-        recent_reviews = cursor.fetchone()['recent_reviews']
-        
-        if recent_reviews > 5:
-            explanation["factors"]["trending"].append({
-                "indicator": "Recent Activity",
-                "value": f"{recent_reviews} reviews in last 7 days",
-                "emoji": "📈"
-            })
-        
-        # 5. OVERALL SCORE
-        overall_score = (
-            (explanation["scores"]["personalization_score"] * 0.4) +
-            (explanation["scores"]["filter_match_score"] * 0.3) +
-            (explanation["scores"]["popularity_score"] * 0.3)
-        )
-        explanation["scores"]["overall_score"] = round(overall_score, 1)
-        
-        explanation["summary"] = (
-            f"This movie is shown because it scores {overall_score:.0f}/100 based on "
-            f"popularity ({explanation['scores']['popularity_score']:.0f}%), "
-            f"quality filters ({explanation['scores']['filter_match_score']:.0f}%), "
-            f"and " + ("your preferences" if user_id and explanation["scores"]["personalization_score"] > 0 else "recommendations") + "."
-        )
-        
-        conn.close()
-        
         return jsonify(explanation), 200
-        
+
+    except PoolTimeout:
+        raise
     except Exception as e:
         logger.exception("Failed to explain algorithm for movie %s: %s", movie_id, e)
         return jsonify({"message": "Internal server error"}), 500
 
 
+@app.route("/api/explain-algorithm", methods=["GET"])
+def explain_algorithm_batch():
+    """
+    Explain a whole page of movies (`?movie_ids=3,1,2`, up to 50) in one
+    round trip, in request order, with unknown IDs listed under `missing`.
+    """
+    raw_ids = [part for value in request.args.getlist("movie_ids") for part in value.split(",") if part]
+    try:
+        movie_ids = catalog.parse_ids(raw_ids, maximum=algorithm_explain.MAX_MOVIE_IDS)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    try:
+        user_id = optional_user_id()
+        rating_index.ensure_fresh(get_db)
+        explanations, missing = algorithm_explain.explain_many(
+            user_id, movie_ids, get_db(), rating_index, taste_profiles
+        )
+        return jsonify({"explanations": explanations, "missing": missing}), 200
+    except PoolTimeout:
+        raise
+    except Exception as e:
+        logger.exception("Failed to explain algorithm for movies %s: %s", movie_ids, e)
+        return jsonify({"message": "Internal server error"}), 500
+
+
 @app.route("/api/proxy-image", methods=["GET"])
 def proxy_image():
     """Proxy image requests to avoid CORS issues"""
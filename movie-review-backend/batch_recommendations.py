@@ -0,0 +1,274 @@
+"""
+Batch Recommendations
+Rule-based recommendations (recommendations.compute) for many users in one
+pass, for digests and backfills. The catalog and its rating stats are loaded
+once and sorted into the orderings compute() asks MySQL for; reviews are
+loaded for a batch of users at a time, preferred genres are aggregated for
+the whole batch with array operations, and each user's list is cut from the
+shared orderings. Lists, reasons and explanation types match compute().
+
+Results are written as NDJSON, one object per user in the endpoint's shape
+plus `user_id`:
+
+    python batch_recommendations.py > picks.ndjson             # every user
+    python batch_recommendations.py --users 4,8,15 --limit 20
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+import recommendations
+
+USER_BATCH = 5000
+MAX_USER_IDS = 100_000  # per API request
+FETCH_BATCH = 50_000
+NO_GENRE = -1
+
+
+class Catalog:
+    """Every movie with its rating stats, plus the orderings compute() uses."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        n = len(rows)
+        self.movie_ids = np.array([row["movie_id"] for row in rows], dtype=np.int64)
+        self.avg = np.array([float(row["avg_rating"]) for row in rows], dtype=np.float64)
+        self.review_count = np.array([row["review_count"] for row in rows], dtype=np.int64)
+        has_stats = np.array([row.pop("stats_movie_id") is not None for row in rows], dtype=bool)
+        years = np.array(
+            [row["release_year"] if row.get("release_year") is not None else np.nan for row in rows],
+            dtype=np.float64,
+        )
+        # Genres compare case-insensitively, like MySQL's default collation.
+        self.genre_names = []
+        keys = {}
+        self.genre_codes = np.full(n, NO_GENRE, dtype=np.int64)
+        for i, row in enumerate(rows):
+            genre = row.get("genre")
+            if genre is None:
+                continue
+            key = genre.lower()
+            if key not in keys:
+                keys[key] = len(self.genre_names)
+                self.genre_names.append(genre)
+            self.genre_codes[i] = keys[key]
+
+        # ORDER BY avg_rating DESC, review_count DESC, movie_id (genre picks)
+        self.by_rating = np.lexsort((self.movie_ids, -self.review_count, -self.avg))
+        self.rank = np.empty(n, dtype=np.int64)
+        self.rank[self.by_rating] = np.arange(n)
+        genre_sorted = self.genre_codes[self.by_rating]
+        self.by_genre = {
+            code: self.by_rating[genre_sorted == code] for code in range(len(self.genre_names))
+        }
+        # ORDER BY review_count DESC, avg_rating DESC, movie_id over review_count >= 3 AND avg_rating >= 4
+        trending = np.lexsort((self.movie_ids, -self.avg, -self.review_count))
+        self.trending = trending[
+            has_stats[trending] & (self.review_count[trending] >= 3) & (self.avg[trending] >= 4.0)
+        ]
+        # ORDER BY avg_rating DESC, release_year DESC (NULLs last), movie_id
+        self.by_rating_year = np.lexsort((self.movie_ids, np.nan_to_num(-years, nan=np.inf), -self.avg))
+
+    def rows_of(self, movie_ids):
+        """Catalog rows of movie ids; ids not in the catalog map to -1."""
+        rows = np.searchsorted(self.movie_ids, movie_ids)
+        rows = np.minimum(rows, max(len(self.movie_ids) - 1, 0))
+        known = self.movie_ids[rows] == movie_ids if len(self.movie_ids) else np.zeros(len(movie_ids), bool)
+        return np.where(known, rows, -1)
+
+
+def load_catalog(cursor):
+    """Catalog of every movie (dictionary cursor), in movie_id order."""
+    cursor.execute(
+        """
+        SELECT m.*, COALESCE(s.avg_rating, 0) AS avg_rating,
+               COALESCE(s.review_count, 0) AS review_count,
+               s.movie_id AS stats_movie_id
+        FROM movies m
+        LEFT JOIN movie_rating_stats s ON s.movie_id = m.movie_id
+        ORDER BY m.movie_id
+        """
+    )
+    return Catalog(cursor.fetchall())
+
+
+def load_reviews(cursor, user_ids):
+    """(user_ids, movie_ids, ratings with NaN for none, unix review times) for the users."""
+    cursor.execute(
+        f"""
+        SELECT user_id, movie_id, rating, UNIX_TIMESTAMP(review_date)
+        FROM reviews
+        WHERE user_id IN ({",".join(["%s"] * len(user_ids))})
+        """,
+        list(user_ids),
+    )
+    chunks = []
+    while True:
+        rows = cursor.fetchmany(FETCH_BATCH)
+        if not rows:
+            break
+        chunks.append(np.array(
+            [(u, m, np.nan if r is None else r, float(t or 0)) for u, m, r, t in rows], dtype=np.float64
+        ).reshape(-1, 4))
+    data = np.concatenate(chunks) if chunks else np.empty((0, 4))
+    return data[:, 0].astype(np.int64), data[:, 1].astype(np.int64), data[:, 2], data[:, 3]
+
+
+def _preferred_genres(catalog, user_rows, genre_codes, ratings, n_users):
+    """
+    Per-user genre codes with an average rating >= 4, best average first,
+    then most reviewed, then by name (compute()'s GROUP BY ... HAVING).
+    """
+    n_genres = len(catalog.genre_names)
+    has_genre = genre_codes != NO_GENRE
+    cell = user_rows[has_genre] * n_genres + genre_codes[has_genre]
+    rated = ~np.isnan(ratings[has_genre])
+    size = n_users * n_genres
+    watch = np.bincount(cell, minlength=size)
+    rating_sum = np.bincount(cell[rated], weights=ratings[has_genre][rated], minlength=size)
+    rated_count = np.bincount(cell[rated], minlength=size)
+    avg = np.divide(rating_sum, rated_count, out=np.zeros(size), where=rated_count > 0)
+    liked = np.flatnonzero((rated_count > 0) & (avg >= 4.0))
+    names = np.array([name.lower() for name in catalog.genre_names] or [""])
+    liked_user, liked_genre = liked // max(n_genres, 1), liked % max(n_genres, 1)
+    liked = liked[np.lexsort((names[liked_genre], -watch[liked], -avg[liked], liked_user))]
+    bounds = np.searchsorted(liked // max(n_genres, 1), np.arange(n_users + 1))
+    return [liked[bounds[u]:bounds[u + 1]] % max(n_genres, 1) for u in range(n_users)]
+
+
+def _explain(catalog, row, preferred, liked_genres):
+    """(recommendation_reason, explanation_type) exactly as compute() assigns them."""
+    movie = catalog.rows[row]
+    genre = movie.get("genre")
+    count, avg = catalog.review_count[row], catalog.avg[row]
+    if preferred and genre in preferred:
+        explanation_type = "genre_preference"
+    elif liked_genres and genre:
+        explanation_type = "similar_to_liked" if genre in liked_genres else ""
+    elif count >= 5 and avg >= 4.0:
+        explanation_type = "trending"
+    elif avg >= 4.0:
+        explanation_type = "high_rated"
+    else:
+        explanation_type = "general"
+    if preferred and genre in preferred:
+        reason = f"Based on your love for {genre}"
+    elif count >= 5:
+        reason = "Trending now"
+    else:
+        reason = "Highly rated"
+    return reason, explanation_type
+
+
+def _pick(candidates, seen, wanted):
+    """The first `wanted` candidates not marked in `seen`."""
+    return candidates[~seen[candidates]][:wanted]
+
+
+def generate(conn, user_ids=None, limit=recommendations.TOP_N, user_batch=USER_BATCH):
+    """
+    Yield (user_id, result) for each user (every user when user_ids is None,
+    in user_id order), result being what compute() returns for them.
+    """
+    cursor = conn.cursor(dictionary=True)
+    catalog = load_catalog(cursor)
+    if user_ids is None:
+        cursor.execute("SELECT user_id FROM users ORDER BY user_id")
+        user_ids = [row["user_id"] for row in cursor.fetchall()]
+    cursor.close()
+    seen = np.zeros(len(catalog.movie_ids), dtype=bool)
+    plain = conn.cursor()
+
+    for start in range(0, len(user_ids), user_batch):
+        batch = list(user_ids[start:start + user_batch])
+        review_users, review_movies, ratings, times = load_reviews(plain, batch)
+        rows = catalog.rows_of(review_movies)
+        known = rows >= 0  # reviews JOIN movies
+        position = {user_id: i for i, user_id in enumerate(batch)}
+        user_rows = np.array([position[u] for u in review_users[known].tolist()], dtype=np.int64)
+        rows, ratings, times = rows[known], ratings[known], times[known]
+
+        preferred = _preferred_genres(catalog, user_rows, catalog.genre_codes[rows], ratings, len(batch))
+        # Each user's reviews, best rated then newest first (compute()'s review history order).
+        order = np.lexsort((catalog.movie_ids[rows], -times, -np.nan_to_num(ratings, nan=-np.inf), user_rows))
+        user_rows, rows, ratings = user_rows[order], rows[order], ratings[order]
+        bounds = np.searchsorted(user_rows, np.arange(len(batch) + 1))
+
+        for i, user_id in enumerate(batch):
+            watched = rows[bounds[i]:bounds[i + 1]]
+            top_rated = watched[ratings[bounds[i]:bounds[i + 1]] >= 4.5][:3]
+            liked_genres = [catalog.rows[r].get("genre") for r in top_rated]
+            genre_codes = preferred[i]
+            preferred_names = [catalog.genre_names[g] for g in genre_codes]
+
+            seen[watched] = True
+            picks = np.empty(0, dtype=np.int64)
+            if len(genre_codes):
+                candidates = np.concatenate(
+                    [catalog.by_genre[g][:limit + len(watched)] for g in genre_codes[:3]]
+                )
+                candidates = catalog.by_rating[np.sort(catalog.rank[candidates])]
+                picks = _pick(candidates, seen, limit)
+            if len(picks) < limit:
+                need = limit - len(picks)
+                picks = np.concatenate([picks, _pick(catalog.trending[:need + len(watched)], seen, need)])
+            if len(picks) < limit:
+                need = limit - len(picks)
+                seen[picks] = True
+                fallback = catalog.by_rating_year[:need + len(watched) + len(picks)]
+                picks = np.concatenate([picks, _pick(fallback, seen, need)])
+                seen[picks] = False
+            seen[watched] = False
+
+            movies = []
+            for row in picks.tolist():
+                reason, explanation_type = _explain(catalog, row, preferred_names, liked_genres)
+                movies.append(dict(
+                    catalog.rows[row], recommendation_reason=reason, explanation_type=explanation_type
+                ))
+            yield user_id, {
+                "recommendations": movies,
+                "preferred_genres": preferred_names,
+                "algorithm": recommendations.ALGORITHM,
+                "user_watch_count": len(watched),
+            }
+    plain.close()
+
+
+def ndjson_lines(conn, dumps, user_ids=None, limit=recommendations.TOP_N):
+    """generate() as NDJSON lines; `dumps` must return bytes."""
+    for user_id, result in generate(conn, user_ids, limit):
+        yield dumps({"user_id": user_id, **result}) + b"\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rule-based recommendations for many users as NDJSON")
+    parser.add_argument("--users", help="comma-separated user ids (default: every user)")
+    parser.add_argument("--limit", type=int, default=recommendations.TOP_N, help="recommendations per user")
+    parser.add_argument("--out", help="output file (default: stdout)")
+    args = parser.parse_args(argv)
+    user_ids = [int(part) for part in args.users.split(",") if part] if args.users else None
+
+    from app import app, get_db
+
+    conn = get_db()
+    out = open(args.out, "wb") if args.out else sys.stdout.buffer
+    started = time.monotonic()
+    count = 0
+    try:
+        for line in ndjson_lines(conn, app.json.dumps_bytes, user_ids, args.limit):
+            out.write(line)
+            count += 1
+    finally:
+        conn.close()
+        if args.out:
+            out.close()
+    print(f"{count} users in {time.monotonic() - started:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+JSON Serialization Benchmark
+Times encoding a synthetic /api/movies payload (rows shaped like the catalog
+query results) with Flask's default provider and with FastJSONProvider.
+
+    python bench_json.py            # 10k rows
+    python bench_json.py 50000 --repeat 5
+"""
+
+import argparse
+import datetime
+import decimal
+import random
+import time
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+import json_provider
+from json_provider import FastJSONProvider, RawJSON
+
+GENRES = ["Action", "Comedy", "Drama", "Horror", "Romance", "Sci-Fi", "Thriller"]
+
+
+def movie_rows(count, seed=7):
+    rng = random.Random(seed)
+    released = datetime.datetime(2024, 1, 1)
+    return [
+        {
+            "movie_id": i,
+            "title": f"Movie {i}",
+            "genre": rng.choice(GENRES),
+            "language": "English",
+            "release_year": rng.randint(1950, 2024),
+            "duration_minutes": rng.randint(80, 180),
+            "poster_url": f"https://example.com/posters/{i}.jpg",
+            "description": "A story about " + " ".join(rng.choice(GENRES).lower() for _ in range(12)),
+            "avg_rating": decimal.Decimal(rng.randint(100, 500)) / 100,
+            "review_count": rng.randint(0, 500),
+            "created_at": released + datetime.timedelta(minutes=i),
+        }
+        for i in range(count)
+    ]
+
+
+def trace_rows(count):
+    path = '["search", "filter", "trailer", "reviews", "watch"]'
+    return [{"trace_id": i, "trace_path": path, "num_steps": 5} for i in range(count)]
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("rows", nargs="?", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    app = Flask(__name__)
+    default, fast = DefaultJSONProvider(app), FastJSONProvider(app)
+    movies, traces = movie_rows(args.rows), trace_rows(args.rows)
+
+    cases = [
+        ("movies / default", lambda: default.dumps(movies, separators=(",", ":")).encode()),
+        ("movies / fast", lambda: fast.dumps_bytes(movies)),
+        ("traces parse+dump / default", lambda: default.dumps(
+            [dict(t, trace_path=default.loads(t["trace_path"])) for t in traces]
+        ).encode()),
+        ("traces raw / fast", lambda: fast.dumps_bytes(
+            [dict(t, trace_path=RawJSON(t["trace_path"])) for t in traces]
+        )),
+    ]
+    backend = "orjson" if json_provider.orjson is not None else "stdlib json"
+    print(f"{args.rows} rows, best of {args.repeat}, fast provider backend: {backend}")
+    for name, fn in cases:
+        print(f"  {name:<30} {best_of(fn, args.repeat) * 1000:8.1f} ms  {len(fn()) / 1024:8.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""
+Recommendation Evaluation Harness
+Generates a seeded synthetic catalog (Zipf-distributed movie popularity,
+users drawn from mood-based genre taste clusters), loads the reviews before
+a time cutoff into MySQL and holds out the rest. Every recommendation
+algorithm then answers each evaluated user through the same calls
+/api/recommendations makes. The harness reports precision@k and recall@k
+against the held-out reviews rated 4 or 5, catalog coverage, how often the
+algorithm fell back to rule-based, and p50/p95/p99 latency per user.
+
+Run it against a disposable database. It refuses to start if the catalog
+holds movies it did not create, and it removes its data afterwards unless
+--keep is given. Results are JSON, so runs can be diffed:
+
+    DB_NAME=movie_review_bench python bench_recommendations.py --out before.json
+    DB_NAME=movie_review_bench python bench_recommendations.py --baseline before.json --out after.json
+"""
+
+import argparse
+import datetime
+import json
+import sys
+import time
+
+import numpy as np
+
+import item_cf
+import mf_model
+import moods
+import rating_stats
+import recommendations
+
+TITLE_PREFIX = "Bench Movie "
+EMAIL_PATTERN = "bench-{}@example.invalid"
+LANGUAGES = ["English", "Hindi", "Tamil", "Korean", "Spanish"]
+RELEVANT_RATING = 4
+HOLDOUT_FRACTION = 0.2
+INSERT_BATCH = 5000
+SPAN_DAYS = 365
+
+
+class Dataset:
+    """Synthetic movies, users and reviews (user/movie indexes are 0-based)."""
+
+    def __init__(self, movies, user_count, review_users, review_movies, ratings, days):
+        self.movies = movies  # (title, genre, language, release_year)
+        self.user_count = user_count
+        self.review_users = review_users
+        self.review_movies = review_movies
+        self.ratings = ratings
+        self.days = days  # fractional days after the start of the span
+
+
+def generate(seed, users, movies, reviews_per_user, zipf=1.1):
+    """
+    Each movie gets a genre, a Zipf popularity weight and a hidden quality.
+    Each user gets one mood from moods.MOODS as their taste cluster and
+    favours its genres when choosing and rating movies.
+    """
+    rng = np.random.default_rng(seed)
+    clusters = [spec["genres"] for spec in moods.MOODS.values()]
+    genres = sorted({genre for cluster in clusters for genre in cluster})
+    movie_genre = rng.integers(0, len(genres), movies)
+    popularity = 1.0 / np.arange(1, movies + 1) ** zipf
+    popularity = popularity[rng.permutation(movies)]
+    quality = rng.normal(0, 0.6, movies)
+    catalog = [
+        (f"{TITLE_PREFIX}{i}", genres[movie_genre[i]], LANGUAGES[rng.integers(len(LANGUAGES))],
+         int(rng.integers(1970, 2025)))
+        for i in range(movies)
+    ]
+
+    review_users, review_movies, ratings = [], [], []
+    cluster_of = rng.integers(0, len(clusters), users)
+    activity = np.clip(rng.lognormal(np.log(reviews_per_user), 0.8, users).astype(int), 3, movies)
+    for user in range(users):
+        favourite = np.isin(movie_genre, [genres.index(g) for g in clusters[cluster_of[user]]])
+        weights = popularity * np.where(favourite, 4.0, 1.0)
+        picked = rng.choice(movies, size=activity[user], replace=False, p=weights / weights.sum())
+        taste = np.where(favourite[picked], 1.0, -0.3)
+        scores = 3.0 + quality[picked] + taste + rng.normal(0, 0.8, len(picked))
+        review_users.append(np.full(len(picked), user))
+        review_movies.append(picked)
+        ratings.append(np.clip(np.rint(scores), 1, 5).astype(int))
+    review_users = np.concatenate(review_users)
+    days = rng.uniform(0, SPAN_DAYS, len(review_users))
+    return Dataset(catalog, users, review_users, np.concatenate(review_movies),
+                   np.concatenate(ratings), days)
+
+
+def time_split(dataset, holdout=HOLDOUT_FRACTION):
+    """Boolean mask of the training reviews: everything before the cutoff day."""
+    cutoff = np.quantile(dataset.days, 1 - holdout)
+    return dataset.days < cutoff
+
+
+def check_empty(cursor):
+    cursor.execute(
+        "SELECT COUNT(*) FROM movies WHERE title NOT LIKE %s", (TITLE_PREFIX + "%",)
+    )
+    (foreign,) = cursor.fetchone()
+    if foreign:
+        raise SystemExit(
+            f"Refusing to run: the database has {foreign} movies the harness did not create. "
+            "Point DB_NAME at a disposable database."
+        )
+
+
+def load(conn, dataset, train):
+    """Insert the synthetic data (training reviews only); returns (user ids, movie ids)."""
+    cursor = conn.cursor()
+    cleanup(conn)
+    for start in range(0, len(dataset.movies), INSERT_BATCH):
+        cursor.executemany(
+            "INSERT INTO movies (title, genre, language, release_year) VALUES (%s, %s, %s, %s)",
+            dataset.movies[start:start + INSERT_BATCH],
+        )
+    emails = [EMAIL_PATTERN.format(n) for n in range(dataset.user_count)]
+    for start in range(0, len(emails), INSERT_BATCH):
+        cursor.executemany(
+            "INSERT INTO users (name, email, password) VALUES (%s, %s, '!')",
+            [(email.split("@")[0], email) for email in emails[start:start + INSERT_BATCH]],
+        )
+    conn.commit()
+
+    cursor.execute("SELECT title, movie_id FROM movies WHERE title LIKE %s", (TITLE_PREFIX + "%",))
+    by_title = dict(cursor.fetchall())
+    movie_ids = np.array([by_title[movie[0]] for movie in dataset.movies], dtype=np.int64)
+    cursor.execute("SELECT email, user_id FROM users WHERE email LIKE %s", (EMAIL_PATTERN.format("%"),))
+    by_email = dict(cursor.fetchall())
+    user_ids = np.array([by_email[email] for email in emails], dtype=np.int64)
+
+    start_day = datetime.datetime.now() - datetime.timedelta(days=SPAN_DAYS + 1)
+    rows = [
+        (int(user_ids[u]), int(movie_ids[m]), int(r), "", start_day + datetime.timedelta(days=float(d)))
+        for u, m, r, d in zip(
+            dataset.review_users[train], dataset.review_movies[train],
+            dataset.ratings[train], dataset.days[train],
+        )
+    ]
+    for start in range(0, len(rows), INSERT_BATCH):
+        cursor.executemany(
+            "INSERT INTO reviews (user_id, movie_id, rating, comment, review_date) VALUES (%s, %s, %s, %s, %s)",
+            rows[start:start + INSERT_BATCH],
+        )
+        conn.commit()
+    rating_stats.rebuild(conn)
+    rating_stats.rebuild_users(conn)
+    rating_stats.rebuild_daily(conn)
+    return user_ids, movie_ids
+
+
+def cleanup(conn):
+    """Remove everything the harness created."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT user_id FROM users WHERE email LIKE %s", (EMAIL_PATTERN.format("%"),))
+    user_ids = [row[0] for row in cursor.fetchall()]
+    for start in range(0, len(user_ids), INSERT_BATCH):
+        batch = user_ids[start:start + INSERT_BATCH]
+        placeholders = ",".join(["%s"] * len(batch))
+        cursor.execute(f"DELETE FROM reviews WHERE user_id IN ({placeholders})", batch)
+        cursor.execute(f"DELETE FROM users WHERE user_id IN ({placeholders})", batch)
+    cursor.execute("DELETE FROM movies WHERE title LIKE %s", (TITLE_PREFIX + "%",))
+    conn.commit()
+
+
+def percentiles(samples_ms):
+    if not samples_ms:
+        return {"p50": None, "p95": None, "p99": None, "mean": None}
+    p50, p95, p99 = np.percentile(samples_ms, [50, 95, 99])
+    return {
+        "p50": round(float(p50), 3), "p95": round(float(p95), 3),
+        "p99": round(float(p99), 3), "mean": round(float(np.mean(samples_ms)), 3),
+    }
+
+
+def evaluate(conn, algorithm, recommend, users, relevant, catalog_size, k):
+    """
+    Run `recommend(cursor, user_id, k)` for every evaluated user and score
+    its picks against that user's held-out relevant movie ids.
+    """
+    cursor = conn.cursor(dictionary=True)
+    latencies, precision, recall, recommended = [], [], [], set()
+    fallbacks = 0
+    for user_id in users:
+        started = time.perf_counter()
+        result = recommend(cursor, user_id, k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        picks = [movie["movie_id"] for movie in result["recommendations"]][:k]
+        if result["algorithm"] != algorithm:
+            fallbacks += 1
+        hits = len(relevant[user_id].intersection(picks))
+        precision.append(hits / k)
+        recall.append(hits / len(relevant[user_id]))
+        recommended.update(picks)
+    cursor.close()
+    return {
+        "precision_at_k": round(float(np.mean(precision)), 5) if users else None,
+        "recall_at_k": round(float(np.mean(recall)), 5) if users else None,
+        "coverage": round(len(recommended) / catalog_size, 5) if catalog_size else None,
+        "fallback_rate": round(fallbacks / len(users), 5) if users else None,
+        "latency_ms": percentiles(latencies),
+    }
+
+
+def algorithms(conn):
+    """(name, build seconds, recommend(cursor, user_id, k)) for each algorithm, as the endpoint runs them."""
+    user_ids, movie_ids, ratings = item_cf.load_ratings(conn)
+
+    started = time.monotonic()
+    index = item_cf.build(user_ids, movie_ids, ratings)
+    cf_seconds = time.monotonic() - started
+    started = time.monotonic()
+    model = mf_model.train(user_ids, movie_ids, ratings)
+    als_seconds = time.monotonic() - started
+
+    def rule_based(cursor, user_id, k):
+        return recommendations.compute(cursor, user_id, k)
+
+    def with_fallback(recommend, source):
+        def run(cursor, user_id, k):
+            return recommend(cursor, source, user_id, k) or recommendations.compute(cursor, user_id, k)
+        return run
+
+    return [
+        (recommendations.ALGORITHM, 0.0, rule_based),
+        (item_cf.ALGORITHM, cf_seconds, with_fallback(item_cf.recommend, index)),
+        (mf_model.ALGORITHM, als_seconds, with_fallback(mf_model.recommend, model)),
+    ]
+
+
+def compare(results, baseline):
+    """Per-algorithm metric deltas against an earlier results file, for the terminal."""
+    lines = []
+    for name, metrics in results["algorithms"].items():
+        before = baseline.get("algorithms", {}).get(name)
+        if not before:
+            continue
+        for key in ("precision_at_k", "recall_at_k", "coverage"):
+            if metrics[key] is not None and before.get(key) is not None:
+                lines.append(f"{name} {key}: {before[key]} -> {metrics[key]} ({metrics[key] - before[key]:+.5f})")
+        for key in ("p50", "p95", "p99"):
+            now, then = metrics["latency_ms"][key], before.get("latency_ms", {}).get(key)
+            if now is not None and then is not None:
+                lines.append(f"{name} latency {key}: {then} -> {now} ms")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline recommendation quality and latency benchmark")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--movies", type=int, default=1000)
+    parser.add_argument("--reviews-per-user", type=int, default=30, help="median reviews per user")
+    parser.add_argument("--k", type=int, default=recommendations.TOP_N)
+    parser.add_argument("--eval-users", type=int, default=500, help="users evaluated per algorithm (0: all)")
+    parser.add_argument("--out", help="results file (default: stdout)")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--keep", action="store_true", help="leave the synthetic data in the database")
+    args = parser.parse_args(argv)
+
+    from app import get_db
+
+    dataset = generate(args.seed, args.users, args.movies, args.reviews_per_user)
+    train = time_split(dataset)
+    conn = get_db()
+    try:
+        check_empty(conn.cursor())
+        started = time.monotonic()
+        user_ids, movie_ids = load(conn, dataset, train)
+        load_seconds = time.monotonic() - started
+
+        # Evaluate users with a held-out movie they liked, in a seeded random order.
+        liked = ~train & (dataset.ratings >= RELEVANT_RATING)
+        relevant = {}
+        for u, m in zip(dataset.review_users[liked], dataset.review_movies[liked]):
+            relevant.setdefault(int(user_ids[u]), set()).add(int(movie_ids[m]))
+        users = sorted(relevant)
+        np.random.default_rng(args.seed).shuffle(users)
+        if args.eval_users:
+            users = users[:args.eval_users]
+
+        results = {
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "config": {
+                "seed": args.seed, "users": args.users, "movies": args.movies,
+                "reviews_per_user": args.reviews_per_user, "k": args.k,
+                "holdout_fraction": HOLDOUT_FRACTION, "relevant_rating": RELEVANT_RATING,
+            },
+            "data": {
+                "train_reviews": int(train.sum()), "holdout_reviews": int((~train).sum()),
+                "evaluated_users": len(users), "load_seconds": round(load_seconds, 2),
+            },
+            "algorithms": {},
+        }
+        for name, build_seconds, recommend in algorithms(conn):
+            metrics = evaluate(conn, name, recommend, users, relevant, len(movie_ids), args.k)
+            metrics["build_seconds"] = round(build_seconds, 3)
+            results["algorithms"][name] = metrics
+            print(f"{name}: {json.dumps(metrics)}", file=sys.stderr)
+    finally:
+        if not args.keep:
+            cleanup(conn)
+        conn.close()
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            for line in compare(results, json.load(f)):
+                print(line, file=sys.stderr)
+    body = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(body + "\n")
+    else:
+        print(body)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,287 @@
+"""
+Catalog Listing Queries
+Field projection, keyset-ordered listing and search SQL for the movies catalog.
+"""
+
+import re
+
+MOVIE_COLUMNS = [
+    "movie_id", "title", "genre", "language", "release_year",
+    "duration_minutes", "poster_url", "description",
+]
+AGGREGATE_COLUMNS = {
+    "avg_rating": "COALESCE(s.avg_rating, 0)",
+    "review_count": "COALESCE(s.review_count, 0)",
+}
+MOVIE_FIELDS = MOVIE_COLUMNS + list(AGGREGATE_COLUMNS)
+
+# sort name -> (FROM clause, sort key expression, ORDER BY)
+# Each order is served by an index whose implicit InnoDB suffix is movie_id:
+# PRIMARY, idx_rating_stats_avg_id and idx_movies_release_year.
+LIST_SORTS = {
+    "newest": (
+        "movies m LEFT JOIN movie_rating_stats s ON s.movie_id = m.movie_id",
+        "m.movie_id",
+        "m.movie_id DESC",
+    ),
+    "rating": (
+        "movie_rating_stats s JOIN movies m ON m.movie_id = s.movie_id",
+        "s.avg_rating",
+        "s.avg_rating DESC, s.movie_id DESC",
+    ),
+    "year": (
+        "movies m LEFT JOIN movie_rating_stats s ON s.movie_id = m.movie_id",
+        "m.release_year",
+        "m.release_year DESC, m.movie_id DESC",
+    ),
+}
+
+
+def parse_fields(raw):
+    """Turn `fields=title,genre` into a column list; movie_id is always kept."""
+    if not raw:
+        return list(MOVIE_FIELDS)
+    requested = [f.strip() for f in raw.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in MOVIE_FIELDS]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+    return ["movie_id"] + [f for f in MOVIE_FIELDS if f in requested and f != "movie_id"]
+
+
+def select_list(fields):
+    return ", ".join(
+        f"{AGGREGATE_COLUMNS[f]} AS {f}" if f in AGGREGATE_COLUMNS else f"m.{f}"
+        for f in fields
+    )
+
+
+def _keyset_condition(sort, after):
+    """WHERE fragment selecting rows strictly after the cursor position."""
+    if sort == "newest":
+        (last_id,) = after
+        return "m.movie_id < %s", [int(last_id)]
+    last_key, last_id = after
+    if sort == "rating":
+        return (
+            "(s.avg_rating < %s OR (s.avg_rating = %s AND s.movie_id < %s))",
+            [last_key, last_key, int(last_id)],
+        )
+    # MySQL sorts NULL years last in DESC order.
+    if last_key is None:
+        return "(m.release_year IS NULL AND m.movie_id < %s)", [int(last_id)]
+    return (
+        "(m.release_year < %s OR (m.release_year = %s AND m.movie_id < %s)"
+        " OR m.release_year IS NULL)",
+        [int(last_key), int(last_key), int(last_id)],
+    )
+
+
+def cursor_arity(sort):
+    return 1 if sort == "newest" else 2
+
+
+def listing_query(fields, sort, after, limit):
+    """
+    Build one page of the catalog listing. Fetches limit + 1 rows so the
+    caller can tell whether another page exists; every row carries the sort
+    key as `_sort_key` for building the next cursor.
+    """
+    from_clause, key_expr, order_by = LIST_SORTS[sort]
+    where, params = "", []
+    if after is not None:
+        condition, params = _keyset_condition(sort, after)
+        where = f"WHERE {condition}"
+    sql = f"""
+        SELECT {select_list(fields)}, {key_expr} AS _sort_key
+        FROM {from_clause}
+        {where}
+        ORDER BY {order_by}
+        LIMIT %s
+    """
+    return sql, params + [limit + 1]
+
+
+def cursor_values(sort, row):
+    """Sort keys of `row` in the order expected by _keyset_condition."""
+    if sort == "newest":
+        return (row["movie_id"],)
+    return (row["_sort_key"], row["movie_id"])
+
+
+MOVIE_BATCH_MAX = 500
+
+
+def parse_ids(raw, maximum=MOVIE_BATCH_MAX, label="movie IDs"):
+    """
+    Validate the IDs of a batch lookup (a list of ints or numeric strings),
+    dropping duplicates but keeping the requested order.
+    """
+    if not isinstance(raw, list) or not raw:
+        raise ValueError(f"ids must be a non-empty list of {label}")
+    ids, seen = [], set()
+    for value in raw:
+        if isinstance(value, bool):
+            raise ValueError("ids must be integers")
+        try:
+            movie_id = int(str(value).strip())
+        except ValueError:
+            raise ValueError("ids must be integers")
+        if movie_id not in seen:
+            seen.add(movie_id)
+            ids.append(movie_id)
+    if len(ids) > maximum:
+        raise ValueError(f"at most {maximum} ids per request")
+    return ids
+
+
+MOVIES_FIRST = "movies m LEFT JOIN movie_rating_stats s ON s.movie_id = m.movie_id"
+STATS_FIRST = "movie_rating_stats s JOIN movies m ON m.movie_id = s.movie_id"
+
+# sort name -> (FROM clause, sort key column, movie id column, descending).
+# Keys are raw indexed columns, as in LIST_SORTS (idx_rating_stats_avg_id,
+# idx_rating_stats_count, idx_movies_release_year, idx_movies_title, each
+# with the implicit movie_id suffix); NULL years are handled by the keyset.
+# "relevance" uses the full-text score and is only valid together with a
+# text query.
+SEARCH_SORTS = {
+    "relevance": (MOVIES_FIRST, None, "m.movie_id", True),
+    "rating": (STATS_FIRST, "s.avg_rating", "s.movie_id", True),
+    "rating_asc": (STATS_FIRST, "s.avg_rating", "s.movie_id", False),
+    "popular": (STATS_FIRST, "s.review_count", "s.movie_id", True),
+    "year": (MOVIES_FIRST, "m.release_year", "m.movie_id", True),
+    "year_asc": (MOVIES_FIRST, "m.release_year", "m.movie_id", False),
+    "title": (MOVIES_FIRST, "m.title", "m.movie_id", False),
+    "title_desc": (MOVIES_FIRST, "m.title", "m.movie_id", True),
+}
+NULLABLE_SORT_KEYS = {"m.release_year"}
+
+FULLTEXT_MATCH = "MATCH(m.title, m.description) AGAINST (%s IN BOOLEAN MODE)"
+# InnoDB ignores shorter words (innodb_ft_min_token_size)
+FULLTEXT_MIN_TOKEN = 3
+
+
+def _optional_int(args, name):
+    raw = args.get(name)
+    if raw in (None, ""):
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be a number")
+
+
+def parse_search(args, moods):
+    """Validate /api/movies/search query parameters into a search spec."""
+    q = (args.get("q") or "").strip()[:100]
+    mood = args.get("mood") or None
+    if mood and mood not in moods:
+        raise ValueError(f"mood must be one of {', '.join(moods)}")
+    min_rating = args.get("min_rating")
+    if min_rating in (None, "", "All"):
+        min_rating = None
+    else:
+        try:
+            min_rating = float(min_rating)
+        except ValueError:
+            raise ValueError("min_rating must be a number")
+    genres = [g.strip() for g in (args.get("genre") or "").split(",") if g.strip() and g.strip() != "All"]
+    sort = args.get("sort") or ("relevance" if q else "rating")
+    if sort not in SEARCH_SORTS:
+        raise ValueError(f"sort must be one of {', '.join(SEARCH_SORTS)}")
+    if sort == "relevance" and not q:
+        raise ValueError("sort=relevance requires q")
+    return {
+        "q": q,
+        "genres": genres,
+        "language": args.get("language") or None,
+        "year_from": _optional_int(args, "year_from"),
+        "year_to": _optional_int(args, "year_to"),
+        "max_duration": _optional_int(args, "max_duration"),
+        "min_rating": min_rating,
+        "mood": mood,
+        "sort": sort,
+    }
+
+
+def _text_filter(q):
+    """
+    WHERE fragment and relevance expression for a text query. Words long
+    enough for the FULLTEXT index become required prefix terms; very short
+    queries fall back to a title prefix match on idx_movies_title.
+    """
+    words = [w for w in re.findall(r"\w+", q) if len(w) >= FULLTEXT_MIN_TOKEN]
+    if words:
+        terms = " ".join(f"+{w}*" for w in words)
+        return FULLTEXT_MATCH, [terms], FULLTEXT_MATCH, [terms]
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return "m.title LIKE %s", [escaped + "%"], "0", []
+
+
+def _search_after(key_sql, key_params, id_sql, descending, after):
+    """
+    Keyset condition for rows after (last_key, last_id). MySQL sorts NULL
+    keys first ascending and last descending.
+    """
+    last_key, last_id = after
+    op = "<" if descending else ">"
+    nullable = key_sql in NULLABLE_SORT_KEYS
+    if nullable and last_key is None:
+        if descending:
+            return f"({key_sql} IS NULL AND {id_sql} < %s)", [int(last_id)]
+        return f"(({key_sql} IS NULL AND {id_sql} > %s) OR {key_sql} IS NOT NULL)", [int(last_id)]
+    condition = f"{key_sql} {op} %s OR ({key_sql} = %s AND {id_sql} {op} %s)"
+    if nullable and descending:
+        condition += f" OR {key_sql} IS NULL"
+    return f"({condition})", key_params + [last_key] + key_params + [last_key, int(last_id)]
+
+
+def search_query(spec, fields, after, limit):
+    """Build one keyset page of search results (limit + 1 rows, like listing_query)."""
+    where, where_params = [], []
+    from_clause, key_sql, id_sql, descending = SEARCH_SORTS[spec["sort"]]
+    key_params = []
+
+    if spec["q"]:
+        text_sql, text_params, score_sql, score_params = _text_filter(spec["q"])
+        where.append(text_sql)
+        where_params += text_params
+        if key_sql is None:
+            key_sql, key_params = score_sql, score_params
+    if spec["genres"]:
+        where.append("m.genre IN ({})".format(",".join(["%s"] * len(spec["genres"]))))
+        where_params += spec["genres"]
+    if spec["mood"]:
+        where.append("m.genre IN (SELECT mg.genre FROM mood_genres mg WHERE mg.mood = %s)")
+        where_params.append(spec["mood"])
+    if spec["language"]:
+        where.append("m.language = %s")
+        where_params.append(spec["language"])
+    if spec["year_from"] is not None:
+        where.append("m.release_year >= %s")
+        where_params.append(spec["year_from"])
+    if spec["year_to"] is not None:
+        where.append("m.release_year <= %s")
+        where_params.append(spec["year_to"])
+    if spec["max_duration"] is not None:
+        where.append("COALESCE(m.duration_minutes, 120) <= %s")
+        where_params.append(spec["max_duration"])
+    if spec["min_rating"] is not None:
+        where.append("s.avg_rating >= %s")
+        where_params.append(spec["min_rating"])
+
+    if after is not None:
+        condition, params = _search_after(key_sql, key_params, id_sql, descending, after)
+        where.append(condition)
+        where_params += params
+
+    direction = "DESC" if descending else "ASC"
+    # The relevance score is computed, not indexed; sort on it by alias.
+    order_sql = "_sort_key" if spec["sort"] == "relevance" else key_sql
+    sql = f"""
+        SELECT {select_list(fields)}, {key_sql} AS _sort_key
+        FROM {from_clause}
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY {order_sql} {direction}, {id_sql} {direction}
+        LIMIT %s
+    """
+    return sql, key_params + where_params + [limit + 1]
@@ -0,0 +1,109 @@
+"""
+Catalog Cache
+Per-worker LRU of pre-serialized catalog responses, keyed by a catalog
+version that every catalog write bumps in MySQL. Workers notice bumps made
+elsewhere by polling the single-row catalog_version table at most once per
+`poll_interval` seconds, and drop everything cached for older versions.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS catalog_version (
+    id TINYINT PRIMARY KEY,
+    version BIGINT NOT NULL
+)
+"""
+
+
+def bump(cursor):
+    """
+    Increment the catalog version inside the caller's write transaction and
+    return the new value. Run it as the last statement before commit so the
+    row lock is held only briefly.
+    """
+    cursor.execute(
+        "UPDATE catalog_version SET version = LAST_INSERT_ID(version + 1) WHERE id = 1"
+    )
+    return cursor.lastrowid
+
+
+class CatalogCache:
+    def __init__(self, max_entries=2048, max_bytes=64 * 1024 * 1024, poll_interval=1.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._version = 0
+        self._checked_at = float("-inf")
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def current_version(self, get_conn):
+        """Known catalog version, re-read from MySQL if the last check is stale."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at < self.poll_interval:
+                return self._version
+        conn = get_conn()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT version FROM catalog_version WHERE id = 1")
+            row = cursor.fetchone()
+        finally:
+            conn.close()
+        self.observe(row[0] if row else 0)
+        return self._version
+
+    def observe(self, version):
+        """Record a version seen in MySQL (or just committed); newer ones flush the cache."""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            if version > self._version:
+                if self._entries:
+                    self._counters["invalidations"] += 1
+                self._entries.clear()
+                self._bytes = 0
+                self._version = version
+
+    def get(self, key):
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return payload
+
+    def put(self, key, payload, version):
+        """Cache `payload` (bytes) if it was built under the current version."""
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            if version != self._version:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = payload
+            self._bytes += len(payload)
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._counters["evictions"] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats.update({
+                "version": self._version,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            })
+            return stats
@@ -0,0 +1,230 @@
+"""
+Database Connection Pool
+Fixed-size, per-worker pool of MySQL connections with checkout health checks,
+max-lifetime recycling and a bounded checkout wait.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import mysql.connector
+
+logger = logging.getLogger("movie-review-backend")
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out within the timeout."""
+
+
+class _Slot:
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+class PooledConnection:
+    """
+    Thin wrapper around a checked-out connection.
+    close() hands the connection back to the pool instead of disconnecting;
+    request-scoped connections ignore close() and are released at teardown.
+    """
+
+    def __init__(self, pool, slot, request_scoped=False):
+        self._pool = pool
+        self._slot = slot
+        self._request_scoped = request_scoped
+
+    def __getattr__(self, name):
+        slot = self.__dict__.get("_slot")
+        if slot is None:
+            raise mysql.connector.InterfaceError("Connection already returned to pool")
+        return getattr(slot.conn, name)
+
+    def close(self):
+        if not self._request_scoped:
+            self.release()
+
+    def detach(self):
+        """
+        Move the connection to a new wrapper that is not request-scoped and
+        must be close()d by its holder (e.g. a streamed response body). This
+        wrapper becomes inert.
+        """
+        slot, self._slot = self._slot, None
+        return PooledConnection(self._pool, slot)
+
+    def release(self):
+        slot, self._slot = self._slot, None
+        if slot is not None:
+            self._pool.release(slot)
+
+
+class ConnectionPool:
+    """
+    Pool of at most `size` live connections for the current process.
+
+    Connections are created lazily, pinged before reuse when they have been
+    idle longer than `ping_after` seconds, and replaced once they are older
+    than `max_lifetime` seconds. Callers wait up to `timeout` seconds for a
+    free connection before PoolTimeout is raised.
+    """
+
+    def __init__(self, db_config, size=5, timeout=2.0, max_lifetime=1800,
+                 ping_after=5.0, connect=mysql.connector.connect):
+        self.db_config = dict(db_config)
+        self.size = size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.ping_after = ping_after
+        self._connect = connect
+        self._cond = threading.Condition()
+        self._reset_state()
+
+    def _reset_state(self):
+        self._pid = os.getpid()
+        self._idle = deque()
+        self._open = 0
+        self._in_use = 0
+        self._counters = {
+            "checkouts": 0,
+            "timeouts": 0,
+            "created": 0,
+            "recycled": 0,
+            "health_check_failures": 0,
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0,
+        }
+
+    def _check_pid(self):
+        # Sockets inherited across fork() belong to the parent; start afresh.
+        if self._pid != os.getpid():
+            self._reset_state()
+
+    def _new_slot(self):
+        # Buffered cursors let several cursors share one connection safely.
+        conn = self._connect(buffered=True, **self.db_config)
+        with self._cond:
+            self._counters["created"] += 1
+        return _Slot(conn)
+
+    def _discard(self, slot):
+        try:
+            slot.conn.close()
+        except Exception:
+            pass
+
+    def _expired(self, slot, now):
+        return self.max_lifetime and now - slot.created_at >= self.max_lifetime
+
+    def _validate(self, slot):
+        """Return a usable slot, replacing `slot` if it is stale or dead."""
+        now = time.monotonic()
+        if self._expired(slot, now):
+            self._discard(slot)
+            with self._cond:
+                self._counters["recycled"] += 1
+            return self._new_slot()
+        if now - slot.last_used >= self.ping_after:
+            try:
+                slot.conn.ping(reconnect=False)
+            except mysql.connector.Error:
+                logger.warning("Discarding pooled DB connection that failed health check")
+                self._discard(slot)
+                with self._cond:
+                    self._counters["health_check_failures"] += 1
+                return self._new_slot()
+        return slot
+
+    def acquire(self):
+        """Check out a slot, waiting up to `timeout` seconds."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        with self._cond:
+            self._check_pid()
+            while True:
+                if self._idle:
+                    slot = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    slot = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._counters["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"No DB connection available within {self.timeout:.1f}s"
+                    )
+                self._cond.wait(remaining)
+            waited_ms = (time.monotonic() - start) * 1000
+            self._counters["checkouts"] += 1
+            self._counters["wait_ms_total"] += waited_ms
+            self._counters["wait_ms_max"] = max(self._counters["wait_ms_max"], waited_ms)
+            self._in_use += 1
+
+        try:
+            return self._new_slot() if slot is None else self._validate(slot)
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, slot):
+        """Return a slot to the pool, rolling back any open transaction."""
+        keep = True
+        try:
+            if slot.conn.in_transaction:
+                slot.conn.rollback()
+        except mysql.connector.Error:
+            keep = False
+        now = time.monotonic()
+        if keep and self._expired(slot, now):
+            keep = False
+        if not keep:
+            self._discard(slot)
+
+        with self._cond:
+            if self._pid != os.getpid():
+                return
+            self._in_use -= 1
+            if keep:
+                slot.last_used = now
+                self._idle.append(slot)
+            else:
+                self._open -= 1
+            self._cond.notify()
+
+    def connection(self, request_scoped=False):
+        return PooledConnection(self, self.acquire(), request_scoped=request_scoped)
+
+    def close_idle(self):
+        """Disconnect every idle connection (e.g. on worker shutdown)."""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._open -= len(idle)
+        for slot in idle:
+            self._discard(slot)
+
+    def stats(self):
+        with self._cond:
+            checkouts = self._counters["checkouts"]
+            stats = dict(self._counters)
+            stats.update({
+                "size": self.size,
+                "open": self._open,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "wait_ms_avg": round(stats["wait_ms_total"] / checkouts, 3) if checkouts else 0.0,
+                "wait_ms_total": round(stats["wait_ms_total"], 3),
+                "wait_ms_max": round(stats["wait_ms_max"], 3),
+            })
+            return stats
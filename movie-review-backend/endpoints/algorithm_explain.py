@@ -1,183 +1,212 @@
 """
 Algorithm Explanation Endpoints
-Provides transparency into why movies are recommended/shown to users
+Provides transparency into why movies are recommended/shown to users.
+Movie-side facts come from the rating aggregates (movie_rating_stats and
+the movie_review_daily buckets) and percentiles from the per-worker
+RatingPercentiles index, so an explanation costs no catalog scans. The
+genres a signed-in user liked come from their cached taste profile.
 """
 
-def explain_recommendation(user_id, movie_id, db_config):
+TRENDING_DAYS = 7
+LIKED_RATING = 4
+LIKED_RECENT = 10
+MAX_MOVIE_IDS = 50  # per batch request
+
+
+def movie_facts(cursor, movie_ids):
+    """
+    {movie_id: row} with title, genre, avg_rating, review_count and
+    recent_reviews (reviews in the last TRENDING_DAYS days, today included)
+    for the movies that exist (dictionary cursor).
+    """
+    if not movie_ids:
+        return {}
+    cursor.execute(
+        f"""
+        SELECT m.movie_id, m.title, m.genre,
+               COALESCE(s.avg_rating, 0) AS avg_rating,
+               COALESCE(s.review_count, 0) AS review_count,
+               (SELECT COALESCE(SUM(d.review_count), 0) FROM movie_review_daily d
+                WHERE d.movie_id = m.movie_id AND d.day > CURDATE() - INTERVAL %s DAY) AS recent_reviews
+        FROM movies m
+        LEFT JOIN movie_rating_stats s ON s.movie_id = m.movie_id
+        WHERE m.movie_id IN ({",".join(["%s"] * len(movie_ids))})
+        """,
+        [TRENDING_DAYS] + list(movie_ids),
+    )
+    return {row["movie_id"]: row for row in cursor.fetchall()}
+
+
+def build_explanation(movie_id, movie, percentile, user_id=None, liked=None):
+    """
+    The explanation of one movie from its facts (see movie_facts), its rating
+    percentile and, for a signed-in user, the genres they liked recently.
+    """
+    avg_rating = movie["avg_rating"]
+    review_count = int(movie["review_count"])
+    explanation = {
+        "movie": {
+            "id": movie_id,
+            "title": movie['title'],
+            "genre": movie['genre'],
+            "rating": float(avg_rating) if avg_rating else 0,
+            "review_count": review_count
+        },
+        "factors": {
+            "personalization": [],
+            "filters": [],
+            "popularity": [],
+            "trending": []
+        },
+        "scores": {
+            "personalization_score": 0,
+            "filter_match_score": 0,
+            "popularity_score": 0,
+            "overall_score": 0
+        }
+    }
+
+    # 1. PERSONALIZATION FACTORS (if user logged in)
+    if user_id and liked:
+        genre_matches = sum(1 for genre in liked if genre == movie['genre'])
+        personalization_score = (genre_matches / len(liked) * 100)
+
+        if genre_matches > 0:
+            explanation["factors"]["personalization"].append({
+                "reason": "Genre Match",
+                "description": f"You rated {genre_matches} {movie['genre']} movies highly",
+                "weight": "40%",
+                "emoji": "🎬"
+            })
+
+        explanation["scores"]["personalization_score"] = round(personalization_score, 1)
+
+    # 2. FILTER MATCHING
+    filter_matches = []
+
+    if avg_rating >= 4.5:
+        filter_matches.append({
+            "filter": "High Rated",
+            "criteria": "Rating ≥ 4.5⭐",
+            "met": True,
+            "value": f"{avg_rating:.1f}⭐",
+            "emoji": "⭐"
+        })
+
+    if avg_rating >= 4.0:
+        filter_matches.append({
+            "filter": "Quality Threshold",
+            "criteria": "Rating ≥ 4.0⭐",
+            "met": True,
+            "value": f"{avg_rating:.1f}⭐",
+            "emoji": "✅"
+        })
+
+    if review_count >= 50:
+        filter_matches.append({
+            "filter": "Community Consensus",
+            "criteria": "≥50 verified reviews",
+            "met": True,
+            "value": f"{review_count} reviews",
+            "emoji": "👥"
+        })
+
+    explanation["factors"]["filters"] = filter_matches
+    filter_score = (len(filter_matches) / 3 * 100) if filter_matches else 0
+    explanation["scores"]["filter_match_score"] = round(filter_score, 1)
+
+    # 3. POPULARITY METRICS
+    explanation["factors"]["popularity"] = [
+        {
+            "metric": "Rating Percentile",
+            "value": f"Top {100 - percentile:.0f}%",
+            "description": f"Higher rated than {percentile:.0f}% of movies",
+            "emoji": "📊"
+        },
+        {
+            "metric": "Review Volume",
+            "value": f"{review_count} reviews",
+            "description": "Indicator of community engagement",
+            "emoji": "💬"
+        },
+        {
+            "metric": "Average Rating",
+            "value": f"{avg_rating:.1f}/5.0",
+            "description": "Community consensus score",
+            "emoji": "⭐"
+        }
+    ]
+
+    popularity_score = (percentile + (min(review_count, 100) / 100 * 50)) / 2
+    explanation["scores"]["popularity_score"] = round(popularity_score, 1)
+
+    # 4. TRENDING INDICATORS
+    recent_reviews = int(movie["recent_reviews"])
+    if recent_reviews > 5:
+        explanation["factors"]["trending"].append({
+            "indicator": "Recent Activity",
+            "value": f"{recent_reviews} reviews in last {TRENDING_DAYS} days",
+            "emoji": "📈"
+        })
+
+    # 5. OVERALL SCORE
+    overall_score = (
+        (explanation["scores"]["personalization_score"] * 0.4) +
+        (explanation["scores"]["filter_match_score"] * 0.3) +
+        (explanation["scores"]["popularity_score"] * 0.3)
+    )
+    explanation["scores"]["overall_score"] = round(overall_score, 1)
+
+    explanation["summary"] = (
+        f"This movie is shown because it scores {overall_score:.0f}/100 based on "
+        f"popularity ({explanation['scores']['popularity_score']:.0f}%), "
+        f"quality filters ({explanation['scores']['filter_match_score']:.0f}%), "
+        f"and " + ("your preferences" if user_id and explanation["scores"]["personalization_score"] > 0 else "recommendations") + "."
+    )
+    return explanation
+
+
+def liked_genres(profiles, conn, user_id):
+    """Genres of the user's LIKED_RECENT latest reviews rated LIKED_RATING or more."""
+    return profiles.get(conn, user_id).recent_genres(LIKED_RATING, LIKED_RECENT)
+
+
+def explain_recommendation(user_id, movie_id, conn, percentiles, profiles):
     """
     Generate comprehensive explanation for why a movie is shown to user
-    Returns: filters, popularity, personalization factors
+    Uses the caller's (pooled) connection; the caller is responsible for closing it.
+    `percentiles` is a fresh RatingPercentiles index and `profiles` the
+    TasteProfiles cache. Returns None for an unknown movie.
     """
-    import mysql.connector
-    import json
-    
-    conn = mysql.connector.connect(**db_config)
     cursor = conn.cursor(dictionary=True)
-    
     try:
-        # 1. Get movie details
-        cursor.execute(
-            "SELECT title, genre, avg_rating, review_count FROM movies WHERE movie_id = %s",
-            (movie_id,)
-        )
-        movie = cursor.fetchone()
-        
+        movie = movie_facts(cursor, [movie_id]).get(movie_id)
         if not movie:
-            conn.close()
             return None
-        
-        explanation = {
-            "movie": {
-                "id": movie_id,
-                "title": movie['title'],
-                "genre": movie['genre'],
-                "rating": float(movie['avg_rating']) if movie['avg_rating'] else 0,
-                "review_count": movie['review_count']
-            },
-            "factors": {
-                "personalization": [],
-                "filters": [],
-                "popularity": [],
-                "trending": []
-            },
-            "scores": {
-                "personalization_score": 0,
-                "filter_match_score": 0,
-                "popularity_score": 0,
-                "overall_score": 0
-            }
-        }
-        
-        # 2. PERSONALIZATION FACTORS
-        if user_id:
-            # Get user's rated movies
-            cursor.execute(
-                """
-                SELECT r.rating, m.genre FROM reviews r
-                JOIN movies m ON r.movie_id = m.movie_id
-                WHERE r.user_id = %s AND r.rating >= 4.0
-                ORDER BY r.review_date DESC LIMIT 10
-                """,
-                (user_id,)
-            )
-            liked_movies = cursor.fetchall()
-            
-            # Check genre match
-            genre_matches = sum(1 for m in liked_movies if m['genre'] == movie['genre'])
-            personalization_score = (genre_matches / len(liked_movies) * 100) if liked_movies else 0
-            
-            if genre_matches > 0:
-                explanation["factors"]["personalization"].append({
-                    "reason": f"Genre Match",
-                    "description": f"You highly rated {genre_matches} {movie['genre']} movies",
-                    "weight": "40%"
-                })
-            
-            # Check similar highly-rated movies
-            cursor.execute(
-                """
-                SELECT COUNT(*) as count FROM reviews r
-                JOIN movies m ON r.movie_id = m.movie_id
-                WHERE r.user_id = %s AND m.genre = %s AND r.rating >= 4.0
-                """,
-                (user_id, movie['genre'])
-            )
-            similar_count = cursor.fetchone()['count']
-            
-            if similar_count > 0:
-                explanation["factors"]["personalization"].append({
-                    "reason": "Similar to Your Favorites",
-                    "description": f"Matches {similar_count} of your highly-rated movies",
-                    "weight": "30%"
-                })
-            
-            explanation["scores"]["personalization_score"] = round(personalization_score, 1)
-        
-        # 3. FILTER MATCHING
-        # Check if movie matches common discovery filters
-        filter_matches = []
-        
-        if movie['avg_rating'] >= 4.5:
-            filter_matches.append({
-                "filter": "High Rated",
-                "criteria": "Rating ≥ 4.5⭐",
-                "met": True,
-                "value": f"{movie['avg_rating']:.1f}⭐"
-            })
-        
-        if movie['review_count'] >= 50:
-            filter_matches.append({
-                "filter": "Popular",
-                "criteria": "≥50 reviews",
-                "met": True,
-                "value": f"{movie['review_count']} reviews"
-            })
-        
-        explanation["factors"]["filters"] = filter_matches
-        filter_score = (len(filter_matches) / 3 * 100) if filter_matches else 0
-        explanation["scores"]["filter_match_score"] = round(filter_score, 1)
-        
-        # 4. POPULARITY METRICS
-        # Get percentile ranking
-        cursor.execute(
-            "SELECT COUNT(*) as total FROM movies WHERE avg_rating <= %s",
-            (movie['avg_rating'],)
-        )
-        total_movies = cursor.fetchone()['total']
-        cursor.execute("SELECT COUNT(*) as count FROM movies")
-        all_movies = cursor.fetchone()['count']
-        
-        percentile = (total_movies / all_movies * 100) if all_movies > 0 else 0
-        
-        explanation["factors"]["popularity"] = [
-            {
-                "metric": "Rating Percentile",
-                "value": f"Top {100 - percentile:.0f}%",
-                "description": f"Higher rated than {percentile:.0f}% of all movies"
-            },
-            {
-                "metric": "Review Volume",
-                "value": f"{movie['review_count']} reviews",
-                "description": "Community engagement indicator"
-            },
-            {
-                "metric": "Average Rating",
-                "value": f"{movie['avg_rating']:.1f}/5.0",
-                "description": "Community consensus score"
-            }
-        ]
-        
-        popularity_score = (percentile + (min(movie['review_count'], 100) / 100 * 50)) / 2
-        explanation["scores"]["popularity_score"] = round(popularity_score, 1)
-        
-        # 5. TRENDING INDICATORS
-        cursor.execute(
-            """
-            SELECT COUNT(*) as recent_reviews FROM reviews
-            WHERE movie_id = %s AND review_date >= DATE_SUB(NOW(), INTERVAL 7 DAY)
-            """,
-            (movie_id,)
-        )
-        recent_reviews = cursor.fetchone()['recent_reviews']
-        
-        if recent_reviews > 5:
-            explanation["factors"]["trending"].append({
-                "indicator": "Recent Activity",
-                "value": f"{recent_reviews} reviews in last 7 days",
-                "emoji": "📈"
-            })
-        
-        # 6. OVERALL SCORE
-        overall_score = (
-            (explanation["scores"]["personalization_score"] * 0.4) +
-            (explanation["scores"]["filter_match_score"] * 0.3) +
-            (explanation["scores"]["popularity_score"] * 0.3)
+    finally:
+        cursor.close()
+    liked = liked_genres(profiles, conn, user_id) if user_id else None
+    return build_explanation(movie_id, movie, percentiles.percentile(movie["avg_rating"]), user_id, liked)
+
+
+def explain_many(user_id, movie_ids, conn, percentiles, profiles):
+    """
+    Explanations for several movies at once: the user's liked genres are read
+    once and the movie facts in one query, then each movie goes through
+    build_explanation, so scores match explain_recommendation. Returns
+    (explanations in request order, ids of unknown movies).
+    """
+    cursor = conn.cursor(dictionary=True)
+    try:
+        facts = movie_facts(cursor, movie_ids)
+    finally:
+        cursor.close()
+    liked = liked_genres(profiles, conn, user_id) if user_id and facts else None
+    explanations = [
+        build_explanation(
+            movie_id, facts[movie_id], percentiles.percentile(facts[movie_id]["avg_rating"]), user_id, liked
         )
-        explanation["scores"]["overall_score"] = round(overall_score, 1)
-        
-        conn.close()
-        return explanation
-        
-    except Exception as e:
-        conn.close()
-        raise e
+        for movie_id in movie_ids
+        if movie_id in facts
+    ]
+    return explanations, [movie_id for movie_id in movie_ids if movie_id not in facts]
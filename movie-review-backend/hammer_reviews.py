@@ -0,0 +1,135 @@
+"""
+Review Write Concurrency Check
+Hammers one movie with concurrent review upserts from many threads through
+the same write path as POST /api/reviews, then checks that movie_rating_stats
+and user_review_stats still match the reviews table exactly.
+
+Run against a disposable database; it creates `hammer-<n>@example.invalid`
+users (removed again with --cleanup):
+
+    python hammer_reviews.py --movie-id 1 --users 40 --threads 16 --writes 4000
+    python hammer_reviews.py --movie-id 1 --users 40 --cleanup
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+
+import mysql.connector
+
+import rating_stats
+import review_writes
+
+EMAIL_PATTERN = "hammer-{}@example.invalid"
+
+
+def hammer_users(conn, count):
+    """Create (if needed) and return the ids of the synthetic reviewers."""
+    cursor = conn.cursor()
+    emails = [EMAIL_PATTERN.format(n) for n in range(count)]
+    cursor.executemany(
+        "INSERT IGNORE INTO users (name, email, password) VALUES (%s, %s, '!')",
+        [(email.split("@")[0], email) for email in emails],
+    )
+    conn.commit()
+    cursor.execute(
+        "SELECT user_id FROM users WHERE email IN ({})".format(",".join(["%s"] * len(emails))),
+        emails,
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def cleanup(conn, movie_id, user_ids):
+    cursor = conn.cursor()
+    placeholders = ",".join(["%s"] * len(user_ids))
+    cursor.execute(f"DELETE FROM reviews WHERE user_id IN ({placeholders})", user_ids)
+    cursor.execute(f"DELETE FROM users WHERE user_id IN ({placeholders})", user_ids)
+    conn.commit()
+    rating_stats.rebuild(conn, [movie_id])
+    rating_stats.rebuild_daily(conn, [movie_id])
+
+
+def worker(pool, movie_id, user_ids, writes, seed, outcome, lock):
+    rng = random.Random(seed)
+    for _ in range(writes):
+        conn = pool.connection()
+        try:
+            old_rating, _, _ = review_writes.write_review(
+                conn, rng.choice(user_ids), movie_id, rng.randint(1, 5), "hammer"
+            )
+            with lock:
+                outcome["updates" if old_rating is not None else "inserts"] += 1
+        except mysql.connector.Error as e:
+            # Deadlocks are retried by clients; they must not corrupt aggregates.
+            with lock:
+                outcome["errors"] += 1
+                outcome["last_error"] = str(e)
+        finally:
+            conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent review upsert consistency check")
+    parser.add_argument("--movie-id", type=int, required=True)
+    parser.add_argument("--users", type=int, default=40)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--writes", type=int, default=4000, help="total upserts across all threads")
+    parser.add_argument("--cleanup", action="store_true", help="remove the synthetic users and their reviews")
+    args = parser.parse_args(argv)
+
+    from app import DB_CONFIG
+    from db_pool import ConnectionPool
+
+    db_pool = ConnectionPool(DB_CONFIG, size=args.threads, timeout=30)
+    conn = db_pool.connection()
+    try:
+        user_ids = hammer_users(conn, args.users)
+        if args.cleanup:
+            cleanup(conn, args.movie_id, user_ids)
+            print(f"Removed {len(user_ids)} hammer users and their reviews")
+            return 0
+    finally:
+        conn.close()
+
+    outcome = {"inserts": 0, "updates": 0, "errors": 0, "last_error": None}
+    lock = threading.Lock()
+    per_thread = max(1, args.writes // args.threads)
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(db_pool, args.movie_id, user_ids, per_thread, seed, outcome, lock),
+        )
+        for seed in range(args.threads)
+    ]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+    total = outcome["inserts"] + outcome["updates"]
+    print(
+        f"{total} writes in {elapsed:.1f}s ({total / elapsed:.0f}/s): "
+        f"{outcome['inserts']} inserts, {outcome['updates']} updates, {outcome['errors']} errors"
+    )
+    if outcome["last_error"]:
+        print(f"last error: {outcome['last_error']}")
+
+    conn = db_pool.connection()
+    try:
+        drifted = [row for row in rating_stats.verify(conn) if row["movie_id"] == args.movie_id]
+        drifted_users = rating_stats.verify_users(conn, user_ids)
+    finally:
+        conn.close()
+    for row in drifted + drifted_users:
+        print(f"DRIFT {row}")
+    if drifted or drifted_users:
+        return 1
+    print("movie_rating_stats and user_review_stats match the reviews table")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
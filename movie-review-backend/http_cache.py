@@ -0,0 +1,41 @@
+"""
+HTTP Conditional Requests
+Strong ETags built from content versions, checked against If-None-Match
+before the expensive query runs.
+"""
+
+import hashlib
+
+from flask import current_app, request
+
+# Cache-Control policies per endpoint family
+CATALOG_CACHE_CONTROL = "public, max-age=30, stale-while-revalidate=60"
+MOVIE_CACHE_CONTROL = "public, no-cache"
+REVIEWS_CACHE_CONTROL = "public, no-cache"
+
+
+def make_etag(*parts, args=None):
+    """
+    Unquoted ETag from version components, plus a digest of the query args
+    when the representation depends on them.
+    """
+    tag = "-".join(str(p) for p in parts)
+    if args:
+        canonical = "&".join(f"{k}={v}" for k, v in sorted(args.items(multi=True)))
+        tag += "-" + hashlib.sha1(canonical.encode()).hexdigest()[:12]
+    return tag
+
+
+def is_fresh(etag):
+    """True when the client's If-None-Match already names `etag`."""
+    return request.if_none_match.contains_weak(etag)
+
+
+def apply(response, etag, cache_control):
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = cache_control
+    return response
+
+
+def not_modified(etag, cache_control):
+    return apply(current_app.response_class(status=304), etag, cache_control)
@@ -0,0 +1,275 @@
+"""
+Bulk Catalog Ingestion
+Loads movies from NDJSON or CSV into the catalog, upserting by the natural
+key (title, release_year) in multi-row INSERT ... ON DUPLICATE KEY UPDATE
+chunks. Each chunk commits on its own so transactions and lock times stay
+bounded; the catalog version is bumped once when the whole load is done.
+
+    python ingest.py partner_catalog.ndjson
+    python ingest.py partner_catalog.csv --format csv --chunk-size 2000
+"""
+
+import argparse
+import csv
+import json
+import sys
+
+import mysql.connector
+
+import catalog_cache
+
+NATURAL_KEY_INDEX = "uq_movies_title_year"
+FIELDS = [
+    "title", "genre", "language", "release_year",
+    "duration_minutes", "poster_url", "description",
+]
+# column -> max length, from schema.sql
+TEXT_LIMITS = {"title": 100, "genre": 50, "language": 30, "poster_url": 255, "description": 65535}
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+UPSERT_SQL = """
+    INSERT INTO movies (title, genre, language, release_year, duration_minutes, poster_url, description)
+    VALUES {values}
+    ON DUPLICATE KEY UPDATE
+        genre = VALUES(genre),
+        language = VALUES(language),
+        duration_minutes = VALUES(duration_minutes),
+        poster_url = VALUES(poster_url),
+        description = VALUES(description)
+"""
+
+
+class IngestError(Exception):
+    """The load cannot start (bad format, missing natural key index)."""
+
+
+def ensure_natural_key(cursor):
+    """
+    Add the unique (title, release_year) index upserts rely on. Fails with
+    a duplicate-key error while the catalog still holds duplicates.
+    """
+    cursor.execute(
+        """
+        SELECT COUNT(*) FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = 'movies' AND index_name = %s
+        """,
+        (NATURAL_KEY_INDEX,),
+    )
+    if not cursor.fetchone()[0]:
+        cursor.execute(
+            f"CREATE UNIQUE INDEX {NATURAL_KEY_INDEX} ON movies(title, release_year)"
+        )
+
+
+def parse_ndjson(lines):
+    """Yield (line_no, record_or_error) for each non-blank NDJSON line."""
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, ValueError(f"invalid JSON: {e}")
+            continue
+        if not isinstance(record, dict):
+            yield line_no, ValueError("expected a JSON object")
+            continue
+        yield line_no, record
+
+
+def parse_csv(lines):
+    """Yield (line_no, record) for each CSV row; the first row holds the column names."""
+    reader = csv.DictReader(lines)
+    for record in reader:
+        yield reader.line_num, record
+
+
+PARSERS = {"ndjson": parse_ndjson, "csv": parse_csv}
+
+
+def _optional_int(record, name, low, high):
+    value = record.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        number = int(str(value).strip())
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+    if not low <= number <= high:
+        raise ValueError(f"{name} must be between {low} and {high}")
+    return number
+
+
+def validate(record):
+    """Return the row's column values in FIELDS order, or raise ValueError."""
+    values = {}
+    for name, limit in TEXT_LIMITS.items():
+        value = record.get(name)
+        value = str(value).strip() if value not in (None, "") else None
+        if value is not None and len(value) > limit:
+            raise ValueError(f"{name} longer than {limit} characters")
+        values[name] = value
+    if not values["title"]:
+        raise ValueError("title required")
+    # YEAR column range; the year is part of the natural key, so it is required
+    values["release_year"] = _optional_int(record, "release_year", 1901, 2155)
+    if values["release_year"] is None:
+        raise ValueError("release_year required")
+    values["duration_minutes"] = _optional_int(record, "duration_minutes", 1, 1000)
+    return tuple(values[name] for name in FIELDS)
+
+
+class Report:
+    def __init__(self):
+        self.processed = 0
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.error_count = 0
+        self.errors = []
+        self.catalog_version = None
+
+    def error(self, line_no, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_no, "error": message})
+
+    def as_dict(self):
+        return {
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "error_count": self.error_count,
+            "errors": self.errors,
+            "catalog_version": self.catalog_version,
+        }
+
+
+def _upsert(cursor, rows):
+    """
+    Upsert `rows` and create rating stats rows for the new movies.
+    Returns (inserted, updated).
+    """
+    placeholders = ",".join(["(%s,%s,%s,%s,%s,%s,%s)"] * len(rows))
+    cursor.execute(UPSERT_SQL.format(values=placeholders), [v for row in rows for v in row])
+    # Affected rows: 1 per inserted movie, 2 per changed one, 0 per unchanged one.
+    affected = cursor.rowcount
+    # New movies are the chunk's keys without a stats row yet. Matching by natural
+    # key instead of an id range neither assumes consecutive auto-increment ids nor
+    # picks up (and gap-locks) movies inserted concurrently by other requests.
+    title, year = FIELDS.index("title"), FIELDS.index("release_year")
+    keys = list(dict.fromkeys((row[title], row[year]) for row in rows))
+    cursor.execute(
+        f"""
+        INSERT IGNORE INTO movie_rating_stats (movie_id)
+        SELECT m.movie_id FROM movies m
+        WHERE (m.title, m.release_year) IN ({",".join(["(%s,%s)"] * len(keys))})
+        """,
+        [v for key in keys for v in key],
+    )
+    inserted = cursor.rowcount
+    return inserted, max(0, (affected - inserted) // 2)
+
+
+def _flush(conn, chunk, report):
+    """Write one chunk in its own transaction, isolating bad rows on failure."""
+    cursor = conn.cursor()
+    failed = 0
+    try:
+        inserted, updated = _upsert(cursor, [row for _, row in chunk])
+        conn.commit()
+    except mysql.connector.Error:
+        conn.rollback()
+        # Retry row by row so one bad row does not sink the whole chunk.
+        inserted = updated = 0
+        for line_no, row in chunk:
+            try:
+                row_inserted, row_updated = _upsert(cursor, [row])
+                conn.commit()
+            except mysql.connector.Error as e:
+                conn.rollback()
+                report.error(line_no, e.msg)
+                failed += 1
+                continue
+            inserted += row_inserted
+            updated += row_updated
+    report.inserted += inserted
+    report.updated += updated
+    report.unchanged += len(chunk) - failed - inserted - updated
+    cursor.close()
+
+
+def ingest(conn, lines, fmt="ndjson", chunk_size=CHUNK_SIZE):
+    """Load movies from an iterable of text lines; returns a Report."""
+    if fmt not in PARSERS:
+        raise IngestError(f"format must be one of {', '.join(PARSERS)}")
+    cursor = conn.cursor()
+    try:
+        ensure_natural_key(cursor)
+    except mysql.connector.IntegrityError:
+        raise IngestError(
+            "movies contains duplicate (title, release_year) pairs; "
+            "deduplicate them before bulk ingestion"
+        )
+
+    report = Report()
+    chunk = []
+    try:
+        for line_no, record in PARSERS[fmt](lines):
+            report.processed += 1
+            if isinstance(record, Exception):
+                report.error(line_no, str(record))
+                continue
+            try:
+                chunk.append((line_no, validate(record)))
+            except ValueError as e:
+                report.error(line_no, str(e))
+                continue
+            if len(chunk) >= chunk_size:
+                _flush(conn, chunk, report)
+                chunk = []
+        if chunk:
+            _flush(conn, chunk, report)
+    finally:
+        # One bump for the whole load, even if it stopped part way.
+        if report.inserted or report.updated:
+            report.catalog_version = catalog_cache.bump(cursor)
+            conn.commit()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-load movies from NDJSON or CSV")
+    parser.add_argument("path", help="input file, or - for stdin")
+    parser.add_argument("--format", choices=list(PARSERS), default=None,
+                        help="defaults to csv for .csv files, ndjson otherwise")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+    fmt = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+
+    from app import get_db
+
+    conn = get_db()
+    stream = sys.stdin if args.path == "-" else open(args.path, newline="", encoding="utf-8")
+    try:
+        report = ingest(conn, stream, fmt, args.chunk_size)
+    except IngestError as e:
+        print(e, file=sys.stderr)
+        return 2
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        conn.close()
+    for error in report.errors:
+        print(f"line {error['line']}: {error['error']}", file=sys.stderr)
+    print(
+        f"{report.processed} rows: {report.inserted} inserted, {report.updated} updated, "
+        f"{report.unchanged} unchanged, {report.error_count} rejected"
+    )
+    return 1 if report.error_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+"""
+Item-Item Collaborative Filtering
+Builds a top-K neighbour index over movies from reviews(user_id, movie_id,
+rating): ratings are centred on each user's mean, items are compared by
+cosine similarity of those centred rating columns, and each movie keeps its
+K most similar movies (positive similarity only) in two (items x K) arrays.
+A user is scored with one sparse product of their centred ratings against
+the neighbour matrix, so serving cost follows the user's review count and
+K, not the catalog size.
+
+The index is built offline and loaded by each worker from ITEM_CF_INDEX:
+
+    python item_cf.py build                      # K=50
+    python item_cf.py build --k 100 --out /srv/models/item_cf.npz
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+import recommendations
+
+ALGORITHM = "item-cf"
+DEFAULT_K = 50
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_data", "item_cf.npz")
+# Cells of the similarity block materialised at once while building
+BLOCK_CELLS = 4_000_000
+FETCH_BATCH = 50_000
+
+
+def load_ratings(conn):
+    """(user_ids, movie_ids, ratings) arrays of every review, fetched in batches."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT user_id, movie_id, rating FROM reviews WHERE rating IS NOT NULL")
+    chunks = []
+    while True:
+        rows = cursor.fetchmany(FETCH_BATCH)
+        if not rows:
+            break
+        chunks.append(np.asarray(rows, dtype=np.int64).reshape(-1, 3))
+    cursor.close()
+    data = np.concatenate(chunks) if chunks else np.empty((0, 3), dtype=np.int64)
+    return data[:, 0], data[:, 1], data[:, 2].astype(np.float32)
+
+
+class ItemIndex:
+    """
+    movie_ids[i] is the movie of item row i (sorted, for searchsorted
+    lookups); neighbors[i] / weights[i] hold its top-K item rows and
+    similarities, padded with -1 / 0.
+    """
+
+    def __init__(self, movie_ids, neighbors, weights, global_mean, built_at):
+        self.movie_ids = movie_ids
+        self.neighbors = neighbors
+        self.weights = weights
+        self.global_mean = float(global_mean)
+        self.built_at = float(built_at)
+        valid = neighbors >= 0
+        rows = np.repeat(np.arange(len(movie_ids), dtype=np.int32), valid.sum(axis=1))
+        self._matrix = sp.csr_matrix(
+            (weights[valid], (rows, neighbors[valid])), shape=(len(movie_ids), len(movie_ids))
+        )
+
+    @property
+    def k(self):
+        return self.neighbors.shape[1]
+
+    def rows_of(self, movie_ids):
+        """Item rows for movie ids, and a mask of the ids the index knows."""
+        movie_ids = np.asarray(movie_ids, dtype=self.movie_ids.dtype)
+        rows = np.searchsorted(self.movie_ids, movie_ids)
+        rows = np.minimum(rows, len(self.movie_ids) - 1)
+        known = (self.movie_ids[rows] == movie_ids) if len(self.movie_ids) else np.zeros(len(movie_ids), bool)
+        return rows, known
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp.npz"
+        np.savez(
+            tmp, movie_ids=self.movie_ids, neighbors=self.neighbors, weights=self.weights,
+            global_mean=self.global_mean, built_at=self.built_at,
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(
+                data["movie_ids"], data["neighbors"], data["weights"],
+                data["global_mean"], data["built_at"],
+            )
+
+
+def _top_k_rows(block, k, offset):
+    """
+    Per-row top-k (column, value) of a CSR similarity block whose row r is
+    item offset + r. Only positive values are kept, never the item itself.
+    """
+    n_rows = block.shape[0]
+    row_of = np.repeat(np.arange(n_rows), np.diff(block.indptr))
+    block.data[(block.data <= 0) | (block.indices == row_of + offset)] = 0
+    block.eliminate_zeros()
+    neighbors = np.full((n_rows, k), -1, dtype=np.int32)
+    weights = np.zeros((n_rows, k), dtype=np.float32)
+    if not block.nnz:
+        return neighbors, weights
+    row_of = np.repeat(np.arange(n_rows), np.diff(block.indptr))
+    # Sort each row's entries by descending similarity, then keep the first k.
+    order = np.lexsort((-block.data, row_of))
+    row_sorted = row_of[order]
+    rank = np.arange(len(order)) - block.indptr[row_sorted]
+    keep = rank < k
+    neighbors[row_sorted[keep], rank[keep]] = block.indices[order][keep]
+    weights[row_sorted[keep], rank[keep]] = block.data[order][keep]
+    return neighbors, weights
+
+
+def centred_columns(user_ids, movie_ids, ratings):
+    """
+    (sorted movie ids, items x users CSR, users x items CSR) of ratings
+    centred on each user's mean, with every item row scaled to unit length:
+    the product of the two matrices is the item-item cosine similarity.
+    """
+    items, item_rows = np.unique(movie_ids, return_inverse=True)
+    _, user_rows = np.unique(user_ids, return_inverse=True)
+    n_users, n_items = int(user_rows.max(initial=-1)) + 1, len(items)
+    ratings = np.asarray(ratings, dtype=np.float32)
+
+    # Centre each rating on its user's mean.
+    user_sum = np.bincount(user_rows, weights=ratings, minlength=n_users)
+    user_count = np.bincount(user_rows, minlength=n_users)
+    centred = ratings - (user_sum / np.maximum(user_count, 1))[user_rows].astype(np.float32)
+
+    # Unit-normalise item rows; cosine similarity is then a plain dot product.
+    norms = np.sqrt(np.bincount(item_rows, weights=centred * centred, minlength=n_items))
+    scale = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0).astype(np.float32)
+    by_item = sp.csr_matrix(
+        (centred * scale[item_rows], (item_rows, user_rows)), shape=(n_items, n_users)
+    )
+    return items, by_item, by_item.T.tocsr()
+
+
+def build(user_ids, movie_ids, ratings, k=DEFAULT_K):
+    """Build an ItemIndex from parallel rating arrays."""
+    ratings = np.asarray(ratings, dtype=np.float32)
+    global_mean = float(ratings.mean()) if len(ratings) else 0.0
+    items, by_item, by_user = centred_columns(user_ids, movie_ids, ratings)
+    n_items = len(items)
+
+    neighbors = np.full((n_items, k), -1, dtype=np.int32)
+    weights = np.zeros((n_items, k), dtype=np.float32)
+    step = max(1, BLOCK_CELLS // max(n_items, 1))
+    for start in range(0, n_items, step):
+        stop = min(n_items, start + step)
+        block = (by_item[start:stop] @ by_user).tocsr()
+        neighbors[start:stop], weights[start:stop] = _top_k_rows(block, k, start)
+    return ItemIndex(items, neighbors, weights, global_mean, time.time())
+
+
+def score(index, rated_movie_ids, rated_ratings, limit):
+    """
+    Top `limit` unrated movies for one user as (movie_ids, scores, the rated
+    movie contributing most to each), best first. Empty when none of the
+    user's movies has neighbours.
+    """
+    rows, known = index.rows_of(rated_movie_ids)
+    rows = rows[known]
+    ratings = np.asarray(rated_ratings, dtype=np.float32)[known]
+    empty = np.empty(0, dtype=np.int64)
+    if not len(rows):
+        return empty, np.empty(0, dtype=np.float32), empty
+    centred = ratings - ratings.mean()
+    if not centred.any():
+        # Every rating equal: centre on the catalog-wide mean instead.
+        centred = ratings - index.global_mean
+    contributions = index._matrix[rows]
+    scores = np.asarray(contributions.T @ centred).ravel()
+    scores[rows] = 0
+    candidates = np.flatnonzero(scores > 0)
+    if not len(candidates):
+        return empty, np.empty(0, dtype=np.float32), empty
+    if len(candidates) > limit:
+        candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+    candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+    # Which of the user's movies pushed each pick highest (for the explanation).
+    weighted = contributions[:, candidates].multiply(centred[:, None]).toarray()
+    top_source = rows[weighted.argmax(axis=0)]
+    return index.movie_ids[candidates], scores[candidates], index.movie_ids[top_source]
+
+
+class IndexStore:
+    """Per-worker handle on an index file, reloaded when the file changes."""
+
+    def __init__(self, path=DEFAULT_PATH, check_interval=30.0, loader=None):
+        self.path = path
+        self.check_interval = check_interval
+        self.loader = loader or ItemIndex.load
+        self._lock = threading.Lock()
+        self._index = None
+        self._mtime = None
+        self._checked_at = float("-inf")
+
+    def get(self):
+        """The current ItemIndex, or None if no index has been built."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return self._index
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except FileNotFoundError:
+                self._index, self._mtime = None, None
+                return None
+            if mtime != self._mtime:
+                self._index, self._mtime = self.loader(self.path), mtime
+            return self._index
+
+    def replace(self, index, mtime=None):
+        """
+        Serve `index`, just saved to the file by this worker. Pass the mtime
+        read while the save still held the file's lock; a later stat could
+        see another worker's newer file and never load it.
+        """
+        with self._lock:
+            self._index = index
+            self._mtime = os.stat(self.path).st_mtime if mtime is None else mtime
+            self._checked_at = time.monotonic()
+
+
+def recommend(cursor, index, user_id, limit, given=None):
+    """
+    Item-CF recommendations in the /api/recommendations response shape
+    (dictionary cursor), or None when the user has no rated movie with
+    neighbours in the index.
+    `given` ({movie_id: rating}, e.g. from a taste profile) saves reading
+    the user's ratings.
+    """
+    if given is None:
+        given = recommendations.user_ratings(cursor, user_id)
+    movie_ids, scores, sources = score(index, list(given), list(given.values()), limit)
+    if not len(movie_ids):
+        return None
+    wanted = [int(m) for m in movie_ids]
+    movies = recommendations.fetch_movies(cursor, wanted + [int(m) for m in sources])
+    picks = []
+    for movie_id, value, source in zip(wanted, scores, sources):
+        movie = movies.get(movie_id)
+        if movie is None:  # deleted since the index was built
+            continue
+        movie = dict(movie)
+        liked = movies.get(int(source))
+        movie["cf_score"] = round(float(value), 4)
+        movie["explanation_type"] = "similar_to_liked"
+        movie["recommendation_reason"] = (
+            f"Because you rated '{liked['title']}' {given[int(source)]}⭐" if liked else "Liked by people with your taste"
+        )
+        picks.append(movie)
+    return {
+        "recommendations": picks,
+        "preferred_genres": [],
+        "algorithm": ALGORITHM,
+        "user_watch_count": len(given),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the item-item CF neighbour index")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--k", type=int, default=DEFAULT_K, help="neighbours kept per movie")
+    parser.add_argument("--out", default=os.getenv("ITEM_CF_INDEX", DEFAULT_PATH))
+    args = parser.parse_args(argv)
+
+    from app import get_db
+
+    conn = get_db()
+    try:
+        started = time.monotonic()
+        user_ids, movie_ids, ratings = load_ratings(conn)
+    finally:
+        conn.close()
+    loaded = time.monotonic()
+    index = build(user_ids, movie_ids, ratings, args.k)
+    index.save(args.out)
+    print(
+        f"{len(ratings)} ratings, {len(index.movie_ids)} movies: loaded in {loaded - started:.1f}s, "
+        f"built in {time.monotonic() - loaded:.1f}s -> {args.out}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Fast JSON Provider
+Flask JSON provider backed by orjson when it is installed, falling back to
+the stdlib encoder. Row types from mysql-connector (Decimal, datetime/date,
+bytes) are encoded directly, and JSON columns such as decision_traces.trace_path
+can be embedded verbatim by wrapping them in RawJSON.
+"""
+
+import datetime
+import decimal
+import json
+import uuid
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib encoder is always available
+    orjson = None
+
+
+class RawJSON:
+    """Already-encoded JSON text (str or bytes) to embed without re-parsing."""
+
+    __slots__ = ("encoded",)
+
+    def __init__(self, encoded):
+        self.encoded = encoded
+
+
+def _default(obj):
+    # AVG()/SUM() and DECIMAL columns: emit numbers, not strings
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    # ISO 8601, naive datetimes as UTC (matches orjson's OPT_NAIVE_UTC)
+    if isinstance(obj, datetime.datetime):
+        if obj.tzinfo is None:
+            obj = obj.replace(tzinfo=datetime.timezone.utc)
+        return obj.isoformat()
+    if isinstance(obj, datetime.date):
+        return obj.isoformat()
+    if isinstance(obj, (bytes, bytearray)):
+        return obj.decode("utf-8", "replace")
+    if isinstance(obj, RawJSON):
+        return json.loads(obj.encoded)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if hasattr(obj, "__html__"):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    # orjson.Fragment (3.9+) splices pre-encoded JSON into the output as-is.
+    _Fragment = getattr(orjson, "Fragment", None)
+    _ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+
+    def _orjson_default(obj):
+        if _Fragment is not None and isinstance(obj, RawJSON):
+            return _Fragment(obj.encoded)
+        return _default(obj)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Compact, unsorted, UTF-8 JSON. Calls with extra json.dumps options (e.g.
+    indent in debug mode) go through the stdlib encoder.
+    """
+
+    default = staticmethod(_default)
+    ensure_ascii = False
+    sort_keys = False
+
+    def dumps_bytes(self, obj, **kwargs):
+        """Serialize to UTF-8 bytes, skipping the str round trip with orjson."""
+        if orjson is not None and not kwargs.keys() - {"separators"}:
+            return orjson.dumps(obj, default=_orjson_default, option=_ORJSON_OPTIONS)
+        return self.dumps(obj, **kwargs).encode()
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs.keys() - {"separators"}:
+            return orjson.dumps(obj, default=_orjson_default, option=_ORJSON_OPTIONS).decode()
+        if "indent" not in kwargs:
+            kwargs.setdefault("separators", (",", ":"))
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
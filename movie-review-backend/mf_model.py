@@ -0,0 +1,355 @@
+"""
+Matrix-Factorization Recommender
+Latent-factor model trained offline with alternating least squares on
+reviews(user_id, movie_id, rating): rating ~ global mean + user . item.
+Each half-step solves every user's (or item's) regularised least-squares
+system at once with a few conjugate-gradient iterations, which also makes
+retraining warm-startable from the previous factors.
+
+A trained model is a directory of .npy files (user/item factors and the
+sorted user/movie ids that map ids to rows) plus meta.json, under
+MF_MODEL_DIR/<version>/. MF_MODEL_DIR/CURRENT names the version served.
+Workers open the arrays with mmap_mode="r", so every gunicorn worker reads
+the same page-cached copy.
+
+    python mf_model.py train                   # warm start from CURRENT if present
+    python mf_model.py train --cold --factors 64 --iterations 15
+"""
+
+import argparse
+import datetime
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import uuid
+
+import numpy as np
+import scipy.sparse as sp
+
+import item_cf
+import recommendations
+
+ALGORITHM = "als"
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_data", "mf")
+DEFAULT_FACTORS = 32
+DEFAULT_ITERATIONS = 10
+DEFAULT_REG = 0.1
+CG_STEPS = 3
+KEEP_VERSIONS = 3
+ARRAYS = ("user_factors", "item_factors", "user_ids", "movie_ids")
+
+
+class Model:
+    def __init__(self, version, meta, user_factors, item_factors, user_ids, movie_ids):
+        self.version = version
+        self.meta = meta
+        self.global_mean = float(meta["global_mean"])
+        self.reg = float(meta["reg"])
+        self.user_factors = user_factors
+        self.item_factors = item_factors
+        self.user_ids = user_ids
+        self.movie_ids = movie_ids
+
+    def save(self, model_dir):
+        """Write the model as a new version directory and make it CURRENT."""
+        target = os.path.join(model_dir, self.version)
+        staging = f"{target}.tmp"
+        os.makedirs(staging, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(staging, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(staging, "meta.json"), "w") as f:
+            json.dump(self.meta, f, indent=2)
+        os.replace(staging, target)
+        pointer = os.path.join(model_dir, "CURRENT.tmp")
+        with open(pointer, "w") as f:
+            f.write(self.version)
+        os.replace(pointer, os.path.join(model_dir, "CURRENT"))
+
+    @classmethod
+    def load(cls, model_dir, version=None, mmap_mode="r"):
+        version = version or current_version(model_dir)
+        if version is None:
+            return None
+        path = os.path.join(model_dir, version)
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode) for name in ARRAYS
+        }
+        return cls(version, meta, **arrays)
+
+
+def current_version(model_dir):
+    try:
+        with open(os.path.join(model_dir, "CURRENT")) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def new_version():
+    """
+    A version name that sorts by training time (prune relies on it) and is
+    unique even for trains finishing in the same second.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return f"{now:%Y%m%dT%H%M%S.%fZ}-{uuid.uuid4().hex[:8]}"
+
+
+def prune(model_dir, keep=KEEP_VERSIONS):
+    """Delete all but the newest `keep` versions (never CURRENT)."""
+    current = current_version(model_dir)
+    versions = sorted(
+        name for name in os.listdir(model_dir)
+        if os.path.isdir(os.path.join(model_dir, name)) and not name.endswith(".tmp")
+    )
+    for name in versions[:-keep] if keep else versions:
+        if name != current:
+            shutil.rmtree(os.path.join(model_dir, name), ignore_errors=True)
+
+
+def _lookup(sorted_ids, ids):
+    """Rows of `ids` in `sorted_ids` and a mask of the ids present."""
+    ids = np.asarray(ids, dtype=np.int64)
+    if not len(sorted_ids):
+        return np.zeros(len(ids), dtype=np.int64), np.zeros(len(ids), dtype=bool)
+    rows = np.minimum(np.searchsorted(sorted_ids, ids), len(sorted_ids) - 1)
+    return rows, np.asarray(sorted_ids)[rows] == ids
+
+
+def _solve(matrix, fixed, current, reg, steps=CG_STEPS):
+    """
+    Refine `current` (rows x k) towards the ridge solutions
+    (F_r' F_r + reg * n_r I) x_r = F_r' y_r for every row r of the sparse
+    residual matrix at once, where F_r are the `fixed` factors of the row's
+    rated columns. Batched conjugate gradient: every row runs its own CG,
+    sharing the sparse products.
+    """
+    counts = np.diff(matrix.indptr).astype(np.float32)[:, None]
+    rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+    cols = matrix.indices
+    fixed_at_cols = fixed[cols]
+
+    def apply(p):
+        y = np.einsum("ij,ij->i", fixed_at_cols, p[rows])
+        return sp.csr_matrix((y, cols, matrix.indptr), shape=matrix.shape) @ fixed + reg * counts * p
+
+    x = current.copy()
+    r = matrix @ fixed - apply(x)
+    p = r.copy()
+    rs = np.einsum("ij,ij->i", r, r)
+    for _ in range(steps):
+        ap = apply(p)
+        denom = np.einsum("ij,ij->i", p, ap)
+        alpha = np.divide(rs, denom, out=np.zeros_like(rs), where=denom > 1e-12)
+        x += alpha[:, None] * p
+        r -= alpha[:, None] * ap
+        rs_next = np.einsum("ij,ij->i", r, r)
+        beta = np.divide(rs_next, rs, out=np.zeros_like(rs), where=rs > 1e-12)
+        p = r + beta[:, None] * p
+        rs = rs_next
+    return x
+
+
+def _initial(ids, previous_ids, previous_factors, factors, rng):
+    """Small random factors, overwritten by the previous model's rows where the id is known."""
+    init = rng.normal(0, 0.1, size=(len(ids), factors)).astype(np.float32)
+    if previous_factors is not None and previous_factors.shape[1] == factors:
+        rows, known = _lookup(previous_ids, ids)
+        init[known] = previous_factors[rows[known]]
+    return init
+
+
+def train(user_ids, movie_ids, ratings, factors=DEFAULT_FACTORS, iterations=DEFAULT_ITERATIONS,
+          reg=DEFAULT_REG, previous=None, seed=0, log=None):
+    """
+    Fit a Model. With `previous`, users and movies it knows start from its
+    factors, so a few iterations are enough after a day's new reviews.
+    """
+    started = time.monotonic()
+    users, user_rows = np.unique(user_ids, return_inverse=True)
+    movies, item_rows = np.unique(movie_ids, return_inverse=True)
+    ratings = np.asarray(ratings, dtype=np.float32)
+    global_mean = float(ratings.mean()) if len(ratings) else 0.0
+    by_user = sp.csr_matrix(
+        (ratings - global_mean, (user_rows, item_rows)), shape=(len(users), len(movies))
+    )
+    by_item = by_user.T.tocsr()
+
+    rng = np.random.default_rng(seed)
+    warm = previous is not None and previous.item_factors.shape[1] == factors
+    user_factors = _initial(users, previous.user_ids if warm else None,
+                            previous.user_factors if warm else None, factors, rng)
+    item_factors = _initial(movies, previous.movie_ids if warm else None,
+                            previous.item_factors if warm else None, factors, rng)
+    for iteration in range(iterations):
+        user_factors = _solve(by_user, item_factors, user_factors, reg)
+        item_factors = _solve(by_item, user_factors, item_factors, reg)
+        if log:
+            log(f"iteration {iteration + 1}: train rmse {_rmse(by_user, user_factors, item_factors):.4f}")
+
+    version = new_version()
+    meta = {
+        "version": version,
+        "factors": factors,
+        "iterations": iterations,
+        "reg": reg,
+        "global_mean": global_mean,
+        "ratings": int(len(ratings)),
+        "users": int(len(users)),
+        "movies": int(len(movies)),
+        "warm_start_from": previous.version if warm else None,
+        "train_rmse": _rmse(by_user, user_factors, item_factors),
+        "train_seconds": round(time.monotonic() - started, 2),
+    }
+    return Model(version, meta, user_factors, item_factors, users, movies)
+
+
+def _rmse(residuals, user_factors, item_factors):
+    if not residuals.nnz:
+        return 0.0
+    rows = np.repeat(np.arange(residuals.shape[0]), np.diff(residuals.indptr))
+    predicted = np.einsum("ij,ij->i", user_factors[rows], item_factors[residuals.indices])
+    return float(np.sqrt(np.mean((residuals.data - predicted) ** 2)))
+
+
+def user_vector(model, user_id, rated_movie_ids, rated_ratings):
+    """
+    The user's factor row, or for users trained after the model was built,
+    a fold-in solve against the item factors of their current ratings.
+    None when none of their movies is in the model.
+    """
+    row, known = _lookup(model.user_ids, [user_id])
+    if known[0]:
+        return np.asarray(model.user_factors[row[0]])
+    rows, known = _lookup(model.movie_ids, rated_movie_ids)
+    if not known.any():
+        return None
+    fixed = np.asarray(model.item_factors[rows[known]])
+    target = np.asarray(rated_ratings, dtype=np.float32)[known] - model.global_mean
+    gram = fixed.T @ fixed + model.reg * len(target) * np.eye(fixed.shape[1], dtype=np.float32)
+    return np.linalg.solve(gram, fixed.T @ target)
+
+
+def top_k(model, vector, exclude_movie_ids, limit):
+    """(movie_ids, predicted ratings) of the best `limit` movies not excluded."""
+    scores = np.asarray(model.item_factors @ vector) + model.global_mean
+    rows, known = _lookup(model.movie_ids, list(exclude_movie_ids))
+    scores[rows[known]] = -np.inf
+    limit = min(limit, int(np.isfinite(scores).sum()))
+    if limit <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    best = np.argpartition(-scores, limit - 1)[:limit]
+    best = best[np.argsort(-scores[best], kind="stable")]
+    return np.asarray(model.movie_ids[best]), scores[best]
+
+
+class ModelStore:
+    """Per-worker handle on MF_MODEL_DIR/CURRENT, reopened when it changes."""
+
+    def __init__(self, model_dir=DEFAULT_DIR, check_interval=30.0):
+        self.model_dir = model_dir
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._model = None
+        self._checked_at = float("-inf")
+
+    def get(self):
+        """The served Model, or None if none has been trained."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return self._model
+            self._checked_at = now
+            version = current_version(self.model_dir)
+            if version is None:
+                self._model = None
+            elif self._model is None or self._model.version != version:
+                self._model = Model.load(self.model_dir, version)
+            return self._model
+
+
+def recommend(cursor, model, user_id, limit, given=None):
+    """
+    ALS recommendations in the /api/recommendations response shape
+    (dictionary cursor), or None when the model knows neither the user nor
+    any movie they rated.
+    `given` ({movie_id: rating}, e.g. from a taste profile) saves reading
+    the user's ratings.
+    """
+    if given is None:
+        given = recommendations.user_ratings(cursor, user_id)
+    vector = user_vector(model, user_id, list(given), list(given.values()))
+    if vector is None:
+        return None
+    movie_ids, predicted = top_k(model, vector, given, limit)
+    if not len(movie_ids):
+        return None
+    # Explain each pick by the liked movie whose factors point the same way.
+    liked = [movie_id for movie_id, rating in given.items() if rating >= 4]
+    liked_rows, known = _lookup(model.movie_ids, liked)
+    liked = np.asarray(liked, dtype=np.int64)[known]
+    sources = []
+    if len(liked):
+        pick_rows, _ = _lookup(model.movie_ids, movie_ids)
+        affinity = np.asarray(model.item_factors[pick_rows]) @ np.asarray(model.item_factors[liked_rows[known]]).T
+        sources = [int(liked[i]) for i in affinity.argmax(axis=1)]
+    movies = recommendations.fetch_movies(cursor, [int(m) for m in movie_ids] + sources)
+    picks = []
+    for position, (movie_id, value) in enumerate(zip(movie_ids, predicted)):
+        movie = movies.get(int(movie_id))
+        if movie is None:  # deleted since the model was trained
+            continue
+        movie = dict(movie)
+        movie["predicted_rating"] = round(float(min(5.0, max(1.0, value))), 2)
+        source = movies.get(sources[position]) if sources else None
+        if source:
+            movie["explanation_type"] = "similar_to_liked"
+            movie["recommendation_reason"] = f"People who liked '{source['title']}' rate this highly"
+        else:
+            movie["explanation_type"] = "taste_profile"
+            movie["recommendation_reason"] = "Matches your rating history"
+        picks.append(movie)
+    return {
+        "recommendations": picks,
+        "preferred_genres": [],
+        "algorithm": ALGORITHM,
+        "model_version": model.version,
+        "user_watch_count": len(given),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the matrix-factorization recommender")
+    parser.add_argument("command", choices=["train"])
+    parser.add_argument("--factors", type=int, default=DEFAULT_FACTORS)
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--reg", type=float, default=DEFAULT_REG)
+    parser.add_argument("--cold", action="store_true", help="ignore the current model's factors")
+    parser.add_argument("--keep", type=int, default=KEEP_VERSIONS, help="model versions kept on disk")
+    parser.add_argument("--model-dir", default=os.getenv("MF_MODEL_DIR", DEFAULT_DIR))
+    args = parser.parse_args(argv)
+
+    from app import get_db
+
+    previous = None if args.cold else Model.load(args.model_dir)
+    conn = get_db()
+    try:
+        user_ids, movie_ids, ratings = item_cf.load_ratings(conn)
+    finally:
+        conn.close()
+    model = train(
+        user_ids, movie_ids, ratings, args.factors, args.iterations, args.reg,
+        previous=previous, log=print,
+    )
+    model.save(args.model_dir)
+    prune(args.model_dir, args.keep)
+    print(f"Model {model.version}: {json.dumps(model.meta)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
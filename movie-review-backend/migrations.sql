@@ -29,49 +29,135 @@ ALTER TABLE reviews ADD KEY idx_reviews_movie_date (movie_id, review_date DESC);
 ALTER TABLE reviews ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP;
 
 -- ============================================================================
--- TRIGGER: Auto-Update Movie Average Rating (Optional - Performance Optimization)
--- ============================================================================
--- Uncomment to use triggers for automatic rating aggregation
--- NOTE: Can also compute on-the-fly; this is for performance if you have many reviews
-
-/*
-DELIMITER //
-
-CREATE TRIGGER update_avg_rating_after_review_insert
-AFTER INSERT ON reviews
-FOR EACH ROW
-BEGIN
-    UPDATE movies 
-    SET avg_rating = (
-        SELECT AVG(rating) FROM reviews WHERE movie_id = NEW.movie_id
-    )
-    WHERE movie_id = NEW.movie_id;
-END//
-
-CREATE TRIGGER update_avg_rating_after_review_update
-AFTER UPDATE ON reviews
-FOR EACH ROW
-BEGIN
-    UPDATE movies 
-    SET avg_rating = (
-        SELECT AVG(rating) FROM reviews WHERE movie_id = NEW.movie_id
-    )
-    WHERE movie_id = NEW.movie_id;
-END//
-
-CREATE TRIGGER update_avg_rating_after_review_delete
-AFTER DELETE ON reviews
-FOR EACH ROW
-BEGIN
-    UPDATE movies 
-    SET avg_rating = (
-        SELECT AVG(rating) FROM reviews WHERE movie_id = OLD.movie_id
-    )
-    WHERE movie_id = OLD.movie_id;
-END//
-
-DELIMITER ;
-*/
+-- PHASE 5: Incrementally Maintained Rating Aggregates
+-- ============================================================================
+-- Replaces per-request AVG()/COUNT() GROUP BY over reviews. The review write
+-- path applies sum/count/histogram deltas in the same transaction (see
+-- rating_stats.py); `python rating_stats.py verify` reports drift and
+-- `python rating_stats.py rebuild` recomputes from the reviews table.
+
+CREATE TABLE IF NOT EXISTS movie_rating_stats (
+    movie_id INT PRIMARY KEY,
+    rating_sum INT NOT NULL DEFAULT 0,
+    review_count INT NOT NULL DEFAULT 0,
+    star_1 INT NOT NULL DEFAULT 0,
+    star_2 INT NOT NULL DEFAULT 0,
+    star_3 INT NOT NULL DEFAULT 0,
+    star_4 INT NOT NULL DEFAULT 0,
+    star_5 INT NOT NULL DEFAULT 0,
+    last_review_at DATETIME NULL,
+    review_version INT NOT NULL DEFAULT 0,
+    avg_rating DECIMAL(6,4) AS (IF(review_count > 0, rating_sum / review_count, 0)) STORED,
+    INDEX idx_rating_stats_avg (avg_rating, review_count),
+    INDEX idx_rating_stats_avg_id (avg_rating, movie_id),
+    INDEX idx_rating_stats_count (review_count),
+    FOREIGN KEY (movie_id) REFERENCES movies(movie_id) ON DELETE CASCADE
+);
+
+INSERT INTO movie_rating_stats
+    (movie_id, rating_sum, review_count, star_1, star_2, star_3, star_4, star_5, last_review_at)
+SELECT m.movie_id,
+       COALESCE(SUM(r.rating), 0), COUNT(r.review_id),
+       COALESCE(SUM(r.rating = 1), 0), COALESCE(SUM(r.rating = 2), 0),
+       COALESCE(SUM(r.rating = 3), 0), COALESCE(SUM(r.rating = 4), 0),
+       COALESCE(SUM(r.rating = 5), 0), MAX(r.review_date)
+FROM movies m
+LEFT JOIN reviews r ON r.movie_id = m.movie_id
+GROUP BY m.movie_id
+ON DUPLICATE KEY UPDATE
+    rating_sum = VALUES(rating_sum), review_count = VALUES(review_count),
+    star_1 = VALUES(star_1), star_2 = VALUES(star_2), star_3 = VALUES(star_3),
+    star_4 = VALUES(star_4), star_5 = VALUES(star_5),
+    last_review_at = VALUES(last_review_at);
+
+-- ============================================================================
+-- PHASE 6: Natural Key for Bulk Catalog Ingestion
+-- ============================================================================
+-- ingest.py upserts movies by (title, release_year). Remove duplicate pairs
+-- first; the backend also creates this index at startup when it can.
+CREATE UNIQUE INDEX uq_movies_title_year ON movies(title, release_year);
+
+-- ============================================================================
+-- PHASE 7: Per-User Review Counters
+-- ============================================================================
+-- Kept in step with reviews by the single-statement review upsert
+-- (review_writes.py). The backend backfills missing rows at startup.
+CREATE TABLE IF NOT EXISTS user_review_stats (
+    user_id INT PRIMARY KEY,
+    rating_sum INT NOT NULL DEFAULT 0,
+    review_count INT NOT NULL DEFAULT 0,
+    last_review_at DATETIME NULL,
+    review_version INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+INSERT INTO user_review_stats (user_id, rating_sum, review_count, last_review_at)
+SELECT r.user_id, COALESCE(SUM(r.rating), 0), COUNT(*), MAX(r.review_date)
+FROM reviews r
+JOIN users u ON u.user_id = r.user_id
+GROUP BY r.user_id
+ON DUPLICATE KEY UPDATE
+    rating_sum = VALUES(rating_sum), review_count = VALUES(review_count),
+    last_review_at = VALUES(last_review_at);
+
+-- ============================================================================
+-- PHASE 8: Keyset Indexes for Review Feeds
+-- ============================================================================
+-- Paginated review feeds order by (review_date DESC, review_id DESC). Extends
+-- the PHASE 3 index with review_id and adds a covering index for the user feed.
+ALTER TABLE reviews
+    DROP INDEX idx_reviews_movie_date,
+    ADD INDEX idx_reviews_movie_date (movie_id, review_date DESC, review_id DESC);
+ALTER TABLE reviews ADD INDEX idx_reviews_user_date (user_id, review_date DESC, review_id DESC, rating);
+
+-- ============================================================================
+-- PHASE 9: Daily Review Buckets for Recent-Activity Counts
+-- ============================================================================
+-- Maintained by the review write path; the stats endpoint sums the last
+-- window_days buckets. Buckets older than 30 days are pruned at startup.
+CREATE TABLE IF NOT EXISTS movie_review_daily (
+    movie_id INT NOT NULL,
+    day DATE NOT NULL,
+    review_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (movie_id, day),
+    FOREIGN KEY (movie_id) REFERENCES movies(movie_id) ON DELETE CASCADE
+);
+
+INSERT INTO movie_review_daily (movie_id, day, review_count)
+SELECT movie_id, DATE(review_date), COUNT(*)
+FROM reviews
+WHERE review_date >= CURDATE() - INTERVAL 29 DAY
+GROUP BY movie_id, DATE(review_date)
+ON DUPLICATE KEY UPDATE review_count = VALUES(review_count);
+
+-- ============================================================================
+-- PHASE 10: Precomputed Recommendation Lists
+-- ============================================================================
+-- Filled by `python recommendations.py refresh` and on demand by
+-- GET /api/recommendations; no backfill needed.
+CREATE TABLE IF NOT EXISTS user_recommendations (
+    user_id INT NOT NULL,
+    algorithm VARCHAR(32) NOT NULL,
+    rank_pos SMALLINT NOT NULL,
+    movie_id INT NOT NULL,
+    recommendation_reason VARCHAR(255),
+    explanation_type VARCHAR(32),
+    PRIMARY KEY (user_id, algorithm, rank_pos),
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
+    FOREIGN KEY (movie_id) REFERENCES movies(movie_id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS user_recommendation_state (
+    user_id INT NOT NULL,
+    algorithm VARCHAR(32) NOT NULL,
+    review_version INT NOT NULL DEFAULT 0,
+    preferred_genres JSON,
+    watch_count INT NOT NULL DEFAULT 0,
+    computed_at DATETIME NOT NULL,
+    PRIMARY KEY (user_id, algorithm),
+    INDEX idx_recommendation_state_age (computed_at),
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
 
 -- ============================================================================
 -- Verify Constraints Are In Place
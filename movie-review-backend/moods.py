@@ -0,0 +1,75 @@
+"""
+Mood Definitions
+Mood -> genre mapping used by mood-based discovery. Seeded into the
+mood_genres table so searches can filter by mood through the genre index.
+"""
+
+MOODS = {
+    "happy": {
+        "label": "Happy",
+        "icon": "😊",
+        "description": "Lighthearted & fun",
+        "genres": ["Comedy", "Animation", "Family", "Musical"],
+    },
+    "dark": {
+        "label": "Dark",
+        "icon": "🌑",
+        "description": "Intense & gripping",
+        "genres": ["Horror", "Thriller", "Mystery", "Crime"],
+    },
+    "motivational": {
+        "label": "Motivational",
+        "icon": "💪",
+        "description": "Inspiring stories",
+        "genres": ["Biography", "Drama", "Sport", "Documentary"],
+    },
+    "thriller": {
+        "label": "Thriller",
+        "icon": "😱",
+        "description": "Edge of your seat",
+        "genres": ["Thriller", "Action", "Crime", "Mystery"],
+    },
+    "emotional": {
+        "label": "Emotional",
+        "icon": "😢",
+        "description": "Heartfelt moments",
+        "genres": ["Drama", "Romance", "Family"],
+    },
+    "adventurous": {
+        "label": "Adventurous",
+        "icon": "🗺️",
+        "description": "Epic journeys",
+        "genres": ["Adventure", "Action", "Fantasy", "Sci-Fi"],
+    },
+    "romantic": {
+        "label": "Romantic",
+        "icon": "💕",
+        "description": "Love stories",
+        "genres": ["Romance", "Drama", "Comedy"],
+    },
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mood_genres (
+    mood VARCHAR(20) NOT NULL,
+    genre VARCHAR(50) NOT NULL,
+    PRIMARY KEY (mood, genre),
+    INDEX idx_mood_genres_genre (genre)
+)
+"""
+
+
+def seed(conn):
+    """Sync mood_genres with MOODS (adds new pairs, drops removed ones)."""
+    cursor = conn.cursor()
+    pairs = [(mood, genre) for mood, spec in MOODS.items() for genre in spec["genres"]]
+    cursor.executemany(
+        "INSERT IGNORE INTO mood_genres (mood, genre) VALUES (%s, %s)",
+        pairs,
+    )
+    keep = ",".join(["(%s,%s)"] * len(pairs))
+    cursor.execute(
+        f"DELETE FROM mood_genres WHERE (mood, genre) NOT IN ({keep})",
+        [value for pair in pairs for value in pair],
+    )
+    conn.commit()
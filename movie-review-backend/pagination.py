@@ -0,0 +1,47 @@
+"""
+Keyset Pagination Helpers
+Opaque cursors and limit parsing shared by the paginated list endpoints.
+"""
+
+import base64
+import json
+from decimal import Decimal
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client-supplied cursor cannot be decoded."""
+
+
+def encode_cursor(kind, *values):
+    """Pack the sort name and last row's sort keys into a URL-safe token."""
+    payload = [kind] + [str(v) if isinstance(v, Decimal) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token, kind, arity):
+    """Return the sort keys stored in `token`, checking it belongs to `kind`."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor("invalid cursor")
+    if not isinstance(payload, list) or len(payload) != arity + 1 or payload[0] != kind:
+        raise InvalidCursor("cursor does not match this listing")
+    return payload[1:]
+
+
+def parse_limit(raw, default=20, maximum=100):
+    """Clamp a `limit` query value to [1, maximum]; None/blank gives the default."""
+    if raw in (None, ""):
+        return default
+    try:
+        limit = int(raw)
+    except (TypeError, ValueError):
+        raise ValueError("limit must be a number")
+    return max(1, min(limit, maximum))
+
+
+def split_page(rows, limit):
+    """Split a limit+1 fetch into (page, has_more)."""
+    return rows[:limit], len(rows) > limit
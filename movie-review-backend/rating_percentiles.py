@@ -0,0 +1,94 @@
+"""
+Rating Percentile Index
+Per-worker sorted float32 array of every movie's average rating (0 for
+movies without reviews), so "higher rated than N% of movies" is a bisect
+instead of two COUNT(*) scans of the catalog. Writes made by this worker
+move single values in place; the whole array is re-read from
+movie_rating_stats at most every `max_age` seconds to pick up other
+workers' writes.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+
+class RatingPercentiles:
+    def __init__(self, max_age=60.0):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._loaded = threading.Condition(self._lock)
+        self._reloading = False
+        self._values = np.empty(0, dtype=np.float32)  # sorted
+        self._by_movie = {}  # movie_id -> float32 average
+        self._loaded_at = float("-inf")
+
+    def ensure_fresh(self, get_conn):
+        """
+        Reload from MySQL when the array is older than max_age. One caller
+        reloads; the others keep using the current array (or wait for the
+        first load).
+        """
+        with self._lock:
+            while self._reloading and self._loaded_at == float("-inf"):
+                self._loaded.wait()
+            if self._reloading or time.monotonic() - self._loaded_at < self.max_age:
+                return
+            self._reloading = True
+        try:
+            conn = get_conn()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(
+                    """
+                    SELECT m.movie_id, COALESCE(s.avg_rating, 0)
+                    FROM movies m
+                    LEFT JOIN movie_rating_stats s ON s.movie_id = m.movie_id
+                    """
+                )
+                rows = cursor.fetchall()
+            finally:
+                conn.close()
+            by_movie = {movie_id: np.float32(avg) for movie_id, avg in rows}
+            values = np.sort(np.fromiter(by_movie.values(), dtype=np.float32, count=len(by_movie)))
+            with self._lock:
+                self._by_movie, self._values = by_movie, values
+                self._loaded_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._reloading = False
+                self._loaded.notify_all()
+
+    def percentile(self, avg_rating):
+        """Percent of movies whose average rating is <= avg_rating."""
+        with self._lock:
+            values = self._values
+        if not len(values):
+            return 0
+        at_or_below = int(np.searchsorted(values, np.float32(avg_rating or 0), side="right"))
+        return at_or_below / len(values) * 100
+
+    def observe(self, movie_id, avg_rating):
+        """Record a movie's new average (a new movie, or one that was just reviewed)."""
+        value = np.float32(avg_rating or 0)
+        with self._lock:
+            values = self._values
+            old = self._by_movie.get(movie_id)
+            if old is not None:
+                values = np.delete(values, np.searchsorted(values, old))
+            self._values = np.insert(values, np.searchsorted(values, value), value)
+            self._by_movie[movie_id] = value
+
+    def discard(self, movie_id):
+        with self._lock:
+            old = self._by_movie.pop(movie_id, None)
+            if old is not None:
+                self._values = np.delete(self._values, np.searchsorted(self._values, old))
+
+    def reload_movie(self, cursor, movie_id):
+        """Re-read one movie's average after a review write (plain cursor)."""
+        cursor.execute("SELECT avg_rating FROM movie_rating_stats WHERE movie_id = %s", (movie_id,))
+        row = cursor.fetchone()
+        if row is not None:
+            self.observe(movie_id, row[0])
@@ -0,0 +1,445 @@
+"""
+Movie Rating Aggregates
+Maintains movie_rating_stats (sum, count, per-star histogram, last review time)
+incrementally from the review write path, so reads never GROUP BY reviews.
+review_version increases on every change to a movie's reviews and serves as
+the movie's review-content version (ETags). user_review_stats keeps the same
+count/sum/version counters per reviewer, and movie_review_daily counts each
+movie's reviews per day of their latest write, for recent-activity windows.
+
+Usage:
+    python rating_stats.py verify            # report movies/users whose stats drifted
+    python rating_stats.py rebuild [ID ...]  # recompute from the reviews table
+"""
+
+import argparse
+import sys
+
+STAR_COLUMNS = ["star_1", "star_2", "star_3", "star_4", "star_5"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS movie_rating_stats (
+    movie_id INT PRIMARY KEY,
+    rating_sum INT NOT NULL DEFAULT 0,
+    review_count INT NOT NULL DEFAULT 0,
+    star_1 INT NOT NULL DEFAULT 0,
+    star_2 INT NOT NULL DEFAULT 0,
+    star_3 INT NOT NULL DEFAULT 0,
+    star_4 INT NOT NULL DEFAULT 0,
+    star_5 INT NOT NULL DEFAULT 0,
+    last_review_at DATETIME NULL,
+    review_version INT NOT NULL DEFAULT 0,
+    avg_rating DECIMAL(6,4) AS (IF(review_count > 0, rating_sum / review_count, 0)) STORED,
+    INDEX idx_rating_stats_avg (avg_rating, review_count),
+    INDEX idx_rating_stats_avg_id (avg_rating, movie_id),
+    INDEX idx_rating_stats_count (review_count),
+    FOREIGN KEY (movie_id) REFERENCES movies(movie_id) ON DELETE CASCADE
+)
+"""
+
+USER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_review_stats (
+    user_id INT PRIMARY KEY,
+    rating_sum INT NOT NULL DEFAULT 0,
+    review_count INT NOT NULL DEFAULT 0,
+    last_review_at DATETIME NULL,
+    review_version INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+)
+"""
+
+DAILY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS movie_review_daily (
+    movie_id INT NOT NULL,
+    day DATE NOT NULL,
+    review_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (movie_id, day),
+    FOREIGN KEY (movie_id) REFERENCES movies(movie_id) ON DELETE CASCADE
+)
+"""
+
+# Days of movie_review_daily buckets kept (and the longest recent window served)
+DAILY_RETENTION_DAYS = 30
+RECENT_WINDOW_DAYS = 7
+
+# Aggregate expressions over `reviews r`, in the column order of _STATS_COLUMNS.
+_AGGREGATES = [
+    "COALESCE(SUM(r.rating), 0)",
+    "COUNT(r.review_id)",
+] + [f"COALESCE(SUM(r.rating = {star}), 0)" for star in range(1, 6)] + [
+    "MAX(r.review_date)",
+]
+_STATS_COLUMNS = ["rating_sum", "review_count"] + STAR_COLUMNS + ["last_review_at"]
+
+
+def _star_column(rating):
+    rating = int(rating)
+    if rating < 1 or rating > 5:
+        raise ValueError(f"rating out of range: {rating}")
+    return STAR_COLUMNS[rating - 1]
+
+
+def init_movie(cursor, movie_id):
+    """Create the empty aggregate row for a new movie (keeps rating sorts complete)."""
+    cursor.execute("INSERT IGNORE INTO movie_rating_stats (movie_id) VALUES (%s)", (movie_id,))
+
+
+def apply_review_delta(cursor, movie_id, new_rating, old_rating=None):
+    """
+    Fold one review write into the movie's aggregate row.
+    Pass old_rating when an existing review was updated. Must run in the same
+    transaction as the review write so the two commit (or roll back) together.
+    """
+    new_col = _star_column(new_rating)
+    if old_rating is None:
+        sum_delta, count_delta = int(new_rating), 1
+        star_updates = f"{new_col} = {new_col} + 1"
+    else:
+        sum_delta, count_delta = int(new_rating) - int(old_rating), 0
+        old_col = _star_column(old_rating)
+        if old_col == new_col:
+            star_updates = f"{new_col} = {new_col}"
+        else:
+            star_updates = f"{old_col} = {old_col} - 1, {new_col} = {new_col} + 1"
+
+    # A missing row means the stats were never built for this movie; seed it
+    # with the new review and let `verify` catch any older history.
+    cursor.execute(
+        f"""
+        INSERT INTO movie_rating_stats (movie_id, rating_sum, review_count, {new_col}, last_review_at)
+        VALUES (%s, %s, 1, 1, NOW())
+        ON DUPLICATE KEY UPDATE
+            rating_sum = rating_sum + %s,
+            review_count = review_count + %s,
+            {star_updates},
+            last_review_at = NOW(),
+            review_version = review_version + 1
+        """,
+        (movie_id, int(new_rating), sum_delta, count_delta),
+    )
+
+
+def apply_user_delta(cursor, user_id, new_rating, old_rating=None):
+    """
+    Fold one review write into the reviewer's counters (same transaction as
+    the write) and return their new review_version.
+    """
+    if old_rating is None:
+        sum_delta, count_delta = int(new_rating), 1
+    else:
+        sum_delta, count_delta = int(new_rating) - int(old_rating), 0
+    cursor.execute(
+        """
+        INSERT INTO user_review_stats (user_id, rating_sum, review_count, last_review_at, review_version)
+        VALUES (%s, %s, 1, NOW(), 1)
+        ON DUPLICATE KEY UPDATE
+            rating_sum = rating_sum + %s,
+            review_count = review_count + %s,
+            last_review_at = NOW(),
+            review_version = LAST_INSERT_ID(review_version + 1)
+        """,
+        (user_id, int(new_rating), sum_delta, count_delta),
+    )
+    # A first review inserts the row at version 1; an update hands the new version back as the insert id.
+    return 1 if cursor.rowcount == 1 else cursor.lastrowid
+
+
+def remove_movie_reviews(cursor, movie_id):
+    """
+    Take a movie's reviews out of their reviewers' counters (bumping their
+    review_version) before the movie is deleted and its reviews cascade
+    away. Must run in the delete's transaction; locking the movie row first
+    holds off review writes to it until the delete commits. Returns the
+    number of reviewers adjusted.
+    """
+    cursor.execute("SELECT movie_id FROM movies WHERE movie_id = %s FOR UPDATE", (movie_id,))
+    cursor.fetchall()
+    cursor.execute(
+        """
+        UPDATE user_review_stats us
+        JOIN (
+            SELECT user_id, COALESCE(SUM(rating), 0) AS rating_sum, COUNT(*) AS review_count
+            FROM reviews
+            WHERE movie_id = %s
+            GROUP BY user_id
+        ) d ON d.user_id = us.user_id
+        SET us.rating_sum = us.rating_sum - d.rating_sum,
+            us.review_count = us.review_count - d.review_count,
+            us.review_version = us.review_version + 1
+        """,
+        (movie_id,),
+    )
+    return cursor.rowcount
+
+
+def apply_daily_delta(cursor, movie_id, is_new, old_review_ts=None):
+    """
+    Count the write in today's bucket. An update moves the review out of the
+    day of its previous write (old_review_ts, a Unix timestamp; None if the
+    review had no date).
+    """
+    rows, params = ["(%s, CURDATE(), 1)"], [movie_id]
+    if not is_new and old_review_ts:
+        rows.append("(%s, DATE(FROM_UNIXTIME(%s)), -1)")
+        params += [movie_id, int(old_review_ts)]
+    cursor.execute(
+        f"""
+        INSERT INTO movie_review_daily (movie_id, day, review_count)
+        VALUES {", ".join(rows)}
+        ON DUPLICATE KEY UPDATE review_count = review_count + VALUES(review_count)
+        """,
+        params,
+    )
+
+
+def read_summary(cursor, movie_id, window_days):
+    """
+    Fetch a movie's counters and its review count over the last `window_days`
+    days (today included). Returns None when the movie has no aggregate row.
+    """
+    cursor.execute(
+        f"""
+        SELECT s.review_count, s.rating_sum, s.review_version, {", ".join(f"s.{col}" for col in STAR_COLUMNS)},
+               (SELECT COALESCE(SUM(d.review_count), 0) FROM movie_review_daily d
+                WHERE d.movie_id = s.movie_id AND d.day > CURDATE() - INTERVAL %s DAY) AS recent_count
+        FROM movie_rating_stats s
+        WHERE s.movie_id = %s
+        """,
+        (int(window_days), movie_id),
+    )
+    return cursor.fetchone()
+
+
+def summarize(row):
+    """
+    Histogram, mean, population variance/stddev and min/max from a stats row.
+    The histogram is the running state: the sum of squares is sum(k^2 * star_k),
+    so nothing here depends on the number of reviews.
+    """
+    counts = [int(row[col]) if row else 0 for col in STAR_COLUMNS]
+    count = sum(counts)
+    present = [star for star, n in enumerate(counts, start=1) if n]
+    mean = variance = 0.0
+    if count:
+        mean = sum(star * n for star, n in enumerate(counts, start=1)) / count
+        sum_sq = sum(star * star * n for star, n in enumerate(counts, start=1))
+        # Clamp float error when all ratings are equal.
+        variance = max(0.0, sum_sq / count - mean * mean)
+    return {
+        "review_count": count,
+        "avg_rating": mean,
+        "avg_rating_rounded": round(mean, 1),
+        "min_rating": present[0] if present else None,
+        "max_rating": present[-1] if present else None,
+        "variance": variance,
+        "stddev": variance ** 0.5,
+        "histogram": {str(star): n for star, n in enumerate(counts, start=1)},
+    }
+
+
+def review_version(cursor, movie_id):
+    """Current review-content version of a movie (0 if it has no aggregate row)."""
+    cursor.execute(
+        "SELECT review_version FROM movie_rating_stats WHERE movie_id = %s",
+        (movie_id,),
+    )
+    row = cursor.fetchone()
+    if not row:
+        return 0
+    return row["review_version"] if isinstance(row, dict) else row[0]
+
+
+def rebuild(conn, movie_ids=None, missing_only=False):
+    """
+    Recompute aggregates from the reviews table. Returns affected row count.
+    missing_only restricts the rebuild to movies that have no aggregate row yet.
+    """
+    cursor = conn.cursor()
+    where, params = "", []
+    if movie_ids:
+        where = "WHERE m.movie_id IN ({})".format(",".join(["%s"] * len(movie_ids)))
+        params = list(movie_ids)
+    elif missing_only:
+        where = "WHERE NOT EXISTS (SELECT 1 FROM movie_rating_stats s WHERE s.movie_id = m.movie_id)"
+    cursor.execute(
+        f"""
+        INSERT INTO movie_rating_stats (movie_id, {", ".join(_STATS_COLUMNS)})
+        SELECT m.movie_id, {", ".join(_AGGREGATES)}
+        FROM movies m
+        LEFT JOIN reviews r ON r.movie_id = m.movie_id
+        {where}
+        GROUP BY m.movie_id
+        ON DUPLICATE KEY UPDATE
+            {", ".join(f"{col} = VALUES({col})" for col in _STATS_COLUMNS)},
+            review_version = review_version + 1
+        """,
+        params,
+    )
+    conn.commit()
+    return cursor.rowcount
+
+
+def rebuild_users(conn, user_ids=None, missing_only=False):
+    """Recompute user_review_stats from the reviews table, like rebuild()."""
+    cursor = conn.cursor()
+    where, params = "", []
+    if user_ids:
+        where = "WHERE r.user_id IN ({})".format(",".join(["%s"] * len(user_ids)))
+        params = list(user_ids)
+    elif missing_only:
+        where = "WHERE NOT EXISTS (SELECT 1 FROM user_review_stats us WHERE us.user_id = r.user_id)"
+    cursor.execute(
+        f"""
+        INSERT INTO user_review_stats (user_id, rating_sum, review_count, last_review_at)
+        SELECT r.user_id, COALESCE(SUM(r.rating), 0), COUNT(*), MAX(r.review_date)
+        FROM reviews r
+        JOIN users u ON u.user_id = r.user_id
+        {where}
+        GROUP BY r.user_id
+        ON DUPLICATE KEY UPDATE
+            rating_sum = VALUES(rating_sum), review_count = VALUES(review_count),
+            last_review_at = VALUES(last_review_at),
+            review_version = review_version + 1
+        """,
+        params,
+    )
+    conn.commit()
+    return cursor.rowcount
+
+
+def rebuild_daily(conn, movie_ids=None, missing_only=False):
+    """
+    Recompute movie_review_daily for the retention window from review_date and
+    drop buckets that fell out of it. missing_only only prunes old buckets
+    unless the table is empty (first run).
+    """
+    cursor = conn.cursor()
+    if missing_only:
+        cursor.execute("SELECT 1 FROM movie_review_daily LIMIT 1")
+        if cursor.fetchall():
+            cursor.execute(
+                "DELETE FROM movie_review_daily WHERE day <= CURDATE() - INTERVAL %s DAY",
+                (DAILY_RETENTION_DAYS,),
+            )
+            conn.commit()
+            return cursor.rowcount
+    where, params = "", []
+    if movie_ids:
+        where = "AND movie_id IN ({})".format(",".join(["%s"] * len(movie_ids)))
+        params = list(movie_ids)
+    cursor.execute(
+        f"DELETE FROM movie_review_daily WHERE (day > CURDATE() - INTERVAL %s DAY {where}) "
+        "OR day <= CURDATE() - INTERVAL %s DAY",
+        [DAILY_RETENTION_DAYS] + params + [DAILY_RETENTION_DAYS],
+    )
+    cursor.execute(
+        f"""
+        INSERT INTO movie_review_daily (movie_id, day, review_count)
+        SELECT movie_id, DATE(review_date), COUNT(*)
+        FROM reviews
+        WHERE review_date >= CURDATE() - INTERVAL %s DAY {where}
+        GROUP BY movie_id, DATE(review_date)
+        """,
+        [DAILY_RETENTION_DAYS - 1] + params,
+    )
+    conn.commit()
+    return cursor.rowcount
+
+
+def verify(conn):
+    """Return movies whose stored aggregates differ from the reviews table."""
+    cursor = conn.cursor(dictionary=True)
+    actual_columns = ", ".join(
+        f"{expr} AS {col}" for expr, col in zip(_AGGREGATES[:-1], _STATS_COLUMNS[:-1])
+    )
+    mismatch = " OR ".join(
+        f"NOT (COALESCE(s.{col}, 0) <=> COALESCE(a.{col}, 0))" for col in _STATS_COLUMNS[:-1]
+    )
+    cursor.execute(
+        f"""
+        SELECT m.movie_id,
+               s.rating_sum AS stored_sum, s.review_count AS stored_count,
+               a.rating_sum AS actual_sum, a.review_count AS actual_count
+        FROM movies m
+        LEFT JOIN movie_rating_stats s ON s.movie_id = m.movie_id
+        LEFT JOIN (
+            SELECT r.movie_id, {actual_columns}
+            FROM reviews r
+            GROUP BY r.movie_id
+        ) a ON a.movie_id = m.movie_id
+        WHERE s.movie_id IS NULL OR {mismatch}
+        ORDER BY m.movie_id
+        """
+    )
+    return cursor.fetchall()
+
+
+def verify_users(conn, user_ids=None):
+    """Return reviewers whose stored counters differ from the reviews table."""
+    cursor = conn.cursor(dictionary=True)
+    where, params = "", []
+    if user_ids:
+        where = "AND u.user_id IN ({})".format(",".join(["%s"] * len(user_ids)))
+        params = list(user_ids)
+    cursor.execute(
+        f"""
+        SELECT u.user_id,
+               us.rating_sum AS stored_sum, us.review_count AS stored_count,
+               a.rating_sum AS actual_sum, a.review_count AS actual_count
+        FROM users u
+        LEFT JOIN user_review_stats us ON us.user_id = u.user_id
+        LEFT JOIN (
+            SELECT user_id, COALESCE(SUM(rating), 0) AS rating_sum, COUNT(*) AS review_count
+            FROM reviews
+            GROUP BY user_id
+        ) a ON a.user_id = u.user_id
+        WHERE (NOT (COALESCE(us.rating_sum, 0) <=> COALESCE(a.rating_sum, 0))
+           OR NOT (COALESCE(us.review_count, 0) <=> COALESCE(a.review_count, 0)))
+          {where}
+        ORDER BY u.user_id
+        """,
+        params,
+    )
+    return cursor.fetchall()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain movie_rating_stats and user_review_stats")
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    parser.add_argument("movie_ids", nargs="*", type=int)
+    args = parser.parse_args(argv)
+
+    from app import get_db
+    import catalog_cache
+
+    conn = get_db()
+    try:
+        if args.command == "rebuild":
+            affected = rebuild(conn, args.movie_ids or None)
+            affected += rebuild_daily(conn, args.movie_ids or None)
+            if not args.movie_ids:
+                affected += rebuild_users(conn)
+            catalog_cache.bump(conn.cursor())
+            conn.commit()
+            print(f"Rebuilt rating stats ({affected} rows affected)")
+            return 0
+        drifted = verify(conn)
+        for row in drifted:
+            print(
+                f"movie {row['movie_id']}: stored sum={row['stored_sum']} count={row['stored_count']}, "
+                f"actual sum={row['actual_sum'] or 0} count={row['actual_count'] or 0}"
+            )
+        drifted_users = verify_users(conn)
+        for row in drifted_users:
+            print(
+                f"user {row['user_id']}: stored sum={row['stored_sum']} count={row['stored_count']}, "
+                f"actual sum={row['actual_sum'] or 0} count={row['actual_count'] or 0}"
+            )
+        print(f"{len(drifted)} movie(s) and {len(drifted_users)} user(s) drifted")
+        return 1 if drifted or drifted_users else 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+Recommendation Cache
+Per-worker LRU of serialized /api/recommendations responses, keyed by
+(user_id, algorithm) and tagged with the version they were built from: the
+user's review_version in user_review_stats (bumped by every review write)
+plus the model version for model-backed algorithms. An entry only answers a
+request carrying the same version, so a new review or model is never served
+a stale list.
+
+Within `ttl` seconds an entry is fresh. For a further `stale_ttl` seconds it
+is still served, but the first request to see it stale queues a background
+rebuild (stale-while-revalidate); after that it is dropped. Rebuilds run one
+at a time on a single refresher thread, so a burst of stale users cannot
+take more than one pooled connection away from request handlers.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+logger = logging.getLogger("movie-review-backend")
+
+
+class RecommendationCache:
+    def __init__(self, ttl=300.0, stale_ttl=900.0, max_entries=10000, max_bytes=32 * 1024 * 1024, max_pending=256):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (payload, version, stored_at)
+        self._bytes = 0
+        self._refreshing = set()  # keys queued or being rebuilt
+        self._pending = deque()
+        self._wakeup = threading.Condition(self._lock)
+        self._refresher = None
+        self._refresher_pid = None
+        self._counters = {
+            "hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0,
+            "invalidations": 0, "refreshes": 0, "refresh_failures": 0, "refresh_skipped": 0,
+        }
+
+    def _drop(self, key):
+        payload, _, _ = self._entries.pop(key)
+        self._bytes -= len(payload)
+
+    def get(self, key, version):
+        """(payload, fresh) for a live entry built from `version`, else None."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            payload, cached_version, stored_at = entry
+            age = now - stored_at
+            if cached_version != version or age > self.ttl + self.stale_ttl:
+                if cached_version != version:
+                    self._counters["invalidations"] += 1
+                self._drop(key)
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            if age <= self.ttl:
+                self._counters["hits"] += 1
+                return payload, True
+            self._counters["stale_hits"] += 1
+            return payload, False
+
+    def put(self, key, payload, version):
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (payload, version, time.monotonic())
+            self._bytes += len(payload)
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                _, (evicted, _, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._counters["evictions"] += 1
+
+    def revalidate(self, key, build):
+        """
+        Queue a rebuild of a stale entry with `build()`, which returns
+        (payload, version). One background thread works through the queue, so
+        rebuilds hold at most one pooled connection at a time. A key already
+        queued, or a full queue, skips the rebuild; the stale entry is served
+        until it expires.
+        """
+        with self._lock:
+            if key in self._refreshing or len(self._refreshing) >= self.max_pending:
+                self._counters["refresh_skipped"] += 1
+                return False
+            self._refreshing.add(key)
+            self._pending.append((key, build))
+            self._counters["refreshes"] += 1
+            if self._refresher is None or self._refresher_pid != os.getpid():
+                # Started on first use, so forked workers each run their own refresher.
+                self._refresher_pid = os.getpid()
+                self._refresher = threading.Thread(target=self._refresh_loop, name="rec-refresh", daemon=True)
+                self._refresher.start()
+            self._wakeup.notify()
+        return True
+
+    def _refresh_loop(self):
+        while True:
+            with self._lock:
+                while not self._pending:
+                    self._wakeup.wait()
+                key, build = self._pending.popleft()
+            try:
+                payload, version = build()
+                self.put(key, payload, version)
+            except Exception:
+                logger.exception("Background recommendation refresh failed for %s", key)
+                with self._lock:
+                    self._counters["refresh_failures"] += 1
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats.update({
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "refreshing": len(self._refreshing),
+            })
+            return stats
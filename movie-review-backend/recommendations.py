@@ -0,0 +1,440 @@
+"""
+Precomputed Recommendations
+Each user's top-N recommendations are computed offline into
+user_recommendations (one row per rank) with a user_recommendation_state
+header recording the review_version of user_review_stats they were built
+from. GET /api/recommendations reads both in one indexed query; a list built
+from an older review_version is recomputed on the spot, as are users with no
+list yet.
+
+The refresh worker recomputes users whose reviews changed since their list
+was built, or whose list is older than --max-age:
+
+    python recommendations.py refresh                  # one pass
+    python recommendations.py refresh --loop 300       # every 5 minutes
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import mysql.connector
+
+TOP_N = 10
+ALGORITHM = "rule-based"
+REFRESH_BATCH = 500
+MAX_AGE_SECONDS = 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_recommendations (
+    user_id INT NOT NULL,
+    algorithm VARCHAR(32) NOT NULL,
+    rank_pos SMALLINT NOT NULL,
+    movie_id INT NOT NULL,
+    recommendation_reason VARCHAR(255),
+    explanation_type VARCHAR(32),
+    PRIMARY KEY (user_id, algorithm, rank_pos),
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
+    FOREIGN KEY (movie_id) REFERENCES movies(movie_id) ON DELETE CASCADE
+)
+"""
+
+STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_recommendation_state (
+    user_id INT NOT NULL,
+    algorithm VARCHAR(32) NOT NULL,
+    review_version INT NOT NULL DEFAULT 0,
+    preferred_genres JSON,
+    watch_count INT NOT NULL DEFAULT 0,
+    computed_at DATETIME NOT NULL,
+    PRIMARY KEY (user_id, algorithm),
+    INDEX idx_recommendation_state_age (computed_at),
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+)
+"""
+
+# Columns of the stored-list read that are not movie fields
+_META_COLUMNS = (
+    "rec_computed_version", "rec_current_version", "rec_preferred_genres",
+    "rec_watch_count", "rec_rank",
+)
+
+
+def _review_history(cursor, user_id):
+    """(preferred genre rows, watched movie ids, top-rated reviews) queried from MySQL."""
+    # Step 1: Get user's review history with genre preferences
+    cursor.execute("""
+        SELECT m.genre, AVG(r.rating) as avg_rating, COUNT(*) as watch_count
+        FROM reviews r
+        JOIN movies m ON r.movie_id = m.movie_id
+        WHERE r.user_id = %s AND m.genre IS NOT NULL
+        GROUP BY m.genre
+        HAVING AVG(r.rating) >= 4.0
+        ORDER BY avg_rating DESC, watch_count DESC, m.genre
+    """, (user_id,))
+    preferred_genres = cursor.fetchall()
+
+    # Step 2: Get movies user has already reviewed (to exclude) + get user's top-rated movies
+    cursor.execute("""
+        SELECT r.movie_id, m.title, r.rating, m.genre
+        FROM reviews r
+        JOIN movies m ON r.movie_id = m.movie_id
+        WHERE r.user_id = %s
+        ORDER BY r.rating DESC, r.review_date DESC, r.movie_id
+    """, (user_id,))
+    user_reviews = cursor.fetchall()
+    watched_movie_ids = [row['movie_id'] for row in user_reviews]
+    top_rated_movies = [r for r in user_reviews if r['rating'] >= 4.5][:3]  # Top 3 highly rated
+    return preferred_genres, watched_movie_ids, top_rated_movies
+
+
+def compute(cursor, user_id, limit=TOP_N, profile=None):
+    """
+    Rule-based recommendations from the user's review history (dictionary
+    cursor), read from their taste profile when one is given:
+    1. Find preferred genres (genres with avg rating >= 4)
+    2. Recommend unwatched movies from preferred genres
+    3. Fall back to trending movies (most reviewed + high rated)
+    4. Then to the highest-rated movies
+    """
+    if profile is not None:
+        preferred_genres = profile.preferred_genres()
+        watched_movie_ids = profile.watched()
+        top_rated_movies = profile.top_rated(4.5, 3)
+    else:
+        preferred_genres, watched_movie_ids, top_rated_movies = _review_history(cursor, user_id)
+
+    recommendations = []
+
+    # Step 3: Recommend from preferred genres (genre-based filtering)
+    if preferred_genres:
+        genre_list = [g['genre'] for g in preferred_genres[:3]]  # Top 3 genres
+        placeholders = ','.join(['%s'] * len(genre_list))
+        exclude_placeholders = ','.join(['%s'] * len(watched_movie_ids)) if watched_movie_ids else '0'
+
+        query = f"""
+            SELECT m.*,
+                   COALESCE(s.avg_rating, 0) as avg_rating,
+                   COALESCE(s.review_count, 0) as review_count
+            FROM movies m
+            LEFT JOIN movie_rating_stats s ON s.movie_id = m.movie_id
+            WHERE m.genre IN ({placeholders})
+              AND m.movie_id NOT IN ({exclude_placeholders})
+            ORDER BY avg_rating DESC, review_count DESC, m.movie_id
+            LIMIT %s
+        """
+        cursor.execute(query, genre_list + watched_movie_ids + [limit])
+        recommendations = cursor.fetchall()
+
+    # Step 4: Fallback to trending movies if not enough genre recommendations
+    if len(recommendations) < limit:
+        exclude_placeholders = ','.join(['%s'] * len(watched_movie_ids)) if watched_movie_ids else '0'
+
+        cursor.execute(f"""
+            SELECT m.*, s.avg_rating, s.review_count
+            FROM movie_rating_stats s
+            JOIN movies m ON m.movie_id = s.movie_id
+            WHERE m.movie_id NOT IN ({exclude_placeholders})
+              AND s.review_count >= 3 AND s.avg_rating >= 4.0
+            ORDER BY s.review_count DESC, s.avg_rating DESC, m.movie_id
+            LIMIT %s
+        """, watched_movie_ids + [limit - len(recommendations)])
+
+        trending = cursor.fetchall()
+        recommendations.extend(trending)
+
+    # Step 5: If still not enough, recommend highest-rated movies
+    if len(recommendations) < limit:
+        exclude_all = list(set([r['movie_id'] for r in recommendations] + watched_movie_ids))
+        exclude_placeholders = ','.join(['%s'] * len(exclude_all)) if exclude_all else '0'
+
+        cursor.execute(f"""
+            SELECT m.*,
+                   COALESCE(s.avg_rating, 0) as avg_rating,
+                   COALESCE(s.review_count, 0) as review_count
+            FROM movies m
+            LEFT JOIN movie_rating_stats s ON s.movie_id = m.movie_id
+            WHERE m.movie_id NOT IN ({exclude_placeholders})
+            ORDER BY avg_rating DESC, m.release_year DESC, m.movie_id
+            LIMIT %s
+        """, exclude_all + [limit - len(recommendations)])
+        recommendations.extend(cursor.fetchall())
+
+    # Step 6: Add EXPLAINABLE recommendation reason for each movie (XAI)
+    for movie in recommendations:
+        reason = ""
+        explanation_type = ""
+
+        # Check if movie is from preferred genre
+        if preferred_genres and movie.get('genre') in [g['genre'] for g in preferred_genres]:
+            genre_info = next((g for g in preferred_genres if g['genre'] == movie['genre']), None)
+            if genre_info:
+                reason = f"You rated {int(genre_info['watch_count'])} {movie['genre']} movies highly (avg {genre_info['avg_rating']:.1f}⭐)"
+                explanation_type = "genre_preference"
+
+        # Check if similar to top-rated movies
+        elif top_rated_movies and movie.get('genre'):
+            similar_top = [m for m in top_rated_movies if m.get('genre') == movie.get('genre')]
+            if similar_top:
+                reason = f"Similar to a {movie['genre']} movie you rated {similar_top[0]['rating']:.1f}⭐"
+                explanation_type = "similar_to_liked"
+
+        # Trending with high engagement
+        elif movie.get('review_count', 0) >= 5 and movie.get('avg_rating', 0) >= 4.0:
+            reason = f"Trending: {int(movie['review_count'])} reviews with {movie['avg_rating']:.1f}⭐ rating"
+            explanation_type = "trending"
+
+        # High rating
+        elif movie.get('avg_rating', 0) >= 4.0:
+            reason = f"Highly rated by critics ({movie['avg_rating']:.1f}⭐)"
+            explanation_type = "high_rated"
+
+        # Fallback
+        else:
+            reason = "Recommended for you"
+            explanation_type = "general"
+
+        movie['recommendation_reason'] = reason
+        movie['explanation_type'] = explanation_type
+        if preferred_genres and movie.get('genre') in [g['genre'] for g in preferred_genres]:
+            movie['recommendation_reason'] = f"Based on your love for {movie['genre']}"
+        elif movie.get('review_count', 0) >= 5:
+            movie['recommendation_reason'] = "Trending now"
+        else:
+            movie['recommendation_reason'] = "Highly rated"
+
+    return {
+        "recommendations": recommendations[:limit],
+        "preferred_genres": [g['genre'] for g in preferred_genres],
+        "algorithm": ALGORITHM,
+        "user_watch_count": len(watched_movie_ids),
+    }
+
+
+def user_ratings(cursor, user_id):
+    """{movie_id: rating} of everything the user has rated (dictionary cursor)."""
+    cursor.execute(
+        "SELECT movie_id, rating FROM reviews WHERE user_id = %s AND rating IS NOT NULL",
+        (user_id,),
+    )
+    return {row["movie_id"]: row["rating"] for row in cursor.fetchall()}
+
+
+def fetch_movies(cursor, movie_ids):
+    """{movie_id: movie row with avg_rating/review_count} for model-picked ids."""
+    movie_ids = list(dict.fromkeys(int(m) for m in movie_ids))
+    if not movie_ids:
+        return {}
+    cursor.execute(
+        f"""
+        SELECT m.*, COALESCE(s.avg_rating, 0) AS avg_rating,
+               COALESCE(s.review_count, 0) AS review_count
+        FROM movies m
+        LEFT JOIN movie_rating_stats s ON s.movie_id = m.movie_id
+        WHERE m.movie_id IN ({",".join(["%s"] * len(movie_ids))})
+        """,
+        movie_ids,
+    )
+    return {row["movie_id"]: row for row in cursor.fetchall()}
+
+
+def review_version(cursor, user_id):
+    """The user's review_version in user_review_stats (0 before their first review)."""
+    cursor.execute("SELECT review_version FROM user_review_stats WHERE user_id = %s", (user_id,))
+    row = cursor.fetchone()
+    if not row:
+        return 0
+    return row["review_version"] if isinstance(row, dict) else row[0]
+
+
+def store(cursor, user_id, result, review_version):
+    """
+    Replace the user's stored list. Rows are upserted by rank and the tail
+    trimmed, so a concurrent refresh of the same user cannot hit a duplicate key.
+    """
+    rows = result["recommendations"]
+    if rows:
+        cursor.execute(
+            f"""
+            INSERT INTO user_recommendations
+                (user_id, algorithm, rank_pos, movie_id, recommendation_reason, explanation_type)
+            VALUES {", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(rows))}
+            ON DUPLICATE KEY UPDATE
+                movie_id = VALUES(movie_id),
+                recommendation_reason = VALUES(recommendation_reason),
+                explanation_type = VALUES(explanation_type)
+            """,
+            [
+                value
+                for rank, movie in enumerate(rows)
+                for value in (
+                    user_id, ALGORITHM, rank, movie["movie_id"],
+                    movie["recommendation_reason"][:255], movie["explanation_type"],
+                )
+            ],
+        )
+    cursor.execute(
+        "DELETE FROM user_recommendations WHERE user_id = %s AND algorithm = %s AND rank_pos >= %s",
+        (user_id, ALGORITHM, len(rows)),
+    )
+    cursor.execute(
+        """
+        INSERT INTO user_recommendation_state
+            (user_id, algorithm, review_version, preferred_genres, watch_count, computed_at)
+        VALUES (%s, %s, %s, %s, %s, NOW())
+        ON DUPLICATE KEY UPDATE
+            review_version = VALUES(review_version),
+            preferred_genres = VALUES(preferred_genres),
+            watch_count = VALUES(watch_count),
+            computed_at = VALUES(computed_at)
+        """,
+        (
+            user_id, ALGORITHM, review_version,
+            json.dumps(result["preferred_genres"]), result["user_watch_count"],
+        ),
+    )
+
+
+def refresh(conn, user_id, limit=TOP_N, profile=None):
+    """
+    Recompute and store one user's list, then commit. Returns the result.
+    A taste profile, when given, supplies the review history and its version.
+    """
+    cursor = conn.cursor(dictionary=True)
+    try:
+        # Read the version first: a review landing mid-compute leaves the list stale.
+        version = profile.version if profile is not None else review_version(cursor, user_id)
+        result = compute(cursor, user_id, limit, profile)
+        store(cursor, user_id, result, version)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return result
+
+
+def read(cursor, user_id):
+    """
+    The stored list in the response shape of compute(), with live movie
+    fields and rating stats, or None if the user has no list or it was built
+    before their latest review.
+    """
+    cursor.execute(
+        """
+        SELECT st.review_version AS rec_computed_version,
+               COALESCE(us.review_version, 0) AS rec_current_version,
+               st.preferred_genres AS rec_preferred_genres,
+               st.watch_count AS rec_watch_count,
+               ur.rank_pos AS rec_rank,
+               m.*,
+               COALESCE(s.avg_rating, 0) AS avg_rating,
+               COALESCE(s.review_count, 0) AS review_count,
+               ur.recommendation_reason, ur.explanation_type
+        FROM user_recommendation_state st
+        LEFT JOIN user_review_stats us ON us.user_id = st.user_id
+        LEFT JOIN user_recommendations ur
+               ON ur.user_id = st.user_id AND ur.algorithm = st.algorithm
+        LEFT JOIN movies m ON m.movie_id = ur.movie_id
+        LEFT JOIN movie_rating_stats s ON s.movie_id = ur.movie_id
+        WHERE st.user_id = %s AND st.algorithm = %s
+        ORDER BY ur.rank_pos
+        """,
+        (user_id, ALGORITHM),
+    )
+    rows = cursor.fetchall()
+    if not rows or rows[0]["rec_computed_version"] != rows[0]["rec_current_version"]:
+        return None
+    first = rows[0]
+    genres = first["rec_preferred_genres"]
+    if isinstance(genres, (bytes, bytearray)):
+        genres = genres.decode()
+    return {
+        "recommendations": [
+            {k: v for k, v in row.items() if k not in _META_COLUMNS}
+            for row in rows
+            if row["rec_rank"] is not None
+        ],
+        "preferred_genres": json.loads(genres) if genres else [],
+        "algorithm": ALGORITHM,
+        "user_watch_count": first["rec_watch_count"],
+    }
+
+
+def stale_users(cursor, max_age=MAX_AGE_SECONDS, limit=REFRESH_BATCH, after=0):
+    """
+    Ids (ascending, > after) of users whose reviews changed since their list
+    was built, who have reviews but no list, or whose list is older than
+    max_age seconds. Users without reviews or a list are left to the
+    endpoint's on-the-fly path.
+    """
+    cursor.execute(
+        """
+        SELECT u.user_id
+        FROM users u
+        LEFT JOIN user_review_stats us ON us.user_id = u.user_id
+        LEFT JOIN user_recommendation_state st
+               ON st.user_id = u.user_id AND st.algorithm = %s
+        WHERE u.user_id > %s
+          AND ((st.user_id IS NULL AND us.user_id IS NOT NULL)
+               OR st.review_version <> COALESCE(us.review_version, 0)
+               OR st.computed_at < NOW() - INTERVAL %s SECOND)
+        ORDER BY u.user_id
+        LIMIT %s
+        """,
+        (ALGORITHM, after, int(max_age), limit),
+    )
+    return [row["user_id"] if isinstance(row, dict) else row[0] for row in cursor.fetchall()]
+
+
+def refresh_stale(conn, max_age=MAX_AGE_SECONDS, batch=REFRESH_BATCH, log=None):
+    """One worker pass over every stale user. Returns (refreshed, failed)."""
+    refreshed = failed = 0
+    after = 0
+    while True:
+        cursor = conn.cursor()
+        user_ids = stale_users(cursor, max_age, batch, after)
+        cursor.close()
+        if not user_ids:
+            return refreshed, failed
+        for user_id in user_ids:
+            try:
+                refresh(conn, user_id)
+                refreshed += 1
+            except mysql.connector.Error as e:
+                failed += 1
+                if log:
+                    log(f"user {user_id}: {e}")
+        after = user_ids[-1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh precomputed user recommendations")
+    parser.add_argument("command", choices=["refresh"])
+    parser.add_argument("--max-age", type=int, default=MAX_AGE_SECONDS,
+                        help="also recompute lists older than this many seconds")
+    parser.add_argument("--batch", type=int, default=REFRESH_BATCH)
+    parser.add_argument("--loop", type=int, default=0, metavar="SECONDS",
+                        help="repeat every SECONDS instead of running one pass")
+    args = parser.parse_args(argv)
+
+    from app import get_db
+
+    log = lambda message: print(message, file=sys.stderr)
+    while True:
+        conn = get_db()
+        started = time.monotonic()
+        try:
+            refreshed, failed = refresh_stale(conn, args.max_age, args.batch, log)
+        finally:
+            conn.close()
+        print(f"Refreshed {refreshed} user(s), {failed} failed, in {time.monotonic() - started:.1f}s")
+        if not args.loop:
+            return 1 if failed else 0
+        time.sleep(args.loop)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
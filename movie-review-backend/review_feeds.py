@@ -0,0 +1,116 @@
+"""
+Review Feed Queries
+Keyset-paginated review feeds per movie and per user, newest first on
+(review_date, review_id). The page of review ids is found on a
+(owner, review_date, review_id) index and only those rows are joined to
+users/movies, so cost follows the page size rather than the review count.
+"""
+
+# index name -> (DDL, column the current definition must include)
+INDEXES = {
+    "idx_reviews_movie_date": (
+        "ALTER TABLE reviews {drop}ADD INDEX idx_reviews_movie_date "
+        "(movie_id, review_date DESC, review_id DESC)",
+        "review_id",
+    ),
+    # Covers the user feed's inner query, including the min_rating filter.
+    "idx_reviews_user_date": (
+        "ALTER TABLE reviews {drop}ADD INDEX idx_reviews_user_date "
+        "(user_id, review_date DESC, review_id DESC, rating)",
+        "rating",
+    ),
+}
+
+FEED_PARAMS = ("limit", "cursor", "min_rating", "has_comment")
+
+# feed -> (owner column, columns joined onto each review). LEFT JOINs keep
+# every row of the id page, so `has more` detection stays exact.
+FEEDS = {
+    "movie": ("movie_id", "u.name", "LEFT JOIN users u ON u.user_id = r.user_id"),
+    "user": ("user_id", "m.title", "LEFT JOIN movies m ON m.movie_id = r.movie_id"),
+}
+
+
+def ensure_indexes(cursor):
+    """Create the feed indexes, replacing older definitions that lack the keyset columns."""
+    for name, (ddl, required_column) in INDEXES.items():
+        cursor.execute(
+            """
+            SELECT column_name FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = 'reviews' AND index_name = %s
+            """,
+            (name,),
+        )
+        columns = {row[0].lower() for row in cursor.fetchall()}
+        if required_column in columns:
+            continue
+        cursor.execute(ddl.format(drop=f"DROP INDEX {name}, " if columns else ""))
+
+
+def parse_filters(args):
+    """Validate the optional min_rating / has_comment feed filters."""
+    min_rating = args.get("min_rating")
+    if min_rating in (None, ""):
+        min_rating = None
+    else:
+        try:
+            min_rating = int(min_rating)
+        except ValueError:
+            raise ValueError("min_rating must be a number")
+        if not 1 <= min_rating <= 5:
+            raise ValueError("min_rating must be between 1 and 5")
+    has_comment = args.get("has_comment")
+    if has_comment in (None, ""):
+        has_comment = None
+    elif has_comment.lower() in ("1", "true", "yes"):
+        has_comment = True
+    elif has_comment.lower() in ("0", "false", "no"):
+        has_comment = False
+    else:
+        raise ValueError("has_comment must be true or false")
+    return {"min_rating": min_rating, "has_comment": has_comment}
+
+
+def feed_query(feed, owner_id, filters, after, limit):
+    """
+    Build one page of a review feed (limit + 1 rows so the caller can tell
+    whether another page exists). `after` is the (review_date, review_id)
+    of the previous page's last row.
+    """
+    owner_column, extra_column, join = FEEDS[feed]
+    where, params = [f"{owner_column} = %s"], [owner_id]
+    if filters["min_rating"] is not None:
+        where.append("rating >= %s")
+        params.append(filters["min_rating"])
+    if filters["has_comment"] is True:
+        where.append("comment IS NOT NULL AND comment <> ''")
+    elif filters["has_comment"] is False:
+        where.append("(comment IS NULL OR comment = '')")
+    if after is not None:
+        last_date, last_id = after
+        # MySQL sorts NULL dates last in DESC order.
+        if last_date is None:
+            where.append("(review_date IS NULL AND review_id < %s)")
+            params.append(int(last_id))
+        else:
+            where.append(
+                "(review_date < %s OR (review_date = %s AND review_id < %s) OR review_date IS NULL)"
+            )
+            params += [last_date, last_date, int(last_id)]
+    sql = f"""
+        SELECT r.*, {extra_column}
+        FROM (
+            SELECT review_id FROM reviews
+            WHERE {" AND ".join(where)}
+            ORDER BY review_date DESC, review_id DESC
+            LIMIT %s
+        ) page
+        JOIN reviews r ON r.review_id = page.review_id
+        {join}
+        ORDER BY r.review_date DESC, r.review_id DESC
+    """
+    return sql, params + [limit + 1]
+
+
+def cursor_values(row):
+    return (row["review_date"], row["review_id"])
@@ -0,0 +1,108 @@
+"""
+Review Writes
+Creates or updates a user's review with one INSERT ... ON DUPLICATE KEY UPDATE
+on unique_user_movie_review. The statement itself reports whether it inserted
+or updated and what the previous rating and review date were, so the movie,
+user and daily aggregates and the catalog version are adjusted by exact
+deltas in the same transaction,
+with no existence check or SELECT ... FOR UPDATE beforehand. Deleting a
+movie takes its cascading reviews out of the reviewers' counters the same
+way.
+"""
+
+import mysql.connector
+
+import catalog_cache
+import rating_stats
+
+# LAST_INSERT_ID(expr) on the update branch hands the pre-update rating and
+# review date back to the client as the statement's insert id, packed as
+# rating << 32 | unix timestamp. Assignments run left to right, so `rating`
+# and `review_date` inside it are still the old values.
+UPSERT_SQL = """
+    INSERT INTO reviews (user_id, movie_id, rating, comment)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        rating = IF(
+            LAST_INSERT_ID((COALESCE(rating, 0) << 32) | COALESCE(UNIX_TIMESTAMP(review_date), 0)),
+            VALUES(rating), VALUES(rating)
+        ),
+        comment = VALUES(comment),
+        review_date = NOW()
+"""
+
+# MySQL error for an INSERT whose foreign key has no parent row
+ER_NO_REFERENCED_ROW_2 = 1452
+
+
+class ReviewTargetMissing(Exception):
+    """The movie (or user) being reviewed does not exist."""
+
+
+def upsert_review(cursor, user_id, movie_id, rating, comment):
+    """
+    Write the review and return (previous rating, previous review date as a
+    Unix timestamp), or (None, None) if it is new. Relies on the default
+    affected-rows semantics (no CLIENT_FOUND_ROWS): 1 for an insert, 2 for a
+    changed row, 0 for an identical one.
+    """
+    try:
+        cursor.execute(UPSERT_SQL, (user_id, movie_id, rating, comment))
+    except mysql.connector.IntegrityError as e:
+        if e.errno == ER_NO_REFERENCED_ROW_2:
+            missing = "Movie" if "`movie_id`" in (e.msg or "") else "User"
+            raise ReviewTargetMissing(f"{missing} not found")
+        raise
+    if cursor.rowcount == 1:
+        return None, None
+    # Unchanged rows still ran the update branch; fall back to the same rating.
+    packed = cursor.lastrowid or 0
+    return (packed >> 32) or rating, (packed & 0xFFFFFFFF) or None
+
+
+def write_review(conn, user_id, movie_id, rating, comment):
+    """
+    Upsert a review and apply its aggregate and cache side effects, then
+    commit. Returns (previous rating or None, new catalog version, the
+    reviewer's new review_version).
+    """
+    cursor = conn.cursor()
+    try:
+        old_rating, old_review_ts = upsert_review(cursor, user_id, movie_id, rating, comment)
+        # 0 affected rows: an identical rewrite within the same second, same day bucket.
+        moved = cursor.rowcount != 0
+        rating_stats.apply_review_delta(cursor, movie_id, rating, old_rating=old_rating)
+        review_version = rating_stats.apply_user_delta(cursor, user_id, rating, old_rating=old_rating)
+        if moved:
+            rating_stats.apply_daily_delta(
+                cursor, movie_id, old_rating is None, old_review_ts=old_review_ts
+            )
+        version = catalog_cache.bump(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return old_rating, version, review_version
+
+
+def delete_movie(conn, movie_id):
+    """
+    Delete a movie, whose reviews cascade away with it, after taking those
+    reviews out of their reviewers' counters, then commit. Returns (movies
+    deleted, new catalog version).
+    """
+    cursor = conn.cursor()
+    try:
+        rating_stats.remove_movie_reviews(cursor, movie_id)
+        cursor.execute("DELETE FROM movies WHERE movie_id = %s", (movie_id,))
+        deleted = cursor.rowcount
+        version = catalog_cache.bump(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return deleted, version
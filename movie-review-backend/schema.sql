@@ -37,6 +37,77 @@ CREATE TABLE IF NOT EXISTS reviews (
     FOREIGN KEY (movie_id) REFERENCES movies(movie_id) ON DELETE CASCADE
 );
 
+-- Per-movie rating aggregates, maintained incrementally by the review write path
+-- (see rating_stats.py; `python rating_stats.py verify|rebuild` checks/fixes drift)
+CREATE TABLE IF NOT EXISTS movie_rating_stats (
+    movie_id INT PRIMARY KEY,
+    rating_sum INT NOT NULL DEFAULT 0,
+    review_count INT NOT NULL DEFAULT 0,
+    star_1 INT NOT NULL DEFAULT 0,
+    star_2 INT NOT NULL DEFAULT 0,
+    star_3 INT NOT NULL DEFAULT 0,
+    star_4 INT NOT NULL DEFAULT 0,
+    star_5 INT NOT NULL DEFAULT 0,
+    last_review_at DATETIME NULL,
+    review_version INT NOT NULL DEFAULT 0,
+    avg_rating DECIMAL(6,4) AS (IF(review_count > 0, rating_sum / review_count, 0)) STORED,
+    INDEX idx_rating_stats_avg (avg_rating, review_count),
+    INDEX idx_rating_stats_avg_id (avg_rating, movie_id),
+    INDEX idx_rating_stats_count (review_count),
+    FOREIGN KEY (movie_id) REFERENCES movies(movie_id) ON DELETE CASCADE
+);
+
+-- Per-user review counters, maintained by the same review write path
+CREATE TABLE IF NOT EXISTS user_review_stats (
+    user_id INT PRIMARY KEY,
+    rating_sum INT NOT NULL DEFAULT 0,
+    review_count INT NOT NULL DEFAULT 0,
+    last_review_at DATETIME NULL,
+    review_version INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+-- Reviews per movie per day of their latest write (last 30 days), for recent-activity counts
+CREATE TABLE IF NOT EXISTS movie_review_daily (
+    movie_id INT NOT NULL,
+    day DATE NOT NULL,
+    review_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (movie_id, day),
+    FOREIGN KEY (movie_id) REFERENCES movies(movie_id) ON DELETE CASCADE
+);
+
+-- Precomputed per-user recommendation lists (recommendations.py refresh worker)
+CREATE TABLE IF NOT EXISTS user_recommendations (
+    user_id INT NOT NULL,
+    algorithm VARCHAR(32) NOT NULL,
+    rank_pos SMALLINT NOT NULL,
+    movie_id INT NOT NULL,
+    recommendation_reason VARCHAR(255),
+    explanation_type VARCHAR(32),
+    PRIMARY KEY (user_id, algorithm, rank_pos),
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
+    FOREIGN KEY (movie_id) REFERENCES movies(movie_id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS user_recommendation_state (
+    user_id INT NOT NULL,
+    algorithm VARCHAR(32) NOT NULL,
+    review_version INT NOT NULL DEFAULT 0,
+    preferred_genres JSON,
+    watch_count INT NOT NULL DEFAULT 0,
+    computed_at DATETIME NOT NULL,
+    PRIMARY KEY (user_id, algorithm),
+    INDEX idx_recommendation_state_age (computed_at),
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+-- Catalog version: bumped by every catalog/review write so per-worker caches can invalidate
+CREATE TABLE IF NOT EXISTS catalog_version (
+    id TINYINT PRIMARY KEY,
+    version BIGINT NOT NULL
+);
+INSERT IGNORE INTO catalog_version (id, version) VALUES (1, 1);
+
 -- =============================================
 -- OPTIMIZED INDEXES FOR PERFORMANCE
 -- =============================================
@@ -49,12 +120,31 @@ CREATE INDEX IF NOT EXISTS idx_movies_genre ON movies(genre);
 CREATE INDEX IF NOT EXISTS idx_movies_release_year ON movies(release_year);
 CREATE INDEX IF NOT EXISTS idx_movies_language ON movies(language);
 
+-- Bulk ingestion: natural key for upserts (ingest.py)
+CREATE UNIQUE INDEX IF NOT EXISTS uq_movies_title_year ON movies(title, release_year);
+
+-- Search optimization: Full-text index for /api/movies/search text queries
+CREATE FULLTEXT INDEX IF NOT EXISTS ft_movies_title_description ON movies(title, description);
+
+-- Mood-based discovery: mood -> genre mapping (seeded from moods.py at startup)
+CREATE TABLE IF NOT EXISTS mood_genres (
+    mood VARCHAR(20) NOT NULL,
+    genre VARCHAR(50) NOT NULL,
+    PRIMARY KEY (mood, genre),
+    INDEX idx_mood_genres_genre (genre)
+);
+
 -- Sorting optimization: Composite index for rating queries
 CREATE INDEX IF NOT EXISTS idx_reviews_movie_rating ON reviews(movie_id, rating);
 
 -- Join optimization: Foreign key indexes
 CREATE INDEX IF NOT EXISTS idx_reviews_user_id ON reviews(user_id);
 
+-- Review feeds: keyset pages on (review_date, review_id) per movie / per user
+-- (the user index also covers the min_rating filter)
+CREATE INDEX IF NOT EXISTS idx_reviews_movie_date ON reviews(movie_id, review_date DESC, review_id DESC);
+CREATE INDEX IF NOT EXISTS idx_reviews_user_date ON reviews(user_id, review_date DESC, review_id DESC, rating);
+
 -- Performance: Recent movies and reviews
 CREATE INDEX IF NOT EXISTS idx_movies_id ON movies(movie_id);
 CREATE INDEX IF NOT EXISTS idx_reviews_movie_id ON reviews(movie_id);
@@ -0,0 +1,480 @@
+"""
+Similar Movies Index
+Precomputed "more like this" neighbours for every movie. Similarity blends
+content features (genre, with partial credit for genres that share a mood;
+language; release-year distance) with co-rating similarity from reviews
+(item_cf.centred_columns). Each movie keeps its top-K neighbours as movie
+ids and scores in fixed-width int32/float32 arrays next to its encoded
+features, saved as one .npz file that workers load and look up in memory.
+
+Catalog edits patch the file in place instead of waiting for the next bulk
+build; the app queues them on a Patcher, which applies them in batches off
+the request path. Bulk builds:
+
+    python similar_movies.py build
+    python similar_movies.py build --k 40 --out /srv/models/similar.npz
+"""
+
+import argparse
+import fcntl
+import logging
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+import item_cf
+import moods
+
+DEFAULT_K = 20
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_data", "similar.npz")
+# Weights of the blended score; each component is in [0, 1].
+WEIGHTS = {"genre": 0.4, "language": 0.15, "year": 0.15, "co_rating": 0.3}
+MOOD_GENRE_CREDIT = 0.5
+YEAR_SCALE = 10.0  # years for year similarity to fall to 1/e
+BLOCK_CELLS = 4_000_000
+UNKNOWN = -1
+
+logger = logging.getLogger("movie-review-backend")
+
+
+def _genre_affinity(genres):
+    """(g x g) similarity of lower-cased genres: 1 for the same genre, partial for a shared mood."""
+    index = {genre: i for i, genre in enumerate(genres)}
+    affinity = np.eye(len(genres), dtype=np.float32)
+    for mood in moods.MOODS.values():
+        members = [index[g.lower()] for g in mood["genres"] if g.lower() in index]
+        for a in members:
+            for b in members:
+                if a != b:
+                    affinity[a, b] = max(affinity[a, b], MOOD_GENRE_CREDIT)
+    return affinity
+
+
+def _encode(values, vocabulary):
+    """Codes of `values` in `vocabulary` (extended in place), UNKNOWN for blanks."""
+    lookup = {value: i for i, value in enumerate(vocabulary)}
+    codes = np.full(len(values), UNKNOWN, dtype=np.int16)
+    for i, value in enumerate(values):
+        value = (value or "").strip().lower()
+        if not value:
+            continue
+        if value not in lookup:
+            lookup[value] = len(vocabulary)
+            vocabulary.append(value)
+        codes[i] = lookup[value]
+    return codes
+
+
+class SimilarIndex:
+    """
+    Row i describes movie movie_ids[i] (sorted): neighbors[i] / scores[i]
+    hold its top-K similar movie ids and scores, best first, padded with
+    -1 / 0. genre / language codes and years are kept so single movies can
+    be re-scored against the catalog without touching MySQL.
+    """
+
+    def __init__(self, movie_ids, neighbors, scores, genre_codes, language_codes, years,
+                 genres, languages, built_at, updates=0):
+        self.movie_ids = movie_ids
+        self.neighbors = neighbors
+        self.scores = scores
+        self.genre_codes = genre_codes
+        self.language_codes = language_codes
+        self.years = years
+        self.genres = list(genres)
+        self.languages = list(languages)
+        self.built_at = float(built_at)
+        self.updates = int(updates)
+        self._genre_weights = np.zeros((0, 0), dtype=np.float32)
+
+    @property
+    def version(self):
+        return f"{int(self.built_at)}.{self.updates}"
+
+    @property
+    def k(self):
+        return self.neighbors.shape[1]
+
+    def lookup(self, movie_id, limit):
+        """(movie ids, scores) of the movie's neighbours; None if it is not indexed."""
+        row = np.searchsorted(self.movie_ids, movie_id)
+        if row >= len(self.movie_ids) or self.movie_ids[row] != movie_id:
+            return None
+        neighbors = self.neighbors[row, :limit]
+        valid = neighbors >= 0
+        return neighbors[valid].tolist(), self.scores[row, :limit][valid].tolist()
+
+    def _genre_table(self):
+        """
+        Weighted genre affinity indexed by genre_code + 1, so row / column 0
+        ("unknown") matches nothing. Rebuilt only when the vocabulary grows.
+        """
+        if len(self._genre_weights) != len(self.genres) + 1:
+            table = np.zeros((len(self.genres) + 1, len(self.genres) + 1), dtype=np.float32)
+            table[1:, 1:] = WEIGHTS["genre"] * _genre_affinity(self.genres)
+            self._genre_weights = table
+        return self._genre_weights
+
+    def content_scores(self, genre_codes, language_codes, years):
+        """(len(codes) x catalog) weighted content similarity."""
+        table = self._genre_table()
+        rows, cols = genre_codes.astype(np.int32) + 1, self.genre_codes.astype(np.int32) + 1
+        # Gather along whichever axis leaves the smaller intermediate.
+        if len(rows) <= len(table):
+            scores = table[rows][:, cols]
+        else:
+            scores = np.take(table[:, cols], rows, axis=0)
+        # An unknown language matches nothing, not other unknowns.
+        languages = np.where(language_codes == UNKNOWN, UNKNOWN - 1, language_codes)
+        scores += np.float32(WEIGHTS["language"]) * (languages[:, None] == self.language_codes)
+        # Year similarity by gap, with code 0 for an unknown year.
+        known = np.concatenate([years[years > 0], self.years[self.years > 0]])
+        if len(known):
+            first = int(known.min())
+            span = int(known.max()) - first + 1
+            gap = np.abs(np.arange(span)[:, None] - np.arange(span)[None, :])
+            year_table = np.zeros((span + 1, span + 1), dtype=np.float32)
+            year_table[1:, 1:] = WEIGHTS["year"] * np.exp(-gap / YEAR_SCALE)
+            row_codes = np.where(years > 0, years.astype(np.int32) - first + 1, 0)
+            col_codes = np.where(self.years > 0, self.years.astype(np.int32) - first + 1, 0)
+            scores += np.take(year_table[row_codes], col_codes, axis=1)
+        return scores
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp.npz"
+        np.savez(
+            tmp, movie_ids=self.movie_ids, neighbors=self.neighbors, scores=self.scores,
+            genre_codes=self.genre_codes, language_codes=self.language_codes, years=self.years,
+            genres=np.array(self.genres, dtype=str), languages=np.array(self.languages, dtype=str),
+            built_at=self.built_at, updates=self.updates,
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(
+                data["movie_ids"], data["neighbors"], data["scores"], data["genre_codes"],
+                data["language_codes"], data["years"], data["genres"].tolist(),
+                data["languages"].tolist(), data["built_at"], data["updates"],
+            )
+
+
+def _top_k(block_scores, self_cols, movie_ids, k):
+    """
+    Per-row top-k (movie ids, scores) of a dense block, excluding each row's
+    own movie (column self_cols[r] of row r).
+    """
+    block_scores[np.arange(len(block_scores)), self_cols] = -np.inf
+    k = min(k, block_scores.shape[1])
+    neighbors = np.full((len(block_scores), k), -1, dtype=np.int32)
+    scores = np.zeros((len(block_scores), k), dtype=np.float32)
+    if k <= 0:
+        return neighbors, scores
+    best = np.argpartition(-block_scores, k - 1, axis=1)[:, :k]
+    best_scores = np.take_along_axis(block_scores, best, axis=1)
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    best = np.take_along_axis(best, order, axis=1)
+    best_scores = np.take_along_axis(best_scores, order, axis=1)
+    valid = np.isfinite(best_scores) & (best_scores > 0)
+    neighbors[valid] = movie_ids[best[valid]]
+    scores[valid] = best_scores[valid]
+    return neighbors, scores
+
+
+def build(movies, user_ids, movie_ids, ratings, k=DEFAULT_K):
+    """
+    Build a SimilarIndex from (movie_id, genre, language, release_year) rows
+    and parallel rating arrays.
+    """
+    movies = sorted(movies, key=lambda row: row[0])
+    catalog = np.array([row[0] for row in movies], dtype=np.int32)
+    genres, languages = [], []
+    index = SimilarIndex(
+        catalog,
+        np.empty((len(catalog), 0), dtype=np.int32),
+        np.empty((len(catalog), 0), dtype=np.float32),
+        _encode([row[1] for row in movies], genres),
+        _encode([row[2] for row in movies], languages),
+        np.array([int(row[3] or 0) for row in movies], dtype=np.int16),
+        genres, languages, time.time(),
+    )
+
+    if not len(catalog):
+        index.neighbors = np.empty((0, k), dtype=np.int32)
+        index.scores = np.empty((0, k), dtype=np.float32)
+        return index
+
+    # Co-rating similarity, with the rated items' rows moved onto catalog rows.
+    rated, by_item, _ = item_cf.centred_columns(user_ids, movie_ids, ratings)
+    catalog_rows = np.searchsorted(catalog, rated)
+    in_catalog = (catalog_rows < len(catalog)) & (catalog[np.minimum(catalog_rows, len(catalog) - 1)] == rated)
+    placement = sp.csr_matrix(
+        (np.ones(in_catalog.sum(), dtype=np.float32), (catalog_rows[in_catalog], np.flatnonzero(in_catalog))),
+        shape=(len(catalog), len(rated)),
+    )
+    by_movie = (placement @ by_item).tocsr()
+    by_user = by_movie.T.tocsr()
+
+    neighbors = np.full((len(catalog), k), -1, dtype=np.int32)
+    scores = np.zeros((len(catalog), k), dtype=np.float32)
+    step = max(1, BLOCK_CELLS // max(len(catalog), 1))
+    for start in range(0, len(catalog), step):
+        stop = min(len(catalog), start + step)
+        block = index.content_scores(
+            index.genre_codes[start:stop], index.language_codes[start:stop], index.years[start:stop]
+        )
+        co = (by_movie[start:stop] @ by_user).toarray()
+        block += WEIGHTS["co_rating"] * np.maximum(co, 0, out=co)
+        top_neighbors, top_scores = _top_k(block, np.arange(start, stop), catalog, k)
+        neighbors[start:stop, :top_neighbors.shape[1]] = top_neighbors
+        scores[start:stop, :top_scores.shape[1]] = top_scores
+    index.neighbors, index.scores = neighbors, scores
+    return index
+
+
+def _place(index, movie_id):
+    """Row of movie_id, inserting an empty row (kept sorted) if it is new."""
+    row = int(np.searchsorted(index.movie_ids, movie_id))
+    if row < len(index.movie_ids) and index.movie_ids[row] == movie_id:
+        return row
+    index.movie_ids = np.insert(index.movie_ids, row, movie_id)
+    index.neighbors = np.insert(index.neighbors, row, -1, axis=0)
+    index.scores = np.insert(index.scores, row, 0, axis=0)
+    index.genre_codes = np.insert(index.genre_codes, row, UNKNOWN)
+    index.language_codes = np.insert(index.language_codes, row, UNKNOWN)
+    index.years = np.insert(index.years, row, 0)
+    return row
+
+
+def _drop_from_lists(index, movie_id):
+    """Remove movie_id from every neighbour list, shifting the rest up."""
+    hit = index.neighbors == movie_id
+    rows = np.flatnonzero(hit.any(axis=1))
+    if not len(rows):
+        return
+    scores = np.where(hit[rows], -np.inf, index.scores[rows])
+    order = np.argsort(-scores, axis=1, kind="stable")
+    neighbors = np.take_along_axis(index.neighbors[rows], order, axis=1)
+    scores = np.take_along_axis(scores, order, axis=1)
+    neighbors[~np.isfinite(scores)] = -1
+    scores[~np.isfinite(scores)] = 0
+    index.neighbors[rows], index.scores[rows] = neighbors, scores
+
+
+def apply_update(index, movie_id, genre, language, release_year):
+    """
+    Re-score one added or edited movie against the catalog: its own row is
+    rebuilt from content plus the co-rating share of its previous scores,
+    and every other list gains, re-scores or loses it as its score demands.
+    """
+    row = _place(index, movie_id)
+    old_neighbors, old_scores = index.neighbors[row].copy(), index.scores[row].copy()
+    old_content = np.zeros(index.k, dtype=np.float32)
+    valid = old_neighbors >= 0
+    if valid.any():
+        cols = np.searchsorted(index.movie_ids, old_neighbors[valid])
+        old_content[valid] = index.content_scores(
+            index.genre_codes[row:row + 1], index.language_codes[row:row + 1], index.years[row:row + 1]
+        )[0, cols]
+
+    index.genre_codes[row] = _encode([genre], index.genres)[0]
+    index.language_codes[row] = _encode([language], index.languages)[0]
+    try:
+        index.years[row] = int(release_year or 0)
+    except (TypeError, ValueError):
+        index.years[row] = 0
+
+    # Content changed; the co-rating share of the old scores did not.
+    scores = index.content_scores(
+        index.genre_codes[row:row + 1], index.language_codes[row:row + 1], index.years[row:row + 1]
+    )[0]
+    if valid.any():
+        cols = np.searchsorted(index.movie_ids, old_neighbors[valid])
+        scores[cols] += np.maximum(old_scores[valid] - old_content[valid], 0)
+    neighbors, top = _top_k(scores[None, :].copy(), [row], index.movie_ids, index.k)
+    index.neighbors[row], index.scores[row] = -1, 0
+    index.neighbors[row, :neighbors.shape[1]], index.scores[row, :top.shape[1]] = neighbors[0], top[0]
+
+    # Symmetric update of everyone else's list.
+    _drop_from_lists(index, movie_id)
+    scores[row] = 0
+    weakest = index.scores[:, -1]
+    gains = np.flatnonzero((scores > weakest) & (scores > 0))
+    if len(gains):
+        index.neighbors[gains, -1] = movie_id
+        index.scores[gains, -1] = scores[gains]
+        order = np.argsort(-index.scores[gains], axis=1, kind="stable")
+        index.neighbors[gains] = np.take_along_axis(index.neighbors[gains], order, axis=1)
+        index.scores[gains] = np.take_along_axis(index.scores[gains], order, axis=1)
+    index.updates += 1
+    return index
+
+
+def apply_removal(index, movie_id):
+    """Forget a deleted movie: its row and its place in every list."""
+    row = int(np.searchsorted(index.movie_ids, movie_id))
+    if row < len(index.movie_ids) and index.movie_ids[row] == movie_id:
+        keep = np.arange(len(index.movie_ids)) != row
+        index.movie_ids = index.movie_ids[keep]
+        index.neighbors, index.scores = index.neighbors[keep], index.scores[keep]
+        index.genre_codes, index.language_codes = index.genre_codes[keep], index.language_codes[keep]
+        index.years = index.years[keep]
+    _drop_from_lists(index, movie_id)
+    index.updates += 1
+    return index
+
+
+def patch(path, changes):
+    """
+    Apply each `change(index, *args)` of (change, args) pairs to the index
+    file under an exclusive lock (so workers patching concurrently do not
+    lose each other's edits), saving once. Returns the patched index and the
+    file's mtime read under the lock, or (None, None) if no index has been
+    built.
+    """
+    if not os.path.exists(path):
+        return None, None
+    with open(f"{path}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        index = SimilarIndex.load(path)
+        for change, args in changes:
+            index = change(index, *args)
+        index.save(path)
+        mtime = os.stat(path).st_mtime
+    return index, mtime
+
+
+def update_movie(path, movie_id, genre, language, release_year):
+    return patch(path, [(apply_update, (movie_id, genre, language, release_year))])[0]
+
+
+def remove_movie(path, movie_id):
+    return patch(path, [(apply_removal, (movie_id,))])[0]
+
+
+class Patcher:
+    """
+    Applies catalog edits to the index file off the request path. Edits
+    queue per worker; a background thread waits `delay` seconds for more to
+    arrive, then applies everything queued with one load / save of the file
+    and hands the result to `on_patched(index, mtime)`, with the mtime of
+    the file it saved. close() applies what is left; it runs at interpreter
+    exit.
+    """
+
+    def __init__(self, path, on_patched, delay=1.0):
+        self.path = path
+        self.on_patched = on_patched
+        self.delay = delay
+        self._cond = threading.Condition()
+        self._changes = []
+        self._thread = None
+        self._pid = None
+        self._closed = False
+        self._counters = {"queued": 0, "applied": 0, "failed": 0, "batches": 0}
+
+    def update_movie(self, movie_id, genre, language, release_year):
+        self._submit(apply_update, (movie_id, genre, language, release_year))
+
+    def remove_movie(self, movie_id):
+        self._submit(apply_removal, (movie_id,))
+
+    def _submit(self, change, args):
+        with self._cond:
+            if self._closed:
+                return
+            self._start()
+            self._changes.append((change, args))
+            self._counters["queued"] += 1
+            self._cond.notify()
+
+    def _start(self):
+        # Started on first use, so forked workers each run their own patcher.
+        if self._thread is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="similar-index-patcher", daemon=True)
+            self._thread.start()
+
+    def _take(self):
+        """Wait for edits and let more gather for `delay`; an empty list once closed and drained."""
+        with self._cond:
+            while not self._changes and not self._closed:
+                self._cond.wait()
+            if not self._closed:
+                self._cond.wait(self.delay)
+            changes, self._changes = self._changes, []
+            return changes
+
+    def _run(self):
+        while True:
+            changes = self._take()
+            if not changes:
+                return
+            try:
+                index, mtime = patch(self.path, changes)
+            except (OSError, ValueError, KeyError):
+                # The index stays stale until the next build.
+                logger.exception("Failed to apply %d edits to the similar-movies index", len(changes))
+                with self._cond:
+                    self._counters["failed"] += len(changes)
+                continue
+            with self._cond:
+                self._counters["applied"] += len(changes)
+                self._counters["batches"] += 1
+            if index is not None:
+                self.on_patched(index, mtime)
+
+    def close(self, timeout=10.0):
+        """Stop accepting edits and wait up to `timeout` seconds for queued ones to be applied."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread if self._pid == os.getpid() else None
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._counters)
+            stats["pending"] = len(self._changes)
+            return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the similar-movies index")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--k", type=int, default=DEFAULT_K, help="neighbours kept per movie")
+    parser.add_argument("--out", default=os.getenv("SIMILAR_INDEX", DEFAULT_PATH))
+    args = parser.parse_args(argv)
+
+    from app import get_db
+
+    conn = get_db()
+    try:
+        started = time.monotonic()
+        cursor = conn.cursor()
+        cursor.execute("SELECT movie_id, genre, language, release_year FROM movies")
+        movies = cursor.fetchall()
+        user_ids, movie_ids, ratings = item_cf.load_ratings(conn)
+    finally:
+        conn.close()
+    loaded = time.monotonic()
+    index = build(movies, user_ids, movie_ids, ratings, args.k)
+    with open(f"{args.out}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        index.save(args.out)
+    print(
+        f"{len(movies)} movies, {len(ratings)} ratings: loaded in {loaded - started:.1f}s, "
+        f"built in {time.monotonic() - loaded:.1f}s -> {args.out}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
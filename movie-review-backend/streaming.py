@@ -0,0 +1,172 @@
+"""
+Streaming JSON Responses
+Reads query results in fetchmany() batches and emits a JSON array (or NDJSON)
+incrementally, compressed with brotli/gzip when the client accepts it, so
+worker memory and time-to-first-byte do not grow with the result size.
+"""
+
+import zlib
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+CHUNK_ROWS = 500
+
+
+def negotiate_encoding(accept_encodings):
+    """Pick a Content-Encoding from werkzeug's request.accept_encodings."""
+    if brotli is not None and accept_encodings["br"] > 0:
+        return "br"
+    if accept_encodings["gzip"] > 0:
+        return "gzip"
+    return None
+
+
+class _Encoder:
+    """Incremental compressor that flushes after every chunk so bytes go out immediately."""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._gzip = zlib.compressobj(6, zlib.DEFLATED, 31)
+        elif encoding == "br":
+            self._brotli = brotli.Compressor(quality=5)
+
+    def feed(self, data):
+        if self.encoding == "gzip":
+            return self._gzip.compress(data) + self._gzip.flush(zlib.Z_SYNC_FLUSH)
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return data
+
+    def finish(self):
+        if self.encoding == "gzip":
+            return self._gzip.flush()
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return b""
+
+
+def iter_rows(conn, sql, params=(), chunk_rows=CHUNK_ROWS):
+    """
+    Execute `sql` on an unbuffered cursor and return a generator of row
+    batches. The query runs before this returns, so SQL errors surface while
+    the handler can still answer 500.
+    """
+    cursor = conn.cursor(dictionary=True, buffered=False)
+    cursor.execute(sql, params)
+
+    def batches():
+        exhausted = False
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_rows)
+                if not rows:
+                    exhausted = True
+                    return
+                yield rows
+        finally:
+            if not exhausted:
+                # Client went away mid-stream; drain so the connection is reusable.
+                try:
+                    conn.consume_results()
+                except Exception:
+                    pass
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+    return batches()
+
+
+def json_chunks(batches, dumps, fmt="json", transform=None, prefix=b"", suffix=None):
+    """
+    Serialize row batches as a JSON array (fmt="json") or one object per
+    line (fmt="ndjson"); `dumps` must return bytes. `prefix` and the
+    `suffix()` callback wrap the array, letting callers emit trailing
+    aggregates computed while rows streamed.
+    """
+    if fmt == "ndjson":
+        for rows in batches:
+            yield b"".join(dumps(transform(r) if transform else r) + b"\n" for r in rows)
+        return
+
+    yield prefix + b"["
+    first = True
+    for rows in batches:
+        body = b",".join(dumps(transform(r) if transform else r) for r in rows)
+        yield body if first else b"," + body
+        first = False
+    yield b"]" + (suffix() if suffix else b"")
+
+
+def encode(chunks, encoding, on_complete=None, max_kept=None):
+    """
+    Compress a chunk stream. When `on_complete` is given it receives the full
+    encoded body after the last chunk (used to fill the catalog cache),
+    unless the body grew past `max_kept` bytes: it is then no longer held
+    in memory and on_complete is skipped.
+    """
+    encoder = _Encoder(encoding)
+    kept = [] if on_complete else None
+    kept_bytes = 0
+
+    def keep(out):
+        nonlocal kept, kept_bytes
+        if kept is None:
+            return
+        kept_bytes += len(out)
+        if max_kept is not None and kept_bytes > max_kept:
+            kept = None
+        else:
+            kept.append(out)
+
+    for chunk in chunks:
+        out = encoder.feed(chunk)
+        if out:
+            keep(out)
+            yield out
+    tail = encoder.finish()
+    if tail:
+        keep(tail)
+        yield tail
+    if kept is not None:
+        on_complete(b"".join(kept))
+
+
+class ClosingBody:
+    """
+    Response iterable that runs cleanup callbacks when the server closes it,
+    even if iteration never started (generators skip `finally` in that case).
+    """
+
+    def __init__(self, chunks, *callbacks):
+        self._chunks = chunks
+        self._callbacks = callbacks
+
+    def __iter__(self):
+        return iter(self._chunks)
+
+    def close(self):
+        try:
+            close = getattr(self._chunks, "close", None)
+            if close:
+                close()
+        finally:
+            for callback in self._callbacks:
+                callback()
+
+
+def mimetype_for(fmt):
+    return "application/x-ndjson" if fmt == "ndjson" else "application/json"
+
+
+def encoded_response(response_class, body, fmt, encoding, status=200):
+    """Response for a (possibly streamed) body produced by encode()."""
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return response_class(body, status=status, mimetype=mimetype_for(fmt), headers=headers)
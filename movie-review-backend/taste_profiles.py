@@ -0,0 +1,248 @@
+"""
+Taste Profiles
+Per-worker LRU of compact per-user taste records, read by the rule-based
+recommender (recommendations.compute), the item-cf and ALS recommenders and
+the explanation endpoints instead of each querying the user's reviews.
+
+A profile holds the user's reviews as parallel arrays sorted by movie id
+(the sorted ids double as the reviewed set), and per-genre rating sum,
+rated count and watch count vectors indexed by a per-worker genre
+dictionary. It is tagged with the user_review_stats.review_version it was
+read at; a request carrying another version reloads it. This worker's own
+review writes patch the profile from a single-row read instead (see
+record_review), and profiles older than `max_age` seconds are re-read so
+other workers' catalog edits (a movie's genre, deletions) show up.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+import recommendations
+
+NO_GENRE = -1
+
+
+class GenreDictionary:
+    """Genre name -> code. Genres compare case-insensitively, like MySQL's default collation."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._codes = {}
+        self.names = []  # first spelling seen of each genre
+
+    def code(self, genre):
+        if genre is None:
+            return NO_GENRE
+        key = genre.lower()
+        with self._lock:
+            code = self._codes.get(key)
+            if code is None:
+                code = self._codes[key] = len(self.names)
+                self.names.append(genre)
+            return code
+
+    def name(self, code):
+        return None if code == NO_GENRE else self.names[code]
+
+
+class TasteProfile:
+    """One user's reviews and genre affinity vectors. Never modified once built."""
+
+    def __init__(self, genres, version, movie_ids, ratings, times, genre_codes):
+        order = np.argsort(movie_ids, kind="stable")
+        self.genres = genres
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.movie_ids = np.asarray(movie_ids, dtype=np.int64)[order]
+        self.ratings = np.asarray(ratings, dtype=np.float32)[order]  # NaN: no rating
+        self.times = np.asarray(times, dtype=np.int64)[order]  # review_date as Unix time
+        self.genre_codes = np.asarray(genre_codes, dtype=np.int32)[order]
+
+        has_genre = self.genre_codes != NO_GENRE
+        rated = has_genre & ~np.isnan(self.ratings)
+        size = int(self.genre_codes.max()) + 1 if has_genre.any() else 0
+        self.genre_watch = np.bincount(self.genre_codes[has_genre], minlength=size).astype(np.int32)
+        self.genre_rated = np.bincount(self.genre_codes[rated], minlength=size).astype(np.int32)
+        self.genre_sum = np.bincount(self.genre_codes[rated], weights=self.ratings[rated], minlength=size)
+
+    def has_reviewed(self, movie_id):
+        i = np.searchsorted(self.movie_ids, movie_id)
+        return i < len(self.movie_ids) and self.movie_ids[i] == movie_id
+
+    def watched(self):
+        return self.movie_ids.tolist()
+
+    def ratings_by_movie(self):
+        """{movie_id: rating} of everything rated, as recommendations.user_ratings returns it."""
+        rated = ~np.isnan(self.ratings)
+        return dict(zip(self.movie_ids[rated].tolist(), self.ratings[rated].astype(int).tolist()))
+
+    def preferred_genres(self, min_average=4.0):
+        """
+        Rows {genre, avg_rating, watch_count} of genres averaging at least
+        min_average, best average first, then most watched, then by name.
+        """
+        avg = np.divide(
+            self.genre_sum, self.genre_rated, out=np.zeros(len(self.genre_sum)), where=self.genre_rated > 0
+        )
+        codes = np.flatnonzero((self.genre_rated > 0) & (avg >= min_average))
+        rows = [
+            {"genre": self.genres.name(code), "avg_rating": float(avg[code]), "watch_count": int(self.genre_watch[code])}
+            for code in codes.tolist()
+        ]
+        rows.sort(key=lambda row: (-row["avg_rating"], -row["watch_count"], row["genre"].lower()))
+        return rows
+
+    def _at_least(self, min_rating, order):
+        """The positions in `order` rated at least min_rating."""
+        return order[np.nan_to_num(self.ratings[order], nan=-np.inf) >= min_rating]
+
+    def top_rated(self, min_rating, count):
+        """
+        {movie_id, rating, genre} of the best `count` reviews rated at least
+        min_rating, best rated then newest first.
+        """
+        order = np.lexsort((self.movie_ids, -self.times, -np.nan_to_num(self.ratings, nan=-np.inf)))
+        return [
+            {"movie_id": int(self.movie_ids[i]), "rating": int(self.ratings[i]),
+             "genre": self.genres.name(int(self.genre_codes[i]))}
+            for i in self._at_least(min_rating, order)[:count].tolist()
+        ]
+
+    def recent_genres(self, min_rating, count):
+        """Genres (None for none) of the `count` newest reviews rated at least min_rating."""
+        order = np.lexsort((self.movie_ids, -self.times))
+        return [self.genres.name(int(self.genre_codes[i])) for i in self._at_least(min_rating, order)[:count].tolist()]
+
+    def with_review(self, version, movie_id, rating, review_time, genre_code):
+        """A copy with one review added or replaced, at `version`."""
+        keep = self.movie_ids != movie_id
+        return TasteProfile(
+            self.genres,
+            version,
+            np.append(self.movie_ids[keep], movie_id),
+            np.append(self.ratings[keep], np.nan if rating is None else rating),
+            np.append(self.times[keep], review_time),
+            np.append(self.genre_codes[keep], genre_code),
+        )
+
+
+REVIEWS_SQL = """
+    SELECT r.movie_id, r.rating, COALESCE(UNIX_TIMESTAMP(r.review_date), 0), m.genre
+    FROM reviews r
+    JOIN movies m ON m.movie_id = r.movie_id
+    WHERE r.user_id = %s
+"""
+
+
+def load(conn, genres, user_id, version):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(REVIEWS_SQL, (user_id,))
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    return TasteProfile(
+        genres,
+        version,
+        [row[0] for row in rows],
+        [np.nan if row[1] is None else row[1] for row in rows],
+        [int(row[2]) for row in rows],
+        [genres.code(row[3]) for row in rows],
+    )
+
+
+class TasteProfiles:
+    def __init__(self, max_entries=50000, max_age=300.0):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.genres = GenreDictionary()
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # user_id -> TasteProfile
+        self._counters = {"hits": 0, "misses": 0, "updates": 0, "invalidations": 0, "evictions": 0}
+
+    def _put(self, user_id, profile):
+        with self._lock:
+            self._entries[user_id] = profile
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def get(self, conn, user_id, version=None):
+        """
+        The user's profile at their current review_version (read from
+        user_review_stats unless the caller already has it).
+        """
+        if version is None:
+            cursor = conn.cursor()
+            try:
+                version = recommendations.review_version(cursor, user_id)
+            finally:
+                cursor.close()
+        with self._lock:
+            profile = self._entries.get(user_id)
+            if (
+                profile is not None
+                and profile.version == version
+                and time.monotonic() - profile.loaded_at < self.max_age
+            ):
+                self._entries.move_to_end(user_id)
+                self._counters["hits"] += 1
+                return profile
+            self._counters["misses"] += 1
+        # Read after the version: a review landing in between makes the next request reload.
+        profile = load(conn, self.genres, user_id, version)
+        self._put(user_id, profile)
+        return profile
+
+    def record_review(self, conn, user_id, movie_id, version):
+        """
+        Patch a cached profile after this worker wrote one of the user's
+        reviews, taking them to review_version `version`. A profile that
+        missed another write in between is dropped instead.
+        """
+        with self._lock:
+            profile = self._entries.get(user_id)
+        if profile is None:
+            return
+        if profile.version != version - 1:
+            self.discard(user_id)
+            return
+        cursor = conn.cursor()
+        try:
+            cursor.execute(REVIEWS_SQL + " AND r.movie_id = %s", (user_id, movie_id))
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+        if row is None:
+            self.discard(user_id)
+            return
+        updated = profile.with_review(version, row[0], row[1], int(row[2]), self.genres.code(row[3]))
+        updated.loaded_at = profile.loaded_at
+        with self._lock:
+            if self._entries.get(user_id) is profile:
+                self._entries[user_id] = updated
+                self._counters["updates"] += 1
+
+    def discard(self, user_id):
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self._counters["invalidations"] += 1
+
+    def discard_movie(self, movie_id):
+        """Drop the profiles of users who reviewed a movie whose genre changed or that was deleted."""
+        with self._lock:
+            stale = [user_id for user_id, profile in self._entries.items() if profile.has_reviewed(movie_id)]
+            for user_id in stale:
+                del self._entries[user_id]
+            self._counters["invalidations"] += len(stale)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats.update({"entries": len(self._entries), "genres": len(self.genres.names)})
+            return stats
@@ -0,0 +1,193 @@
+"""
+Review counter consistency under concurrent writes and movie deletes.
+
+Runs the real write paths (review_writes.write_review / delete_movie) from
+many threads against MySQL, then checks rating_stats.verify() and
+verify_users() report no drift. Needs a disposable database, configured
+with the app's DB_* settings and named in REVIEW_TEST_DB:
+
+    REVIEW_TEST_DB=movie_review_test DB_HOST=127.0.0.1 python -m pytest tests
+"""
+
+import os
+import random
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TEST_DB = os.getenv("REVIEW_TEST_DB")
+pytestmark = pytest.mark.skipif(not TEST_DB, reason="set REVIEW_TEST_DB to a disposable MySQL database")
+
+MOVIES = 6
+USERS = 30
+THREADS = 12
+WRITES_PER_THREAD = 150
+
+
+@pytest.fixture(scope="module")
+def pool():
+    os.environ["DB_NAME"] = TEST_DB
+    from app import DB_CONFIG  # creates the schema
+    from db_pool import ConnectionPool
+
+    pool = ConnectionPool(DB_CONFIG, size=THREADS + 2, timeout=30)
+    yield pool
+    pool.close_idle()
+
+
+@pytest.fixture
+def catalog(pool):
+    import hammer_reviews
+
+    conn = pool.connection()
+    try:
+        user_ids = hammer_reviews.hammer_users(conn, USERS)
+        cursor = conn.cursor()
+        movie_ids = []
+        for n in range(MOVIES):
+            cursor.execute(
+                "INSERT INTO movies (title, genre, release_year) VALUES (%s, 'Drama', 2000)",
+                (f"review counter test {n}",),
+            )
+            movie_ids.append(cursor.lastrowid)
+            cursor.execute("INSERT IGNORE INTO movie_rating_stats (movie_id) VALUES (%s)", (cursor.lastrowid,))
+        conn.commit()
+    finally:
+        conn.close()
+    yield movie_ids, user_ids
+    conn = pool.connection()
+    try:
+        cursor = conn.cursor()
+        placeholders = ",".join(["%s"] * len(movie_ids))
+        cursor.execute(f"DELETE FROM movies WHERE movie_id IN ({placeholders})", movie_ids)
+        placeholders = ",".join(["%s"] * len(user_ids))
+        cursor.execute(f"DELETE FROM users WHERE user_id IN ({placeholders})", user_ids)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def write_reviews(pool, movie_ids, user_ids, seed, errors):
+    import mysql.connector
+    import review_writes
+
+    rng = random.Random(seed)
+    for _ in range(WRITES_PER_THREAD):
+        conn = pool.connection()
+        try:
+            review_writes.write_review(conn, rng.choice(user_ids), rng.choice(movie_ids), rng.randint(1, 5), "test")
+        except review_writes.ReviewTargetMissing:
+            pass  # the movie was deleted meanwhile
+        except mysql.connector.Error as e:
+            # Deadlocks roll back whole; they must not leave counters behind.
+            errors.append(e)
+        finally:
+            conn.close()
+
+
+def delete_movie(pool, movie_id, attempts=3):
+    """review_writes.delete_movie, retried on deadlock like a client would."""
+    import mysql.connector
+    import review_writes
+
+    for attempt in range(attempts):
+        conn = pool.connection()
+        try:
+            return review_writes.delete_movie(conn, movie_id)
+        except mysql.connector.errors.InternalError:
+            if attempt == attempts - 1:
+                raise
+        finally:
+            conn.close()
+
+
+def assert_no_drift(pool, movie_ids, user_ids):
+    import rating_stats
+
+    conn = pool.connection()
+    try:
+        drifted = [row for row in rating_stats.verify(conn) if row["movie_id"] in movie_ids]
+        drifted_users = rating_stats.verify_users(conn, user_ids)
+    finally:
+        conn.close()
+    assert drifted == []
+    assert drifted_users == []
+
+
+def user_versions(pool, user_ids):
+    conn = pool.connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT user_id, review_version FROM user_review_stats WHERE user_id IN ({})".format(
+                ",".join(["%s"] * len(user_ids))
+            ),
+            user_ids,
+        )
+        return dict(cursor.fetchall())
+    finally:
+        conn.close()
+
+
+def test_concurrent_writes_keep_counters_exact(pool, catalog):
+    movie_ids, user_ids = catalog
+    errors = []
+    threads = [
+        threading.Thread(target=write_reviews, args=(pool, movie_ids, user_ids, seed, errors))
+        for seed in range(THREADS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(errors) < THREADS * WRITES_PER_THREAD // 10
+    assert_no_drift(pool, movie_ids, user_ids)
+
+
+def test_deleting_movies_during_writes_keeps_user_counters_exact(pool, catalog):
+    movie_ids, user_ids = catalog
+    doomed = movie_ids[: MOVIES // 2]
+    errors = []
+    threads = [
+        threading.Thread(target=write_reviews, args=(pool, movie_ids, user_ids, seed, errors))
+        for seed in range(THREADS)
+    ]
+    for thread in threads:
+        thread.start()
+    for movie_id in doomed:
+        delete_movie(pool, movie_id)
+    for thread in threads:
+        thread.join()
+    assert_no_drift(pool, movie_ids, user_ids)
+
+
+def test_delete_bumps_reviewers_versions(pool, catalog):
+    import review_writes
+
+    movie_ids, user_ids = catalog
+    reviewers, others = user_ids[:5], user_ids[5:10]
+    for user_id in reviewers:
+        conn = pool.connection()
+        try:
+            review_writes.write_review(conn, user_id, movie_ids[0], 4, "test")
+            review_writes.write_review(conn, user_id, movie_ids[1], 2, "test")
+        finally:
+            conn.close()
+    for user_id in others:
+        conn = pool.connection()
+        try:
+            review_writes.write_review(conn, user_id, movie_ids[1], 5, "test")
+        finally:
+            conn.close()
+    before = user_versions(pool, reviewers + others)
+
+    deleted, _ = delete_movie(pool, movie_ids[0])
+
+    assert deleted == 1
+    after = user_versions(pool, reviewers + others)
+    assert all(after[user_id] == before[user_id] + 1 for user_id in reviewers)
+    assert all(after[user_id] == before[user_id] for user_id in others)
+    assert_no_drift(pool, movie_ids, user_ids)
@@ -0,0 +1,209 @@
+"""
+Decision Trace Queue
+Buffered ingestion for POST /api/decision-trace, the app's highest-rate
+write. Requests only validate a trace and append it to a bounded per-worker
+queue; a background flusher writes the queue to decision_traces with one
+multi-row INSERT per `batch_size` traces, or sooner once the oldest has
+waited `flush_interval` seconds. A full queue rejects new traces (the
+endpoint answers 429) instead of growing without bound. close() drains
+what is left; it runs at interpreter exit.
+
+A batch that MySQL rejects for its data (say, a trace for a movie deleted
+meanwhile) is retried row by row so one bad trace cannot drop the others;
+connection errors put the batch back and the flusher backs off.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import mysql.connector
+
+from db_pool import PoolTimeout
+
+logger = logging.getLogger("movie-review-backend")
+
+DECISION_SOURCES = ("search", "filter", "trending", "recommendation", "browse", "direct")
+SUMMARY_STEPS = 5
+SUMMARY_MAX_LENGTH = 255
+RETRY_BACKOFF = 1.0
+
+INSERT_SQL = """
+    INSERT INTO decision_traces
+    (user_id, movie_id, trace_path, trace_summary, decision_source, num_steps, time_spent_seconds)
+    VALUES {}
+"""
+ROW_SQL = "(%s, %s, %s, %s, %s, %s, %s)"
+
+
+def _optional_int(value, name):
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"{name} must be an integer")
+    # JSON allows 1.9, 1e400 and Infinity; only whole, finite numbers pass.
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"{name} must be an integer")
+    try:
+        return int(value)
+    except (ValueError, OverflowError):
+        raise ValueError(f"{name} must be an integer")
+
+
+def parse_trace(data):
+    """
+    Validate a trace request body and return its decision_traces row
+    (user_id, movie_id, trace_path JSON, trace_summary, decision_source,
+    num_steps, time_spent_seconds). Raises ValueError.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Missing required fields")
+    movie_id = _optional_int(data.get("movie_id"), "movie_id")
+    trace_path = data.get("trace_path") or []
+    if not movie_id or not trace_path:
+        raise ValueError("Missing required fields")
+    if not isinstance(trace_path, list) or not all(isinstance(step, str) for step in trace_path):
+        raise ValueError("trace_path must be a list of strings")
+    decision_source = data.get("decision_source") or "browse"
+    if decision_source not in DECISION_SOURCES:
+        raise ValueError(f"decision_source must be one of {', '.join(DECISION_SOURCES)}")
+    time_spent = _optional_int(data.get("time_spent_seconds"), "time_spent_seconds") or 0
+    if time_spent < 0:
+        raise ValueError("time_spent_seconds must not be negative")
+    trace_summary = " → ".join(trace_path[:SUMMARY_STEPS])[:SUMMARY_MAX_LENGTH]
+    return (
+        _optional_int(data.get("user_id"), "user_id"), movie_id, json.dumps(trace_path),
+        trace_summary, decision_source, len(trace_path), time_spent,
+    )
+
+
+class TraceQueue:
+    def __init__(self, get_conn, max_size=10000, batch_size=500, flush_interval=0.2):
+        self.get_conn = get_conn
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._cond = threading.Condition()
+        self._rows = deque()
+        self._oldest_at = None  # when the oldest queued row arrived
+        self._thread = None
+        self._pid = None
+        self._closed = False
+        self._counters = {"queued": 0, "dropped": 0, "flushed": 0, "failed": 0, "batches": 0, "retries": 0}
+
+    def offer(self, row):
+        """Queue a row from parse_trace(). False when the queue is full."""
+        with self._cond:
+            if self._closed or len(self._rows) >= self.max_size:
+                self._counters["dropped"] += 1
+                return False
+            self._start()
+            if not self._rows:
+                self._oldest_at = time.monotonic()
+            self._rows.append(row)
+            self._counters["queued"] += 1
+            # Wake the flusher to start the interval timer, or for a full batch.
+            if len(self._rows) == 1 or len(self._rows) >= self.batch_size:
+                self._cond.notify()
+            return True
+
+    def _start(self):
+        # Started on first use, so forked workers each run their own flusher.
+        if self._thread is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="decision-trace-flusher", daemon=True)
+            self._thread.start()
+
+    def _take(self):
+        """Wait until a batch is due and take it; an empty list once closed and drained."""
+        with self._cond:
+            while True:
+                if self._rows and (
+                    self._closed
+                    or len(self._rows) >= self.batch_size
+                    or time.monotonic() - self._oldest_at >= self.flush_interval
+                ):
+                    count = min(len(self._rows), self.batch_size)
+                    batch = [self._rows.popleft() for _ in range(count)]
+                    self._oldest_at = time.monotonic() if self._rows else None
+                    return batch
+                if self._closed:
+                    return []
+                timeout = None
+                if self._rows:
+                    timeout = max(0.0, self.flush_interval - (time.monotonic() - self._oldest_at))
+                self._cond.wait(timeout)
+
+    def _requeue(self, batch):
+        with self._cond:
+            self._rows.extendleft(reversed(batch))
+            self._oldest_at = time.monotonic()
+            self._counters["retries"] += 1
+
+    def _run(self):
+        while True:
+            batch = self._take()
+            if not batch:
+                return
+            try:
+                flushed, failed = self._write(batch)
+            except (mysql.connector.Error, PoolTimeout):
+                logger.exception("Failed to flush %d decision traces; retrying", len(batch))
+                self._requeue(batch)
+                with self._cond:
+                    if self._closed:
+                        return
+                    self._cond.wait(RETRY_BACKOFF)
+                continue
+            with self._cond:
+                self._counters["flushed"] += flushed
+                self._counters["failed"] += failed
+                self._counters["batches"] += 1
+
+    def _write(self, batch):
+        """Insert a batch; returns (rows written, rows MySQL rejected)."""
+        conn = self.get_conn()
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    INSERT_SQL.format(", ".join([ROW_SQL] * len(batch))),
+                    [value for row in batch for value in row],
+                )
+                conn.commit()
+                return len(batch), 0
+            except (mysql.connector.IntegrityError, mysql.connector.DataError):
+                conn.rollback()
+            failed = 0
+            for row in batch:
+                try:
+                    cursor.execute(INSERT_SQL.format(ROW_SQL), row)
+                    conn.commit()
+                except (mysql.connector.IntegrityError, mysql.connector.DataError) as e:
+                    conn.rollback()
+                    failed += 1
+                    logger.warning("Dropped decision trace for movie %s: %s", row[1], e)
+            return len(batch) - failed, failed
+        finally:
+            conn.close()
+
+    def close(self, timeout=10.0):
+        """Stop accepting traces and wait up to `timeout` seconds for the queue to drain."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread if self._pid == os.getpid() else None
+        if thread is not None:
+            thread.join(timeout)
+        with self._cond:
+            if self._rows:
+                logger.warning("Shutting down with %d unflushed decision traces", len(self._rows))
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._counters)
+            stats["depth"] = len(self._rows)
+            return stats
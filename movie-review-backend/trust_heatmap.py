@@ -0,0 +1,132 @@
+"""
+Trust Heatmap
+Rating consistency and reviewer credibility of a movie, computed from
+counters instead of a reviews self-join. The movie's rating moments (n, sum,
+sum of squares) come from its movie_rating_stats star histogram, and each
+reviewer's activity from their user_review_stats.review_count, read for the
+movie's reviewer set in one indexed query and scored with NumPy. Results
+are cached per worker under the movie's review_version, so they are reused
+until the next review of the movie lands (or `max_age` seconds pass, to pick
+up reviewers' activity elsewhere).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from rating_stats import STAR_COLUMNS
+
+STARS = np.arange(1, len(STAR_COLUMNS) + 1, dtype=np.float64)
+
+EMPTY = {
+    "rating_consistency": 0,
+    "reviewer_credibility": 0,
+    "trust_score": 0,
+    "review_count": 0,
+    "average_rating": 0,
+}
+
+
+def score(histogram, reviewer_counts):
+    """
+    The heatmap from a star histogram (reviews per star, 1-5) and the total
+    review counts of the movie's reviewers.
+    """
+    histogram = np.asarray(histogram, dtype=np.float64)
+    n = histogram.sum()
+    if not n:
+        return dict(EMPTY)
+    avg_rating = float(histogram @ STARS / n)
+    std_dev = 0.0
+    if n > 1:
+        # Sample standard deviation from the sum of squares; clamp float error.
+        std_dev = float(np.sqrt(max(0.0, (histogram @ STARS ** 2 - n * avg_rating ** 2) / (n - 1))))
+
+    # 1. CONSISTENCY: lower std dev = higher consistency (max reasonable std dev is ~2)
+    consistency = max(0, 100 - (std_dev * 25)) if n > 1 else 100
+
+    # 2. CREDIBILITY: reviewers with more reviews (1-10 reviews = 40-100 points),
+    # and ratings within 0.5 of the average, are more credible
+    counts = np.asarray(reviewer_counts, dtype=np.float64)
+    activity = float(np.minimum(100, 30 + counts * 7).mean()) if len(counts) else 0
+    proximity = float(histogram @ np.maximum(0, 100 - np.abs(STARS - avg_rating) * 40) / n)
+    avg_credibility = (activity * 0.6) + (proximity * 0.4)
+
+    # 3. TRUST SCORE: weighted average
+    trust_score = (consistency * 0.4) + (avg_credibility * 0.6)
+
+    present = np.flatnonzero(histogram)
+    return {
+        "rating_consistency": round(consistency, 1),
+        "reviewer_credibility": round(avg_credibility, 1),
+        "trust_score": round(trust_score, 1),
+        "review_count": int(n),
+        "average_rating": round(avg_rating, 2),
+        "rating_distribution": {
+            "min": float(STARS[present[0]]),
+            "max": float(STARS[present[-1]]),
+            "std_dev": round(std_dev, 2),
+        },
+    }
+
+
+def compute(cursor, movie_id, histogram):
+    """The heatmap of a movie with the given star histogram (plain cursor)."""
+    cursor.execute(
+        """
+        SELECT us.review_count
+        FROM reviews r
+        JOIN user_review_stats us ON us.user_id = r.user_id
+        WHERE r.movie_id = %s
+        """,
+        (movie_id,),
+    )
+    counts = np.fromiter((row[0] for row in cursor.fetchall()), dtype=np.float64)
+    return score(histogram, counts)
+
+
+class TrustHeatmaps:
+    def __init__(self, max_entries=4096, max_age=300.0):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # movie_id -> (heatmap, review_version, computed_at)
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, conn, movie_id):
+        """A movie's heatmap, recomputed only when its reviews changed."""
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                f"SELECT review_version, {', '.join(STAR_COLUMNS)} FROM movie_rating_stats WHERE movie_id = %s",
+                (movie_id,),
+            )
+            row = cursor.fetchone()
+            if row is None:
+                return dict(EMPTY)
+            version, histogram = row[0], row[1:]
+            with self._lock:
+                entry = self._entries.get(movie_id)
+                if entry is not None and entry[1] == version and time.monotonic() - entry[2] < self.max_age:
+                    self._entries.move_to_end(movie_id)
+                    self._counters["hits"] += 1
+                    return entry[0]
+                self._counters["misses"] += 1
+            heatmap = compute(cursor, movie_id, histogram)
+        finally:
+            cursor.close()
+        with self._lock:
+            self._entries[movie_id] = (heatmap, version, time.monotonic())
+            self._entries.move_to_end(movie_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+        return heatmap
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._entries)
+            return stats
@@ -30,7 +30,50 @@ apiClient.interceptors.response.use(
 );
 
 export const getMovies = () => apiClient.get(`/movies`);
+export const getMoviesPage = (params: { limit?: number; cursor?: string; sort?: "newest" | "rating" | "year"; fields?: string[] } = {}) =>
+  apiClient.get(`/movies`, {
+    params: { ...params, limit: params.limit ?? 20, fields: params.fields?.join(",") },
+  });
+export interface MovieSearchParams {
+  q?: string;
+  genre?: string;
+  mood?: string;
+  language?: string;
+  year_from?: number;
+  year_to?: number;
+  min_rating?: number;
+  max_duration?: number;
+  sort?: "relevance" | "rating" | "rating_asc" | "popular" | "year" | "year_asc" | "title" | "title_desc";
+  limit?: number;
+  cursor?: string;
+  fields?: string[];
+}
+export const searchMovies = (params: MovieSearchParams = {}) =>
+  apiClient.get(`/movies/search`, { params: { ...params, fields: params.fields?.join(",") } });
+export interface MoodDefinition {
+  id: string;
+  label: string;
+  icon: string;
+  description: string;
+  genres: string[];
+}
+export const getMoods = () => apiClient.get<MoodDefinition[]>(`/moods`);
 export const getMovieDetails = (id: number) => apiClient.get(`/movies/${id}`);
+export const getMoviesBatch = (ids: number[]) =>
+  ids.length > 100
+    ? apiClient.post(`/movies/batch`, { ids })
+    : apiClient.get(`/movies/batch`, { params: { ids: ids.join(",") } });
+export interface SimilarMovie {
+  similarity: number | null;
+  movie: { movie_id: number; title: string; genre?: string; release_year?: number; poster_url?: string; avg_rating?: number };
+}
+export interface SimilarMoviesResponse {
+  movie_id: number;
+  similar: SimilarMovie[];
+  source: "index" | "genre";
+}
+export const getSimilarMovies = (id: number, limit?: number) =>
+  apiClient.get<SimilarMoviesResponse>(`/movies/${id}/similar`, { params: { limit } });
 export const addMovie = (movie: any) => apiClient.post(`/movies`, movie);
 export const editMovie = (id: number, movie: any) => apiClient.put(`/movies/${id}`, movie);
 export const deleteMovie = (id: number) => apiClient.delete(`/movies/${id}`);
@@ -41,13 +84,41 @@ export const verifyLoginOtp = (payload: { email: string; code: string }) =>
   apiClient.post(`/login/verify-otp`, payload);
 
 export const getReviews = (movie_id: number) => apiClient.get(`/reviews/movie/${movie_id}`);
-export const getMovieReviewStats = (movie_id: number) => apiClient.get(`/reviews/movie/${movie_id}/stats`);
+export interface MovieReviewStats {
+  review_count: number;
+  avg_rating: number;
+  avg_rating_rounded: number;
+  min_rating: number | null;
+  max_rating: number | null;
+  variance: number;
+  stddev: number;
+  histogram: Record<"1" | "2" | "3" | "4" | "5", number>;
+  recent_count: number;
+  recent_window_days: number;
+}
+export const getMovieReviewStats = (movie_id: number, window_days?: number) =>
+  apiClient.get<MovieReviewStats>(`/reviews/movie/${movie_id}/stats`, { params: { window_days } });
 export const getUserReviewForMovie = (movie_id: number, user_id: number) => apiClient.get(`/reviews/movie/${movie_id}/user/${user_id}`);
 export const getUserReviews = () => apiClient.get(`/reviews/user`);
+export interface ReviewFeedParams {
+  limit?: number;
+  cursor?: string;
+  min_rating?: number;
+  has_comment?: boolean;
+}
+export const getReviewsPage = (movie_id: number, params: ReviewFeedParams = {}) =>
+  apiClient.get(`/reviews/movie/${movie_id}`, { params: { ...params, limit: params.limit ?? 20 } });
+export const getUserReviewsPage = (params: ReviewFeedParams = {}) =>
+  apiClient.get(`/reviews/user`, { params: { ...params, limit: params.limit ?? 20 } });
 export const addReview = (review: any) => apiClient.post(`/reviews`, review);
 
 export const getStats = () => apiClient.get(`/stats`);
 export const getAdminAnalytics = () => apiClient.get(`/admin/analytics`);
-export const getRecommendations = () => apiClient.get(`/recommendations`);
+export const getRecommendations = (algorithm?: "rule-based" | "item-cf" | "als") =>
+  apiClient.get(`/recommendations`, { params: { algorithm } });
+export const explainMovies = (movieIds: number[]) =>
+  apiClient.get<{ explanations: any[]; missing: number[] }>(`/explain-algorithm`, {
+    params: { movie_ids: movieIds.join(",") },
+  });
 
 export default axios;
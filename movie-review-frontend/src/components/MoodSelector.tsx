@@ -1,75 +1,49 @@
 import React from "react";
 import { motion } from "framer-motion";
+import { getMoods, MoodDefinition } from "../api/api";
 
-export type Mood = "happy" | "dark" | "motivational" | "thriller" | "emotional" | "adventurous" | "romantic";
+// Mood ids and their genres come from GET /api/moods (backend moods.py).
+export type Mood = string;
+export type MoodOption = MoodDefinition;
 
-interface MoodOption {
-  id: Mood;
-  label: string;
-  icon: string;
-  gradient: string;
-  genres: string[];
-  description: string;
-}
+// Styling only; moods without an entry get the default.
+const moodGradients: Record<string, string> = {
+  happy: "from-yellow-400 to-orange-500",
+  dark: "from-gray-700 to-black",
+  motivational: "from-blue-500 to-purple-600",
+  thriller: "from-red-600 to-red-900",
+  emotional: "from-pink-400 to-purple-500",
+  adventurous: "from-green-500 to-teal-600",
+  romantic: "from-pink-500 to-rose-600",
+};
+const defaultGradient = "from-slate-500 to-slate-700";
+
+let moodsRequest: Promise<MoodOption[]> | null = null;
+
+// Loads the mood definitions once per page load and shares them between components.
+export const useMoods = (): MoodOption[] => {
+  const [moods, setMoods] = React.useState<MoodOption[]>([]);
 
-const moodOptions: MoodOption[] = [
-  {
-    id: "happy",
-    label: "Happy",
-    icon: "😊",
-    gradient: "from-yellow-400 to-orange-500",
-    genres: ["Comedy", "Animation", "Family", "Musical"],
-    description: "Lighthearted & fun"
-  },
-  {
-    id: "dark",
-    label: "Dark",
-    icon: "🌑",
-    gradient: "from-gray-700 to-black",
-    genres: ["Horror", "Thriller", "Mystery", "Crime"],
-    description: "Intense & gripping"
-  },
-  {
-    id: "motivational",
-    label: "Motivational",
-    icon: "💪",
-    gradient: "from-blue-500 to-purple-600",
-    genres: ["Biography", "Drama", "Sport", "Documentary"],
-    description: "Inspiring stories"
-  },
-  {
-    id: "thriller",
-    label: "Thriller",
-    icon: "😱",
-    gradient: "from-red-600 to-red-900",
-    genres: ["Thriller", "Action", "Crime", "Mystery"],
-    description: "Edge of your seat"
-  },
-  {
-    id: "emotional",
-    label: "Emotional",
-    icon: "😢",
-    gradient: "from-pink-400 to-purple-500",
-    genres: ["Drama", "Romance", "Family"],
-    description: "Heartfelt moments"
-  },
-  {
-    id: "adventurous",
-    label: "Adventurous",
-    icon: "🗺️",
-    gradient: "from-green-500 to-teal-600",
-    genres: ["Adventure", "Action", "Fantasy", "Sci-Fi"],
-    description: "Epic journeys"
-  },
-  {
-    id: "romantic",
-    label: "Romantic",
-    icon: "💕",
-    gradient: "from-pink-500 to-rose-600",
-    genres: ["Romance", "Drama", "Comedy"],
-    description: "Love stories"
-  }
-];
+  React.useEffect(() => {
+    let active = true;
+    if (!moodsRequest) {
+      moodsRequest = getMoods()
+        .then(res => res.data)
+        .catch(() => {
+          moodsRequest = null;
+          return [];
+        });
+    }
+    moodsRequest.then(data => {
+      if (active) setMoods(data);
+    });
+    return () => {
+      active = false;
+    };
+  }, []);
+
+  return moods;
+};
 
 interface MoodSelectorProps {
   selectedMood: Mood | null;
@@ -77,6 +51,8 @@ interface MoodSelectorProps {
 }
 
 const MoodSelector: React.FC<MoodSelectorProps> = ({ selectedMood, onMoodSelect }) => {
+  const moodOptions = useMoods();
+
   return (
     <div className="w-full">
       <div className="mb-4">
@@ -101,7 +77,7 @@ const MoodSelector: React.FC<MoodSelectorProps> = ({ selectedMood, onMoodSelect
             whileTap={{ scale: 0.98 }}
           >
             <div
-              className={`absolute inset-0 bg-gradient-to-br ${mood.gradient} ${
+              className={`absolute inset-0 bg-gradient-to-br ${moodGradients[mood.id] || defaultGradient} ${
                 selectedMood === mood.id ? "opacity-20" : "opacity-10"
               } transition-opacity`}
             />
@@ -143,5 +119,3 @@ const MoodSelector: React.FC<MoodSelectorProps> = ({ selectedMood, onMoodSelect
 };
 
 export default MoodSelector;
-export { moodOptions };
-export type { MoodOption };
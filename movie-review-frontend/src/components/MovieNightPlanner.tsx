@@ -1,8 +1,8 @@
 import React, { useState } from "react";
 import { motion, AnimatePresence } from "framer-motion";
 import { Link } from "react-router-dom";
-import { getMovies } from "../api/api";
-import { moodOptions, Mood } from "./MoodSelector";
+import { searchMovies } from "../api/api";
+import { useMoods, Mood } from "./MoodSelector";
 
 interface Movie {
   movie_id: number;
@@ -38,26 +38,19 @@ const MovieNightPlanner: React.FC = () => {
   const [selectedMood, setSelectedMood] = useState<Mood | null>(null);
   const [plan, setPlan] = useState<MovieNightPlan | null>(null);
   const [loading, setLoading] = useState(false);
+  const moodOptions = useMoods();
 
   const generatePlan = async () => {
     setLoading(true);
     try {
-      const response = await getMovies();
-      let movies: Movie[] = response.data;
-
-      // Filter by duration
-      movies = movies.filter(m => {
-        const duration = m.duration_minutes || 120;
-        return duration <= availableTime;
+      // Duration and mood filtering happen server-side; only rank the top candidates here
+      const response = await searchMovies({
+        max_duration: availableTime,
+        mood: selectedMood || undefined,
+        sort: "rating",
+        limit: 50,
       });
-
-      // Filter by mood if selected
-      if (selectedMood) {
-        const moodGenres = moodOptions.find(m => m.id === selectedMood)?.genres || [];
-        movies = movies.filter(m => 
-          moodGenres.some(genre => m.genre?.includes(genre))
-        );
-      }
+      let movies: Movie[] = response.data.movies;
 
       // Sort by rating and popularity
       movies.sort((a, b) => {
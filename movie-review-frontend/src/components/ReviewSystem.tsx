@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from "react";
-import { addReview, getMovieReviewStats, getReviews, getUserReviewForMovie } from "../api/api";
+import { addReview, getMovieReviewStats, getReviews, getUserReviewForMovie, MovieReviewStats } from "../api/api";
 
 interface Review {
   review_id: number;
@@ -10,14 +10,6 @@ interface Review {
   review_date: string;
 }
 
-interface RatingStats {
-  review_count: number;
-  avg_rating: number;
-  avg_rating_rounded: number;
-  min_rating: number | null;
-  max_rating: number | null;
-}
-
 interface ReviewSystemProps {
   movieId: number;
   onReviewSubmitted?: () => void;
@@ -35,7 +27,7 @@ interface ReviewSystemProps {
 const ReviewSystem: React.FC<ReviewSystemProps> = ({ movieId, onReviewSubmitted }) => {
   // State Management
   const [reviews, setReviews] = useState<Review[]>([]);
-  const [stats, setStats] = useState<RatingStats | null>(null);
+  const [stats, setStats] = useState<MovieReviewStats | null>(null);
   const [userReview, setUserReview] = useState<Review | null>(null);
   const [rating, setRating] = useState(0);
   const [hoveredRating, setHoveredRating] = useState(0);
@@ -196,7 +188,7 @@ const ReviewSystem: React.FC<ReviewSystemProps> = ({ movieId, onReviewSubmitted
   // Rating distribution
   const getRatingDistribution = (targetRating: number): number => {
     if (!stats || stats.review_count === 0) return 0;
-    const count = reviews.filter((r) => r.rating === targetRating).length;
+    const count = stats.histogram[String(targetRating) as keyof MovieReviewStats["histogram"]] || 0;
     return Math.round((count / stats.review_count) * 100);
   };
 
@@ -1,13 +1,9 @@
 import React, { useMemo } from "react";
 import { motion } from "framer-motion";
-
-type ReviewInput = {
-  rating: number;
-  review_date?: string;
-};
+import { MovieReviewStats } from "../api/api";
 
 interface ThrillPulseProps {
-  reviews: ReviewInput[];
+  stats: MovieReviewStats | null;
   averageRating: number;
   reviewCount: number;
 }
@@ -26,23 +22,11 @@ const getPulseLabel = (score: number) => {
   return "Low simmer";
 };
 
-const ThrillPulse: React.FC<ThrillPulseProps> = ({ reviews, averageRating, reviewCount }) => {
+const ThrillPulse: React.FC<ThrillPulseProps> = ({ stats, averageRating, reviewCount }) => {
   const metrics = useMemo(() => {
-    const ratings = reviews.map((r) => r.rating).filter((r) => Number.isFinite(r));
-    const mean = ratings.length ? ratings.reduce((sum, r) => sum + r, 0) / ratings.length : 0;
-    const variance = ratings.length
-      ? ratings.reduce((sum, r) => sum + Math.pow(r - mean, 2), 0) / ratings.length
-      : 0;
-    const stdDev = Math.sqrt(variance);
+    const stdDev = stats?.stddev ?? 0;
     const volatility = clamp((stdDev / 1.5) * 100);
-
-    const now = Date.now();
-    const recentReviews = reviews.filter((r) => {
-      if (!r.review_date) return false;
-      const time = new Date(r.review_date).getTime();
-      if (!Number.isFinite(time)) return false;
-      return now - time <= 7 * 24 * 60 * 60 * 1000;
-    }).length;
+    const recentReviews = stats?.recent_count ?? 0;
 
     const momentumBase = Math.max(5, Math.min(20, reviewCount || 0));
     const momentum = clamp((recentReviews / momentumBase) * 100);
@@ -58,7 +42,7 @@ const ThrillPulse: React.FC<ThrillPulseProps> = ({ reviews, averageRating, revie
       recentReviews,
       thrillScore: Math.round(thrillScore),
     };
-  }, [reviews, averageRating, reviewCount]);
+  }, [stats, averageRating, reviewCount]);
 
   return (
     <div className="glass rounded-2xl p-4">
@@ -1,13 +1,11 @@
 import React from "react";
 import { motion } from "framer-motion";
-import { FaFilm, FaChevronLeft, FaChevronRight } from "react-icons/fa";
+import { FaFilm } from "react-icons/fa";
 import MovieCard from "../components/MovieCard";
-import MoodSelector, { Mood, moodOptions } from "../components/MoodSelector";
-import { getMovies } from "../api/api";
+import MoodSelector, { Mood, useMoods } from "../components/MoodSelector";
+import { searchMovies, MovieSearchParams } from "../api/api";
 
 const FilmIcon = FaFilm as unknown as React.ComponentType<{ className?: string }>;
-const ChevronLeftIcon = FaChevronLeft as unknown as React.ComponentType<{ className?: string }>;
-const ChevronRightIcon = FaChevronRight as unknown as React.ComponentType<{ className?: string }>;
 
 type Movie = {
   movie_id: number;
@@ -22,80 +20,96 @@ type Movie = {
   description?: string;
 };
 
+// UI sort option -> /api/movies/search sort
+const sortOptions: Record<string, MovieSearchParams["sort"]> = {
+  newest: "year",
+  oldest: "year_asc",
+  "rating-high": "rating",
+  "rating-low": "rating_asc",
+  "title-asc": "title",
+  "title-desc": "title_desc",
+};
+
+const pageSize = 12;
+const searchDelayMs = 300;
+
 const BrowseMovies: React.FC = () => {
   const [movies, setMovies] = React.useState<Movie[]>([]);
+  const [nextCursor, setNextCursor] = React.useState<string | null>(null);
   const [loading, setLoading] = React.useState(true);
+  const [loadingMore, setLoadingMore] = React.useState(false);
   const [search, setSearch] = React.useState("");
+  const [typed, setTyped] = React.useState({ q: "", language: "" });
   const [genre, setGenre] = React.useState("All");
+  const [language, setLanguage] = React.useState("");
+  const [year, setYear] = React.useState("");
   const [minRating, setMinRating] = React.useState("All");
   const [sortBy, setSortBy] = React.useState("newest");
-  const [currentPage, setCurrentPage] = React.useState(1);
   const [selectedMood, setSelectedMood] = React.useState<Mood | null>(null);
-  const itemsPerPage = 6;
+  const moods = useMoods();
+  // Responses for filters that have since changed are dropped.
+  const requestId = React.useRef(0);
 
+  // Text filters reach the server once typing pauses.
   React.useEffect(() => {
-    setLoading(true);
-    getMovies()
-      .then(res => setMovies(res.data))
-      .catch(() => setMovies([]))
-      .finally(() => setLoading(false));
-  }, []);
+    const timer = setTimeout(() => {
+      const next = { q: search.trim(), language: language.trim() };
+      setTyped(prev => (prev.q === next.q && prev.language === next.language ? prev : next));
+    }, searchDelayMs);
+    return () => clearTimeout(timer);
+  }, [search, language]);
 
   const genres = React.useMemo(() => {
-    const values = new Set(movies.map(movie => movie.genre).filter(Boolean) as string[]);
-    return ["All", ...Array.from(values)];
-  }, [movies]);
-
-  const years = React.useMemo(() => {
-    const values = new Set(movies.map(movie => movie.release_year).filter(Boolean) as number[]);
-    return ["All", ...Array.from(values).sort((a, b) => b - a)];
-  }, [movies]);
-
-  const filteredMovies = React.useMemo(() => {
-    let result = movies.filter(movie => {
-      const matchesSearch = movie.title.toLowerCase().includes(search.toLowerCase());
-      
-      // Mood-based filtering
-      let matchesGenreOrMood = true;
-      if (selectedMood) {
-        const moodGenres = moodOptions.find(m => m.id === selectedMood)?.genres || [];
-        matchesGenreOrMood = moodGenres.some(g => movie.genre?.includes(g));
-      } else {
-        matchesGenreOrMood = genre === "All" || movie.genre === genre;
-      }
-      
-      const ratingValue = movie.avg_rating ? Number(movie.avg_rating) : 0;
-      const matchesRating = minRating === "All" || ratingValue >= Number(minRating);
-      return matchesSearch && matchesGenreOrMood && matchesRating;
-    });
+    const values = new Set(moods.flatMap(mood => mood.genres));
+    return ["All", ...Array.from(values).sort()];
+  }, [moods]);
 
-    // Sort
-    if (sortBy === "rating-high") {
-      result.sort((a, b) => (b.avg_rating || 0) - (a.avg_rating || 0));
-    } else if (sortBy === "rating-low") {
-      result.sort((a, b) => (a.avg_rating || 0) - (b.avg_rating || 0));
-    } else if (sortBy === "newest") {
-      result.sort((a, b) => (b.release_year || 0) - (a.release_year || 0));
-    } else if (sortBy === "oldest") {
-      result.sort((a, b) => (a.release_year || 0) - (b.release_year || 0));
-    } else if (sortBy === "title-asc") {
-      result.sort((a, b) => a.title.localeCompare(b.title));
-    } else if (sortBy === "title-desc") {
-      result.sort((a, b) => b.title.localeCompare(a.title));
-    }
+  const releaseYear = /^\d{4}$/.test(year.trim()) ? Number(year.trim()) : undefined;
 
-    return result;
-  }, [movies, search, genre, minRating, sortBy, selectedMood]);
-
-  const totalPages = Math.ceil(filteredMovies.length / itemsPerPage);
-  const paginatedMovies = React.useMemo(() => {
-    const startIdx = (currentPage - 1) * itemsPerPage;
-    return filteredMovies.slice(startIdx, startIdx + itemsPerPage);
-  }, [filteredMovies, currentPage]);
+  const params = React.useMemo<MovieSearchParams>(() => ({
+    q: typed.q || undefined,
+    genre: !selectedMood && genre !== "All" ? genre : undefined,
+    mood: selectedMood || undefined,
+    language: typed.language || undefined,
+    year_from: releaseYear,
+    year_to: releaseYear,
+    min_rating: minRating === "All" ? undefined : Number(minRating),
+    sort: sortOptions[sortBy],
+    limit: pageSize,
+  }), [typed, genre, selectedMood, releaseYear, minRating, sortBy]);
 
   React.useEffect(() => {
-    setCurrentPage(1);
-  }, [search, genre, minRating, sortBy, selectedMood]);
+    const id = ++requestId.current;
+    setLoading(true);
+    searchMovies(params)
+      .then(res => {
+        if (id !== requestId.current) return;
+        setMovies(res.data.movies);
+        setNextCursor(res.data.next_cursor);
+      })
+      .catch(() => {
+        if (id !== requestId.current) return;
+        setMovies([]);
+        setNextCursor(null);
+      })
+      .finally(() => {
+        if (id === requestId.current) setLoading(false);
+      });
+  }, [params]);
+
+  const loadMore = () => {
+    if (!nextCursor) return;
+    const id = requestId.current;
+    setLoadingMore(true);
+    searchMovies({ ...params, cursor: nextCursor })
+      .then(res => {
+        if (id !== requestId.current) return;
+        setMovies(prev => [...prev, ...res.data.movies]);
+        setNextCursor(res.data.next_cursor);
+      })
+      .catch(() => undefined)
+      .finally(() => setLoadingMore(false));
+  };
 
   return (
     <div className="relative left-1/2 right-1/2 w-screen -ml-[50vw] -mr-[50vw] bg-gradient-to-b from-red-950/60 via-[#050505] to-black py-8">
@@ -109,11 +123,11 @@ const BrowseMovies: React.FC = () => {
         <div>
           <p className="text-xs uppercase tracking-[0.3em] text-red-400">Browse</p>
           <h1 className="font-display text-3xl text-white">Browse Movies</h1>
-          <p className="text-sm text-slate-400">All titles in the catalog.</p>
+          <p className="text-sm text-slate-400">Search and filter the catalog.</p>
         </div>
         <div className="flex items-center gap-2 text-slate-300">
           <FilmIcon />
-          <span className="text-xs">{movies.length} titles</span>
+          <span className="text-xs">{movies.length}{nextCursor ? "+" : ""} titles</span>
         </div>
       </motion.div>
 
@@ -134,7 +148,7 @@ const BrowseMovies: React.FC = () => {
       </motion.div>
 
       <div className="glass rounded-2xl border border-slate-800/60 p-4">
-        <div className="grid gap-3 md:grid-cols-[1.2fr_0.6fr_0.6fr_0.6fr] md:items-end">
+        <div className="grid gap-3 md:grid-cols-[1.2fr_0.6fr_0.6fr_0.4fr_0.6fr_0.6fr] md:items-end">
           <div className="relative">
             <label className="text-[10px] uppercase tracking-[0.2em] text-slate-400">Search</label>
             <input
@@ -164,6 +178,26 @@ const BrowseMovies: React.FC = () => {
               ))}
             </select>
           </div>
+          <div>
+            <label className="text-[10px] uppercase tracking-[0.2em] text-slate-400">Language</label>
+            <input
+              value={language}
+              onChange={e => setLanguage(e.target.value)}
+              placeholder="Any"
+              className="mt-2 w-full rounded-xl border border-slate-700/70 bg-slate-950/40 px-3 py-2 text-sm text-white outline-none focus:border-red-400/60"
+            />
+          </div>
+          <div>
+            <label className="text-[10px] uppercase tracking-[0.2em] text-slate-400">Year</label>
+            <input
+              value={year}
+              onChange={e => setYear(e.target.value)}
+              placeholder="Any"
+              inputMode="numeric"
+              maxLength={4}
+              className="mt-2 w-full rounded-xl border border-slate-700/70 bg-slate-950/40 px-3 py-2 text-sm text-white outline-none focus:border-red-400/60"
+            />
+          </div>
           <div>
             <label className="text-[10px] uppercase tracking-[0.2em] text-slate-400">Min Rating</label>
             <select
@@ -201,7 +235,7 @@ const BrowseMovies: React.FC = () => {
             <div key={index} className="skeleton h-80 rounded-2xl" />
           ))}
         </div>
-      ) : filteredMovies.length === 0 ? (
+      ) : movies.length === 0 ? (
         <div className="glass rounded-2xl p-6 text-sm text-slate-300">
           No movies found.
         </div>
@@ -209,56 +243,22 @@ const BrowseMovies: React.FC = () => {
         <>
           <div className="flex items-center justify-between">
             <p className="text-xs text-slate-400">
-              Showing {(currentPage - 1) * itemsPerPage + 1}-{Math.min(currentPage * itemsPerPage, filteredMovies.length)} of {filteredMovies.length} movies
+              Showing {movies.length} movies
             </p>
           </div>
           <div className="grid gap-6 md:grid-cols-2 lg:grid-cols-3">
-            {paginatedMovies.map(movie => (
+            {movies.map(movie => (
               <MovieCard key={movie.movie_id} movie={movie} />
             ))}
           </div>
-          {totalPages > 1 && (
-            <div className="flex items-center justify-center gap-4">
-              <button
-                onClick={() => setCurrentPage(prev => Math.max(prev - 1, 1))}
-                disabled={currentPage === 1}
-                className="flex items-center gap-2 rounded-lg border border-slate-700/60 px-4 py-2 text-sm text-slate-300 disabled:opacity-50 disabled:cursor-not-allowed hover:border-red-400/60 hover:text-red-300 transition-colors"
-              >
-                <ChevronLeftIcon className="h-4 w-4" />
-                Previous
-              </button>
-              <div className="flex items-center gap-2">
-                {Array.from({ length: totalPages }).map((_, idx) => {
-                  const pageNum = idx + 1;
-                  const isCurrentPage = pageNum === currentPage;
-                  const isVisible = Math.abs(pageNum - currentPage) <= 1 || pageNum === 1 || pageNum === totalPages;
-                  
-                  return isVisible ? (
-                    <button
-                      key={pageNum}
-                      onClick={() => setCurrentPage(pageNum)}
-                      className={`w-8 h-8 rounded-lg text-xs font-semibold transition-colors ${
-                        isCurrentPage
-                          ? 'bg-red-600/80 text-white'
-                          : 'border border-slate-700/60 text-slate-300 hover:border-red-400/60 hover:text-red-300'
-                      }`}
-                    >
-                      {pageNum}
-                    </button>
-                  ) : pageNum === 2 && currentPage > 3 ? (
-                    <span key="dots-start" className="text-slate-500">...</span>
-                  ) : pageNum === totalPages - 1 && currentPage < totalPages - 2 ? (
-                    <span key="dots-end" className="text-slate-500">...</span>
-                  ) : null;
-                })}
-              </div>
+          {nextCursor && (
+            <div className="flex items-center justify-center">
               <button
-                onClick={() => setCurrentPage(prev => Math.min(prev + 1, totalPages))}
-                disabled={currentPage === totalPages}
-                className="flex items-center gap-2 rounded-lg border border-slate-700/60 px-4 py-2 text-sm text-slate-300 disabled:opacity-50 disabled:cursor-not-allowed hover:border-red-400/60 hover:text-red-300 transition-colors"
+                onClick={loadMore}
+                disabled={loadingMore}
+                className="rounded-lg border border-slate-700/60 px-4 py-2 text-sm text-slate-300 disabled:opacity-50 disabled:cursor-not-allowed hover:border-red-400/60 hover:text-red-300 transition-colors"
               >
-                Next
-                <ChevronRightIcon className="h-4 w-4" />
+                {loadingMore ? "Loading..." : "Load more"}
               </button>
             </div>
           )}
@@ -2,7 +2,7 @@ import React, { useEffect, useMemo, useState } from "react";
 import { Link } from "react-router-dom";
 import { motion, AnimatePresence } from "framer-motion";
 import { FaChartLine, FaSearch, FaStar, FaUserFriends } from "react-icons/fa";
-import { getMovies } from "../api/api";
+import { getMovies, getMoviesBatch } from "../api/api";
 import { getWatchlistIds, subscribeWatchlist } from "../utils/watchlist";
 import MovieCard from "../components/MovieCard";
 import Recommendations from "../components/Recommendations";
@@ -33,6 +33,7 @@ const Home: React.FC = () => {
   const [genre, setGenre] = useState("All");
   const [showFilters, setShowFilters] = useState(false);
   const [watchlistIds, setWatchlistIds] = useState<number[]>([]);
+  const [watchlistMovies, setWatchlistMovies] = useState<Movie[]>([]);
 
   useEffect(() => {
     setLoading(true);
@@ -47,6 +48,17 @@ const Home: React.FC = () => {
     return subscribeWatchlist(setWatchlistIds);
   }, []);
 
+  useEffect(() => {
+    const ids = watchlistIds.slice(0, 6);
+    if (ids.length === 0) {
+      setWatchlistMovies([]);
+      return;
+    }
+    getMoviesBatch(ids)
+      .then(res => setWatchlistMovies(res.data.movies))
+      .catch(() => setWatchlistMovies([]));
+  }, [watchlistIds]);
+
   const genres = useMemo(() => {
     const values = new Set(movies.map(movie => movie.genre).filter(Boolean) as string[])
     return ["All", ...Array.from(values)]
@@ -62,10 +74,6 @@ const Home: React.FC = () => {
 
   const topMovies = useMemo(() => filteredMovies.slice(0, 3), [filteredMovies])
   const trendingMovies = useMemo(() => filteredMovies.slice(0, 8), [filteredMovies])
-  const watchlistMovies = useMemo(
-    () => movies.filter(movie => watchlistIds.includes(movie.movie_id)).slice(0, 6),
-    [movies, watchlistIds]
-  )
 
   return (
     <div className="mx-auto flex max-w-6xl flex-col gap-10">
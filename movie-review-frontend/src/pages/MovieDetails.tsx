@@ -2,7 +2,15 @@ import React, { useEffect, useMemo, useState } from "react";
 import { useParams, Link } from "react-router-dom";
 import { motion } from "framer-motion";
 import { FaArrowLeft, FaBookmark, FaRegBookmark, FaStar } from "react-icons/fa";
-import { getReviews, addReview, getMovieDetails } from "../api/api";
+import {
+  getReviews,
+  addReview,
+  getMovieDetails,
+  getMovieReviewStats,
+  getSimilarMovies,
+  MovieReviewStats,
+  SimilarMovie,
+} from "../api/api";
 import ReviewCard from "../components/ReviewCard";
 import ReviewSystem from "../components/ReviewSystem";
 import AudienceMoodMeter from "../components/AudienceMoodMeter";
@@ -29,6 +37,8 @@ interface Review {
 const MovieDetails: React.FC = () => {
   const { id } = useParams<{ id: string }>();
   const [reviews, setReviews] = useState<Review[]>([]);
+  const [stats, setStats] = useState<MovieReviewStats | null>(null);
+  const [similar, setSimilar] = useState<SimilarMovie[]>([]);
   const [newComment, setNewComment] = useState("");
   const [newRating, setNewRating] = useState(5);
   const [selectedMood, setSelectedMood] = useState<"mindBlowing" | "lovedIt" | "good" | "meh" | "boring" | null>(null);
@@ -43,14 +53,23 @@ const MovieDetails: React.FC = () => {
     setLoading(true);
     Promise.all([
       getReviews(Number(id)).catch(() => ({ data: [] })),
-      getMovieDetails(Number(id)).catch(() => ({ data: { title: '' } }))
-    ]).then(([reviewsRes, movieRes]) => {
+      getMovieDetails(Number(id)).catch(() => ({ data: { title: '' } })),
+      getMovieReviewStats(Number(id)).catch(() => ({ data: null }))
+    ]).then(([reviewsRes, movieRes, statsRes]) => {
       setReviews(reviewsRes.data);
       setMovie(movieRes.data);
+      setStats(statsRes.data);
       setLoading(false);
     });
   }, [id]);
 
+  useEffect(() => {
+    if (!id) return;
+    getSimilarMovies(Number(id), 8)
+      .then(res => setSimilar(res.data.similar))
+      .catch(() => setSimilar([]));
+  }, [id]);
+
   useEffect(() => {
     if (!id) return;
     const movieId = Number(id);
@@ -58,6 +77,11 @@ const MovieDetails: React.FC = () => {
     return subscribeWatchlist((ids) => setIsSaved(ids.includes(movieId)));
   }, [id]);
 
+  const refreshReviews = (movieId: number) => {
+    getReviews(movieId).then(res => setReviews(res.data));
+    getMovieReviewStats(movieId).then(res => setStats(res.data)).catch(() => undefined);
+  };
+
   const submitReview = () => {
     const userStr = localStorage.getItem('user');
     if (!userStr) {
@@ -70,7 +94,7 @@ const MovieDetails: React.FC = () => {
       .then(() => {
         setNewComment('');
         setNewRating(5);
-        getReviews(Number(id)).then(res => setReviews(res.data));
+        refreshReviews(Number(id));
       })
       .catch(err => {
         console.error(err);
@@ -78,29 +102,25 @@ const MovieDetails: React.FC = () => {
       });
   };
 
-  const averageRating = useMemo(() => {
-    if (reviews.length === 0) return 0;
-    const total = reviews.reduce((sum, review) => sum + review.rating, 0);
-    return Number((total / reviews.length).toFixed(1));
-  }, [reviews]);
+  // Rating widgets read the server-side counters rather than the loaded review list.
+  const totalReviews = stats?.review_count ?? reviews.length;
+
+  const averageRating = stats?.avg_rating_rounded ?? 0;
 
   const ratingBreakdown = useMemo(() => {
-    const counts = [0, 0, 0, 0, 0];
-    reviews.forEach(review => {
-      if (review.rating >= 1 && review.rating <= 5) counts[review.rating - 1] += 1;
-    });
-    return counts.reverse();
-  }, [reviews]);
+    const histogram = stats?.histogram;
+    return [5, 4, 3, 2, 1].map(star => (histogram ? histogram[String(star) as keyof typeof histogram] : 0));
+  }, [stats]);
 
   const moodCounts = useMemo(
     () => ({
-      mindBlowing: reviews.filter(r => r.rating === 5).length,
-      lovedIt: reviews.filter(r => r.rating === 4).length,
-      good: reviews.filter(r => r.rating === 3).length,
-      meh: reviews.filter(r => r.rating === 2).length,
-      boring: reviews.filter(r => r.rating === 1).length,
+      mindBlowing: ratingBreakdown[0],
+      lovedIt: ratingBreakdown[1],
+      good: ratingBreakdown[2],
+      meh: ratingBreakdown[3],
+      boring: ratingBreakdown[4],
     }),
-    [reviews]
+    [ratingBreakdown]
   );
 
   const handleMoodSelect = (mood: "mindBlowing" | "lovedIt" | "good" | "meh" | "boring") => {
@@ -126,12 +146,12 @@ const MovieDetails: React.FC = () => {
     if (movie?.review_count !== undefined && movie?.review_count !== null) {
       return Number(movie.review_count);
     }
-    return reviews.length;
-  }, [movie?.review_count, reviews.length]);
+    return totalReviews;
+  }, [movie?.review_count, totalReviews]);
 
   const ratingTimeline = useMemo<RatingPoint[]>(() => {
     const base = averageRating || 3.5;
-    const variance = reviews.length ? Math.min(0.6, reviews.length / 20) : 0.2;
+    const variance = totalReviews ? Math.min(0.6, totalReviews / 20) : 0.2;
     const now = new Date();
     const points: RatingPoint[] = [];
     for (let i = 5; i >= 0; i -= 1) {
@@ -142,7 +162,7 @@ const MovieDetails: React.FC = () => {
       points.push({ label, average: value });
     }
     return points;
-  }, [averageRating, reviews.length]);
+  }, [averageRating, totalReviews]);
 
   const handleReaction = (reviewId: number, emoji: string) => {
     setReactionsByReview(prev => {
@@ -250,14 +270,14 @@ const MovieDetails: React.FC = () => {
               <div>
                 <p className="text-xs uppercase tracking-[0.2em] text-slate-400">Community Rating</p>
                 <h3 className="text-2xl font-semibold text-white">{averageRating || "New"}</h3>
-                <p className="text-xs text-slate-400">Based on {reviews.length} reviews</p>
+                <p className="text-xs text-slate-400">Based on {totalReviews} reviews</p>
               </div>
               <div className="text-xs text-slate-300">Top rated by night owls</div>
             </div>
             <div className="mt-4 space-y-2">
               {[5, 4, 3, 2, 1].map((star, index) => {
                 const count = ratingBreakdown[index];
-                const percentage = reviews.length ? (count / reviews.length) * 100 : 0;
+                const percentage = totalReviews ? (count / totalReviews) * 100 : 0;
                 return (
                   <div key={star} className="flex items-center gap-3 text-xs text-slate-300">
                     <span>{star}★</span>
@@ -272,28 +292,51 @@ const MovieDetails: React.FC = () => {
           </div>
 
           <AudienceMoodMeter
-            totalVotes={reviews.length}
+            totalVotes={totalReviews}
             moodCounts={moodCounts}
             selectedMood={selectedMood || undefined}
             onSelectMood={handleMoodSelect}
           />
 
           <ThrillPulse
-            reviews={reviews}
+            stats={stats}
             averageRating={avgRatingValue}
             reviewCount={reviewCountValue}
           />
         </div>
       </section>
 
+      {similar.length > 0 && (
+        <section className="space-y-4">
+          <h2 className="text-2xl font-semibold text-white">More Like This</h2>
+          <div className="flex gap-4 overflow-x-auto pb-2">
+            {similar.map(({ movie: related }) => (
+              <Link
+                key={related.movie_id}
+                to={`/movie/${related.movie_id}`}
+                className="glass w-36 shrink-0 rounded-2xl p-2 text-xs text-slate-300 hover:text-white"
+              >
+                <img
+                  src={related.poster_url?.startsWith("/")
+                    ? `${window.location.origin}${related.poster_url}`
+                    : related.poster_url || "https://placehold.co/300x450/0f172a/ffffff?text=Poster"}
+                  alt={related.title}
+                  className="aspect-[2/3] w-full rounded-xl object-cover"
+                />
+                <p className="mt-2 truncate font-semibold text-white">{related.title}</p>
+                <p>{related.genre} • {related.release_year}</p>
+              </Link>
+            ))}
+          </div>
+        </section>
+      )}
+
       <section className="space-y-6">
         <h2 className="text-2xl font-semibold text-white">Reviews & Ratings</h2>
         {!loading && id && (
           <ReviewSystem 
             movieId={Number(id)} 
-            onReviewSubmitted={() => {
-              getReviews(Number(id)).then(res => setReviews(res.data));
-            }}
+            onReviewSubmitted={() => refreshReviews(Number(id))}
           />
         )}
       </section>